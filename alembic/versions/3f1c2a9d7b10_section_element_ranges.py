@@ -0,0 +1,39 @@
+"""section element ranges
+
+Store where each section sits in the body of the template .docx it was
+parsed from, so section extraction can slice the document without
+re-running heading detection.
+
+Revision ID: 3f1c2a9d7b10
+Revises:
+Create Date: 2026-10-17 09:12:40.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7b10'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Body element range [start, end) of the section, the total number of
+    # body elements, and the SHA-256 of the blob these indices refer to
+    op.add_column('plsqt_sections', sa.Column('plsqts_elem_start', sa.Integer(), nullable=True))
+    op.add_column('plsqt_sections', sa.Column('plsqts_elem_end', sa.Integer(), nullable=True))
+    op.add_column('plsqt_sections', sa.Column('plsqts_body_elem_count', sa.Integer(), nullable=True))
+    op.add_column('plsqt_sections', sa.Column('plsqts_source_sha256', postgresql.BYTEA(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('plsqt_sections', 'plsqts_source_sha256')
+    op.drop_column('plsqt_sections', 'plsqts_body_elem_count')
+    op.drop_column('plsqt_sections', 'plsqts_elem_end')
+    op.drop_column('plsqt_sections', 'plsqts_elem_start')
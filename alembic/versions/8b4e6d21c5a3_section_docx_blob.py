@@ -0,0 +1,36 @@
+"""section docx blob
+
+Link each section to a pre-built .docx of that section, stored as a
+content-addressed document_blob row.
+
+Revision ID: 8b4e6d21c5a3
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-17 10:03:18.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4e6d21c5a3'
+down_revision: Union[str, None] = '3f1c2a9d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('plsqt_sections', sa.Column('plsqts_docx_blob_id', sa.BigInteger(), nullable=True))
+    op.create_foreign_key(
+        'plsqt_sections_docx_blob_fk',
+        'plsqt_sections', 'document_blob',
+        ['plsqts_docx_blob_id'], ['blob_id'],
+        ondelete='SET NULL',
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('plsqt_sections_docx_blob_fk', 'plsqt_sections', type_='foreignkey')
+    op.drop_column('plsqt_sections', 'plsqts_docx_blob_id')
@@ -0,0 +1,39 @@
+"""section content sha256
+
+Store a SHA-256 of each section's text, so a reload can tell which
+sections of a template actually changed and update only those rows
+(see SQMDatabase.upsert_template). Existing rows are hashed in place.
+
+Revision ID: a2c9e4f71d58
+Revises: f7d3b8e15a60
+Create Date: 2026-10-17 14:02:37.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2c9e4f71d58'
+down_revision: Union[str, None] = 'f7d3b8e15a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('plsqt_sections', sa.Column('plsqts_content_sha256', postgresql.BYTEA(), nullable=True))
+    # Same digest as listldr.db.section_content_sha256()
+    op.execute(
+        """
+        UPDATE plsqt_sections
+        SET plsqts_content_sha256 = sha256(convert_to(plsqts_content, 'UTF8'))
+        WHERE plsqts_content IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('plsqt_sections', 'plsqts_content_sha256')
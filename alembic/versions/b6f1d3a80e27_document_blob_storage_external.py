@@ -0,0 +1,31 @@
+"""document_blob bytes storage external
+
+Store document_blob.bytes out of line without compression, so
+substring() reads of a blob (SQMDatabase.iter_blob_chunks) fetch only
+the TOAST chunks they cover instead of decompressing the whole value.
+.docx files are zip archives and barely compress anyway. Applies to rows
+written from now on; existing values keep their storage until rewritten.
+
+Revision ID: b6f1d3a80e27
+Revises: a2c9e4f71d58
+Create Date: 2026-10-17 15:10:44.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6f1d3a80e27'
+down_revision: Union[str, None] = 'a2c9e4f71d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE document_blob ALTER COLUMN bytes SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE document_blob ALTER COLUMN bytes SET STORAGE EXTENDED")
@@ -0,0 +1,44 @@
+"""section heading and type match memo
+
+Keep each section's parsed heading on its plsqt_sections row, and memoize
+heading -> section type matches per version of the plsqts_type catalog,
+so sections can be reclassified without reloading their templates.
+
+Revision ID: c5e0a7d39b42
+Revises: 8b4e6d21c5a3
+Create Date: 2026-10-17 11:26:05.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e0a7d39b42'
+down_revision: Union[str, None] = '8b4e6d21c5a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Heading text as parsed; NULL for rows loaded before this revision
+    # (cli/reclassify_sections.py fills those in from the template blob)
+    op.add_column('plsqt_sections', sa.Column('plsqts_heading', sa.Text(), nullable=True))
+
+    # Lowercased heading -> best section type (NULL = no match) for one
+    # catalog version (SHA-256 of the ordered plsqts_type id/name list)
+    op.create_table(
+        'plsqts_type_match',
+        sa.Column('heading_norm', sa.Text(), nullable=False),
+        sa.Column('catalog_version', sa.String(64), nullable=False),
+        sa.Column('section_type_id', sa.Integer(), nullable=True),
+        sa.Column('created_datetime', sa.DateTime(), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('heading_norm', 'catalog_version'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('plsqts_type_match')
+    op.drop_column('plsqt_sections', 'plsqts_heading')
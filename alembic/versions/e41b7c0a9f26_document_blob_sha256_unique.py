@@ -0,0 +1,78 @@
+"""document_blob sha256 unique
+
+Make sure document_blob.sha256 is unique, as in docs/listmgr1_db_schema.sql,
+so blob deduplication can rely on INSERT ... ON CONFLICT (sha256) and
+looks blobs up through the index. Databases created without the
+constraint may already hold duplicate blobs: references to them are
+moved to the oldest copy and the other copies are deleted first.
+
+Revision ID: e41b7c0a9f26
+Revises: c5e0a7d39b42
+Create Date: 2026-10-17 12:40:51.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b7c0a9f26'
+down_revision: Union[str, None] = 'c5e0a7d39b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column) pairs that reference document_blob.blob_id
+BLOB_REFERENCES = [
+    ('plsq_templates', 'current_blob_id'),
+    ('customer_quotes', 'current_blob_id'),
+    ('document_blob_history', 'blob_id'),
+    ('plsqt_sections', 'plsqts_docx_blob_id'),
+]
+
+
+def upgrade() -> None:
+    # Map every duplicate blob to the oldest blob with the same content
+    op.execute(
+        """
+        CREATE TEMP TABLE blob_dupes AS
+        SELECT blob_id, keep_id
+        FROM (
+            SELECT blob_id, min(blob_id) OVER (PARTITION BY sha256) AS keep_id
+            FROM document_blob
+        ) b
+        WHERE blob_id <> keep_id
+        """
+    )
+    for table, column in BLOB_REFERENCES:
+        op.execute(
+            f"""
+            UPDATE {table} r SET {column} = d.keep_id
+            FROM blob_dupes d
+            WHERE r.{column} = d.blob_id
+            """
+        )
+    op.execute("DELETE FROM document_blob b USING blob_dupes d WHERE b.blob_id = d.blob_id")
+    op.execute("DROP TABLE blob_dupes")
+
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint WHERE conname = 'document_blob_sha256_unique'
+            ) THEN
+                ALTER TABLE document_blob
+                    ADD CONSTRAINT document_blob_sha256_unique UNIQUE (sha256);
+            END IF;
+        END
+        $$
+        """
+    )
+
+
+def downgrade() -> None:
+    # The constraint belongs to the base schema and merged duplicates
+    # cannot be split again, so there is nothing to undo
+    pass
@@ -0,0 +1,31 @@
+"""template name and section seqn indexes
+
+Index the two lookups on the load and extraction hot paths:
+plsq_templates by plsqt_name (upsert_template, get_template_fingerprints) and
+plsqt_sections by (plsqt_id, plsqts_seqn) (get_section_info).
+
+Revision ID: f7d3b8e15a60
+Revises: e41b7c0a9f26
+Create Date: 2026-10-17 13:18:22.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7d3b8e15a60'
+down_revision: Union[str, None] = 'e41b7c0a9f26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_templates_name', 'plsq_templates', ['plsqt_name'])
+    op.create_index('idx_sections_template_seqn', 'plsqt_sections', ['plsqt_id', 'plsqts_seqn'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_sections_template_seqn', table_name='plsqt_sections')
+    op.drop_index('idx_templates_name', table_name='plsq_templates')
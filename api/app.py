@@ -14,9 +14,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from psycopg2.pool import ThreadedConnectionPool
 
-from listldr.config import db_config_from_env
+from listldr.config import (
+    blob_streams_from_env, db_config_from_env, load_executor_from_env, parse_cache_from_env,
+    parse_pool_from_env, section_cache_from_env,
+)
 from listldr.db import SQMDatabase
 from listldr.logger import SQMLogger
+from listldr.text_utils import SectionTypeMatcher
 from api.routes import router
 
 load_dotenv()
@@ -39,14 +43,34 @@ async def lifespan(app: FastAPI):
     )
     app.state.db_pool = pool
 
-    # Pre-fetch section types (cached for the lifetime of the app)
+    # Parse-result cache shared by load and section extraction
+    app.state.parse_cache = parse_cache_from_env()
+
+    # Extracted section documents, bounded by LISTLDR_SECTION_CACHE_MB, plus
+    # the disk tier in LISTLDR_SECTION_CACHE_DIR shared by all API workers
+    app.state.section_cache = section_cache_from_env()
+
+    # Large blob downloads streamed at once, each on a pooled connection
+    app.state.blob_streams = blob_streams_from_env()
+
+    # Threads for template loads (DB work and parsing), off the event loop
+    app.state.load_executor = load_executor_from_env()
+
+    # Pre-fetch section types and build the matcher (cached for the lifetime of the app)
     conn = pool.getconn()
     try:
         db = SQMDatabase(conn=conn)
-        app.state.section_types = db.fetch_all_section_types()
+        section_types = db.fetch_all_section_types()
+        app.state.section_types = SectionTypeMatcher(section_types)
     finally:
         pool.putconn(conn)
 
+    # Worker processes for parsing and section extraction
+    parse_cache_dir = app.state.parse_cache.cache_dir
+    app.state.parse_pool = parse_pool_from_env(
+        section_types, str(parse_cache_dir) if parse_cache_dir else None
+    )
+
     # Start request logger
     origins = os.environ.get("LISTLDR_CORS_ORIGINS", "http://localhost:3000")
     logger = SQMLogger(log_dir="./log", slug="API_services", version="01", silent=False)
@@ -55,10 +79,26 @@ async def lifespan(app: FastAPI):
     logger.log(f"DB host: {cfg.host}:{cfg.port}/{cfg.database}")
     logger.log(f"CORS origins: {origins}")
     logger.log(f"Section types cached: {len(app.state.section_types)}")
+    logger.log(f"Parse cache dir: {app.state.parse_cache.cache_dir or '(memory only)'}")
+    logger.log(f"Parse workers: {app.state.parse_pool.max_workers or '(in-process)'}"
+               f" (timeout {app.state.parse_pool.task_timeout:g}s,"
+               f" memory cap {app.state.parse_pool.memory_limit_mb or '-'} MB)")
+    logger.log(f"Section cache: {app.state.section_cache.max_bytes // (1024 * 1024)} MB")
+    if app.state.section_cache.cache_dir is not None:
+        logger.log(f"Section cache dir: {app.state.section_cache.cache_dir}"
+                   f" ({app.state.section_cache.max_disk_bytes // (1024 * 1024)} MB)")
 
     yield
 
-    # Shutdown: log uptime, close logger, close pool
+    # Shutdown: finish running loads, stop parse workers, log uptime, close logger, close pool
+    app.state.load_executor.shutdown(wait=True)
+    app.state.parse_pool.shutdown()
+    stats = app.state.section_cache.stats()
+    logger.log(f"Section cache: {stats['hits']} hits, {stats['misses']} misses,"
+               f" {stats['evictions']} evictions, {stats['entries']} entries ({stats['bytes']} bytes)")
+    if app.state.section_cache.cache_dir is not None:
+        logger.log(f"Section disk cache: {stats['disk_hits']} hits, {stats['disk_misses']} misses,"
+                   f" {stats['disk_evictions']} evictions")
     logger.log(f"=== Shutting down (uptime {logger.elapsed_seconds:.1f}s) ===")
     logger.close()
     pool.closeall()
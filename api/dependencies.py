@@ -2,22 +2,32 @@
 FastAPI dependency injection for DB connections, cached data, and logging.
 """
 
-from typing import Generator
+import threading
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from typing import Generator, Iterator
+
+from psycopg2.pool import AbstractConnectionPool
 
 from fastapi import Depends, Request
 
 from listldr.db import SQMDatabase
 from listldr.logger import SQMLogger
+from listldr.parse_cache import ParseCache
+from listldr.parse_pool import ParsePool
+from listldr.section_cache import SectionDocCache
+from listldr.text_utils import SectionTypeMatcher
 
 
-def get_db(request: Request) -> Generator[SQMDatabase, None, None]:
+@contextmanager
+def pooled_db(pool: AbstractConnectionPool) -> Iterator[SQMDatabase]:
     """
-    Yield an SQMDatabase backed by a pooled connection.
+    Yield an SQMDatabase backed by a connection from pool.
 
     Commits on success, rolls back on exception, and returns the
-    connection to the pool when done.
+    connection to the pool when done. Usable from any thread, e.g. inside
+    work handed to the load executor.
     """
-    pool = request.app.state.db_pool
     conn = pool.getconn()
     db = SQMDatabase(conn=conn)
     try:
@@ -30,11 +40,59 @@ def get_db(request: Request) -> Generator[SQMDatabase, None, None]:
         pool.putconn(conn)
 
 
-def get_section_types(request: Request) -> list[tuple[int, str]]:
-    """Return the cached section_types list from app state."""
+def get_db(request: Request) -> Generator[SQMDatabase, None, None]:
+    """
+    Yield a pooled SQMDatabase for the duration of a (sync) request.
+
+    FastAPI runs this in its threadpool along with the sync endpoints that
+    use it. Async endpoints must not use it, as its queries would block
+    the event loop; they run their database work via get_load_executor.
+    """
+    with pooled_db(request.app.state.db_pool) as db:
+        yield db
+
+
+def get_db_pool(request: Request) -> AbstractConnectionPool:
+    """
+    Return the connection pool from app state.
+
+    For streamed responses that read from the database while streaming:
+    they must take a connection of their own, as the one from get_db may
+    be returned to the pool before the body is sent.
+    """
+    return request.app.state.db_pool
+
+
+def get_blob_streams(request: Request) -> threading.BoundedSemaphore:
+    """Return the semaphore limiting concurrent blob streams (LISTLDR_BLOB_STREAMS)."""
+    return request.app.state.blob_streams
+
+
+def get_load_executor(request: Request) -> Executor:
+    """Return the executor that runs template loads (LISTLDR_LOAD_WORKERS threads)."""
+    return request.app.state.load_executor
+
+
+def get_section_types(request: Request) -> SectionTypeMatcher:
+    """Return the cached section-type matcher from app state."""
     return request.app.state.section_types
 
 
+def get_parse_cache(request: Request) -> ParseCache:
+    """Return the shared ParseCache from app state."""
+    return request.app.state.parse_cache
+
+
+def get_parse_pool(request: Request) -> ParsePool:
+    """Return the shared ParsePool (worker processes for parsing/extraction) from app state."""
+    return request.app.state.parse_pool
+
+
+def get_section_cache(request: Request) -> SectionDocCache:
+    """Return the shared in-process SectionDocCache from app state."""
+    return request.app.state.section_cache
+
+
 def get_logger(request: Request) -> SQMLogger:
     """Return the shared SQMLogger instance from app state."""
     return request.app.state.logger
@@ -2,17 +2,50 @@
 API routes for the SQM template loader.
 """
 
-from fastapi import APIRouter, Depends, File, Form, UploadFile, HTTPException
-from fastapi.responses import Response
+import asyncio
+import hashlib
+import threading
+import weakref
+from concurrent.futures import Executor
+from functools import partial
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from fastapi import APIRouter, Depends, File, Form, Header, UploadFile, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from psycopg2.pool import AbstractConnectionPool
 
 from listldr.db import SQMDatabase
 from listldr.logger import SQMLogger
-from listldr.parser import extract_section_docx
-from listldr.service import load_template
-from api.dependencies import get_db, get_logger, get_section_types
+from listldr.parse_cache import ParseCache
+from listldr.parse_pool import ParsePool, ParsePoolBusy, ParseTimeout
+from listldr.section_cache import SectionDocCache
+from listldr.docx_package import PackageStream, iter_stored_zip
+from listldr.parser import PARSER_VERSION, extract_all_sections
+from listldr.models import TemplateLoadResult
+from listldr.service import apply_template, stored_section_ranges, unchanged_template
+from api.dependencies import (
+    get_blob_streams, get_db, get_db_pool, get_load_executor, get_logger, get_parse_cache,
+    get_parse_pool, get_section_cache, pooled_db,
+)
 from api.schemas import LoadSuccessResponse, TemplateResponse, SectionResponse
 
 DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+ZIP_CONTENT_TYPE = "application/zip"
+
+# Read size for section documents served from the disk cache
+FILE_CHUNK_BYTES = 256 * 1024
+
+# Retry-After (seconds) sent with 503 when the parse workers or blob streams are busy
+RETRY_AFTER_SECONDS = 5
+
+# Stored blobs up to this size are read in one query and sent from memory;
+# larger ones are streamed over a pooled connection (see _blob_response)
+BLOB_INLINE_MAX_BYTES = 1024 * 1024
+
+# How long clients and proxies may reuse a section download before
+# revalidating it with If-None-Match (a reload changes it under the same URL)
+SECTION_MAX_AGE_SECONDS = 24 * 3600
 
 router = APIRouter(prefix="/api/v1/templates", tags=["templates"])
 
@@ -24,14 +57,28 @@ async def load_template_endpoint(
     currency: str = Form(...),
     product_line: str | None = Form(None),
     dry_run: bool = Form(False),
-    db: SQMDatabase = Depends(get_db),
-    section_types: list[tuple[int, str]] = Depends(get_section_types),
+    force: bool = Form(False),
+    pool: AbstractConnectionPool = Depends(get_db_pool),
+    executor: Executor = Depends(get_load_executor),
+    parse_pool: ParsePool = Depends(get_parse_pool),
+    section_cache: SectionDocCache = Depends(get_section_cache),
     logger: SQMLogger = Depends(get_logger),
 ):
     """
     Upload and load a .docx sales-quote template into the database.
+
+    A file identical to the one the template already holds is not reloaded
+    (the response has unchanged=true) unless force is set.
+
+    Only the upload is awaited here; the lookups, parsing and writes run on
+    the load executor (see _load_upload), so a load does not hold up other
+    requests served by this worker. Parsing runs in a parse worker process;
+    503 (with Retry-After) if none is free, 504 if parsing times out.
     """
-    logger.log(f"POST /load file={file.filename} country={country} currency={currency} dry_run={dry_run}")
+    logger.log(
+        f"POST /load file={file.filename} country={country} currency={currency}"
+        f" dry_run={dry_run} force={force}"
+    )
 
     # Validate file extension
     if not file.filename or not file.filename.lower().endswith(".docx"):
@@ -39,41 +86,31 @@ async def load_template_endpoint(
         logger.log(f"  ERROR 400: {detail}")
         raise HTTPException(status_code=400, detail=detail)
 
-    # Resolve country and currency
-    country_id = db.lookup_country(country)
-    if country_id is None:
-        detail = f"Country not found: {country}"
-        logger.log(f"  ERROR 400: {detail}")
-        raise HTTPException(status_code=400, detail=detail)
-
-    currency_id = db.lookup_currency(currency)
-    if currency_id is None:
-        detail = f"Currency not found: {currency}"
-        logger.log(f"  ERROR 400: {detail}")
-        raise HTTPException(status_code=400, detail=detail)
-
     # Read file bytes
     file_bytes = await file.read()
 
-    try:
-        result = load_template(
-            file_bytes=file_bytes,
-            filename=file.filename,
-            db=db,
-            country_id=country_id,
-            currency_id=currency_id,
-            section_types=section_types,
-            product_line_override=product_line,
-            update_user="SQM_api",
+    result = await asyncio.get_running_loop().run_in_executor(
+        executor,
+        partial(
+            _load_upload,
+            pool,
+            file_bytes,
+            file.filename,
+            country=country,
+            currency=currency,
+            product_line=product_line,
             dry_run=dry_run,
-        )
-    except ValueError as e:
-        logger.log(f"  ERROR 400 (ValueError): {e}")
-        raise HTTPException(status_code=400, detail=str(e))
+            force=force,
+            parse_pool=parse_pool,
+            section_cache=section_cache,
+            logger=logger,
+        ),
+    )
 
     logger.log(
         f"  OK: template={result.template_name} plsqt_id={result.plsqt_id}"
         f" blob_id={result.blob_id} sections={result.section_count} is_new={result.is_new}"
+        f" unchanged={result.unchanged}"
     )
 
     return LoadSuccessResponse(
@@ -84,6 +121,7 @@ async def load_template_endpoint(
             is_new=result.is_new,
             section_count=result.section_count,
             blob_id=result.blob_id,
+            unchanged=result.unchanged,
             sections=[
                 SectionResponse(
                     sequence=s.sequence,
@@ -96,18 +134,238 @@ async def load_template_endpoint(
     )
 
 
+def _load_upload(
+    pool: AbstractConnectionPool,
+    file_bytes: bytes,
+    filename: str,
+    *,
+    country: str,
+    currency: str,
+    product_line: str | None,
+    dry_run: bool,
+    force: bool,
+    parse_pool: ParsePool,
+    section_cache: SectionDocCache,
+    logger: SQMLogger,
+) -> TemplateLoadResult:
+    """
+    Blocking part of POST /load, run on the load executor: resolve country
+    and currency, then load the file, in one transaction on a pooled
+    connection. Same steps as load_template(), with prepare_template() run
+    in a parse worker. Raises HTTPException for invalid input (400) or when
+    the parse workers cannot take the file (503/504).
+    """
+    with pooled_db(pool) as db:
+        # Resolve country and currency
+        country_id = db.lookup_country(country)
+        if country_id is None:
+            detail = f"Country not found: {country}"
+            logger.log(f"  ERROR 400: {detail}")
+            raise HTTPException(status_code=400, detail=detail)
+
+        currency_id = db.lookup_currency(currency)
+        if currency_id is None:
+            detail = f"Currency not found: {currency}"
+            logger.log(f"  ERROR 400: {detail}")
+            raise HTTPException(status_code=400, detail=detail)
+
+        try:
+            sha256 = hashlib.sha256(file_bytes).digest()
+            if not force:
+                stem = Path(filename).stem
+                unchanged = unchanged_template(
+                    file_bytes,
+                    filename,
+                    db.get_template_fingerprints(stem).get(stem),
+                    country_id,
+                    currency_id,
+                    product_line_override=product_line,
+                    sha256=sha256,
+                )
+                if unchanged is not None:
+                    return unchanged
+
+            prepared = parse_pool.prepare_template(file_bytes, filename, product_line, sha256)
+            result = apply_template(
+                prepared,
+                db,
+                country_id,
+                currency_id,
+                update_user="SQM_api",
+                dry_run=dry_run,
+            )
+            if not dry_run:
+                # Drops cached sections of the template's previous blob
+                section_cache.check_template(result.plsqt_id, result.blob_id)
+            return result
+        except (ParsePoolBusy, ParseTimeout) as e:
+            raise _parse_pool_error(e, logger)
+        except ValueError as e:
+            logger.log(f"  ERROR 400 (ValueError): {e}")
+            raise HTTPException(status_code=400, detail=str(e))
+
+
+def _parse_pool_error(e: ParsePoolBusy | ParseTimeout, logger: SQMLogger) -> HTTPException:
+    """HTTP error for a task the parse workers did not run: 503 to retry later, 504 on timeout."""
+    if isinstance(e, ParseTimeout):
+        logger.log(f"  ERROR 504: {e}")
+        return HTTPException(status_code=504, detail=str(e))
+    logger.log(f"  ERROR 503: {e}")
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
+def _section_name(row: dict) -> str:
+    """Section display name: plsqts_alt_name if flagged, else the section type name."""
+    if row["plsqts_use_alt_name"] and row["plsqts_alt_name"]:
+        return row["plsqts_alt_name"]
+    return row["plsqtst_name"]
+
+
+def _stream_blob(pool: AbstractConnectionPool, blob_id: int) -> Iterator[memoryview]:
+    """
+    Yield a stored blob in chunks, reading over a pooled connection of its
+    own that is held only while the response body is being sent.
+    """
+    conn = pool.getconn()
+    try:
+        yield from SQMDatabase(conn=conn).iter_blob_chunks(blob_id)
+    finally:
+        conn.rollback()
+        pool.putconn(conn)
+
+
+def _blob_response(
+    db: SQMDatabase,
+    pool: AbstractConnectionPool,
+    blob_streams: threading.BoundedSemaphore,
+    blob_id: int,
+    size: int,
+    headers: dict[str, str],
+    logger: SQMLogger,
+) -> Response:
+    """
+    Response sending a stored blob of the given size.
+
+    Blobs up to BLOB_INLINE_MAX_BYTES are read in one query over the
+    request's connection and sent from memory. Larger ones are streamed
+    over a pooled connection held for the whole transfer, so only as many
+    as blob_streams allows run at once, and slow clients cannot take every
+    pooled connection; beyond that 503 with Retry-After. The stream's slot
+    is released when the body has been sent or abandoned, or, if it was
+    never started, when its iterator is discarded.
+    """
+    if size <= BLOB_INLINE_MAX_BYTES:
+        data = db.get_blob_buffer(blob_id)
+        if data is None:
+            detail = f"Blob {blob_id} not found in document_blob"
+            logger.log(f"  ERROR 404: {detail}")
+            raise HTTPException(status_code=404, detail=detail)
+        return Response(content=data, media_type=DOCX_CONTENT_TYPE, headers=headers)
+
+    if not blob_streams.acquire(blocking=False):
+        detail = "Too many downloads in progress"
+        logger.log(f"  ERROR 503: {detail}")
+        raise HTTPException(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+
+    def chunks() -> Iterator[memoryview]:
+        try:
+            yield from _stream_blob(pool, blob_id)
+        finally:
+            release()
+
+    body = chunks()
+    release = weakref.finalize(body, blob_streams.release)  # runs at most once
+    return StreamingResponse(
+        body,
+        media_type=DOCX_CONTENT_TYPE,
+        headers={"Content-Length": str(size), **headers},
+    )
+
+
+def _section_etag(template: dict, section_row: dict, seqn: int, lite: bool) -> str:
+    """
+    Strong ETag of a section download, from metadata only.
+
+    The document is fully determined by the stored blob (its SHA-256), the
+    section's recorded element range, the pre-built document if one is
+    served, the parser version and lite.
+    """
+    key = "|".join(str(value) for value in (
+        template["blob_sha256"],
+        seqn,
+        section_row["plsqts_elem_start"],
+        section_row["plsqts_elem_end"],
+        None if lite else section_row["plsqts_docx_blob_id"],
+        PARSER_VERSION,
+        lite,
+    ))
+    return f'"{hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """True if an If-None-Match header value matches etag (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def _section_filename(plsqt_id: int, blob_id: int, seqn: int, section_name: str) -> str:
+    """Download filename of an extracted section (spaces become underscores)."""
+    safe_name = section_name.replace(" ", "_")
+    return f"plsqts_content_{plsqt_id}_{blob_id}_{seqn}_{safe_name}.docx"
+
+
 @router.get("/{plsqt_id}/sections/{seqn}/docx")
 def get_section_docx(
     plsqt_id: int,
     seqn: int,
+    lite: bool = False,
     db: SQMDatabase = Depends(get_db),
+    pool: AbstractConnectionPool = Depends(get_db_pool),
+    blob_streams: threading.BoundedSemaphore = Depends(get_blob_streams),
     logger: SQMLogger = Depends(get_logger),
+    parse_cache: ParseCache = Depends(get_parse_cache),
+    parse_pool: ParsePool = Depends(get_parse_pool),
+    section_cache: SectionDocCache = Depends(get_section_cache),
+    if_none_match: str | None = Header(None),
 ):
     """
     Extract a single section from a template's .docx file and return it
     as a fully formatted .docx document (clone-and-strip).
+
+    Responses carry a strong ETag computed from metadata (see
+    _section_etag) and may be cached for SECTION_MAX_AGE_SECONDS. A request
+    whose If-None-Match matches is answered 304 from the template and
+    section lookups alone, without reading the blob. Extracted sections are
+    kept in the in-process section cache (see SectionDocCache).
+
+    A section document pre-built at load time (see
+    materialize_section_docs) is sent as stored (see _blob_response: 503
+    if too many large ones are being streamed). Otherwise the section is built from the stored blob: only
+    word/document.xml is rewritten; images, headers and footers the section
+    no longer references are left out, and every other part is copied from
+    the stored blob byte-for-byte. With lite=true all images are dropped as
+    well (for previews).
+
+    With parse workers (LISTLDR_PARSE_WORKERS > 0) the section is built in
+    a worker process, under its timeout and memory cap, and comes back as
+    one bytes object, so the response is buffered: the whole document is
+    held in memory before the first byte is sent. Without workers it is
+    built in this process and streamed as a PackageStream, mostly slices of
+    the stored blob. 503 (with Retry-After) if the parse pool is at
+    capacity, 504 if building the section times out.
     """
-    logger.log(f"GET /{plsqt_id}/sections/{seqn}/docx")
+    logger.log(f"GET /{plsqt_id}/sections/{seqn}/docx{'?lite=true' if lite else ''}")
 
     # 1. Look up template
     template = db.get_template_by_id(plsqt_id)
@@ -122,6 +380,9 @@ def get_section_docx(
         logger.log(f"  ERROR 404: {detail}")
         raise HTTPException(status_code=404, detail=detail)
 
+    # Cached sections of an earlier blob are dropped if it was reloaded
+    section_cache.check_template(plsqt_id, blob_id)
+
     # 2. Look up section record(s) for this seqn
     section_rows = db.get_section_info(plsqt_id, seqn)
     if not section_rows:
@@ -129,42 +390,313 @@ def get_section_docx(
         logger.log(f"  ERROR 404: {detail}")
         raise HTTPException(status_code=404, detail=detail)
 
-    # 3. Resolve section name (use alt_name if flagged)
-    row = section_rows[0]
-    if row["plsqts_use_alt_name"] and row["plsqts_alt_name"]:
-        section_name = row["plsqts_alt_name"]
+    # 3. Resolve section name (use alt_name if flagged) and filename
+    section_name = _section_name(section_rows[0])
+    filename = _section_filename(plsqt_id, blob_id, seqn, section_name)
+
+    # 4. Conditional request: the client's copy is current if its ETag
+    #    matches (the last row wins for a duplicated seqn, as in extraction)
+    etag = _section_etag(template, section_rows[-1], seqn, lite)
+    cache_headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={SECTION_MAX_AGE_SECONDS}, must-revalidate",
+    }
+    if _etag_matches(if_none_match, etag):
+        logger.log(f"  304: {filename} not modified")
+        return Response(status_code=304, headers=cache_headers)
+
+    # 5. Serve the pre-built section document if there is one
+    docx_blob_id = section_rows[-1]["plsqts_docx_blob_id"]
+    if docx_blob_id is not None and not lite:
+        docx_size = db.get_blob_size(docx_blob_id)
+        if docx_size is not None:
+            response = _blob_response(
+                db, pool, blob_streams, docx_blob_id, docx_size,
+                {
+                    "Content-Disposition": f'attachment; filename="{filename}"',
+                    "X-Section-Count": str(template["plsqt_section_count"]),
+                    "X-Content-Length": str(docx_size),
+                    **cache_headers,
+                },
+                logger,
+            )
+            logger.log(f"  OK: {filename} ({docx_size} bytes, pre-built)")
+            return response
+
+    # 6. Serve the section from the memory cache, then the shared disk
+    #    cache (streamed from the open file), or extract it and cache it in both
+    blob_sha256 = template["blob_sha256"]
+    docx_bytes = section_cache.get(blob_id, seqn, lite)
+    if docx_bytes is not None:
+        logger.log(f"  OK: {filename} ({len(docx_bytes)} bytes, cached)")
     else:
-        section_name = row["plsqtst_name"]
+        cached_file = section_cache.get_file(blob_sha256, seqn, lite) if blob_sha256 else None
+        if cached_file is not None:
+            file, size = cached_file
+            logger.log(f"  OK: {filename} ({size} bytes, disk cache)")
+            return StreamingResponse(
+                _stream_file(file),
+                media_type=DOCX_CONTENT_TYPE,
+                headers={
+                    "Content-Disposition": f'attachment; filename="{filename}"',
+                    "Content-Length": str(size),
+                    "X-Section-Count": str(template["plsqt_section_count"]),
+                    "X-Content-Length": str(size),
+                    **cache_headers,
+                },
+            )
+
+        section = _build_section_docx(
+            db, template, section_rows, seqn, lite, logger, parse_cache, parse_pool
+        )
+        if isinstance(section, PackageStream):
+            logger.log(f"  OK: {filename} ({section.size} bytes, streamed)")
+            return StreamingResponse(
+                _stream_and_cache(section, section_cache, blob_id, blob_sha256, seqn, lite),
+                media_type=DOCX_CONTENT_TYPE,
+                headers={
+                    "Content-Disposition": f'attachment; filename="{filename}"',
+                    "Content-Length": str(section.size),
+                    "X-Section-Count": str(template["plsqt_section_count"]),
+                    "X-Content-Length": str(section.size),
+                    **cache_headers,
+                },
+            )
 
-    # 4. Fetch blob bytes
-    source_bytes = db.get_blob_bytes(blob_id)
+        docx_bytes = section
+        section_cache.put(blob_id, seqn, lite, docx_bytes)
+        if blob_sha256:
+            section_cache.put_file(blob_sha256, seqn, lite, docx_bytes)
+        logger.log(f"  OK: {filename} ({len(docx_bytes)} bytes)")
+
+    return Response(
+        content=docx_bytes,
+        media_type=DOCX_CONTENT_TYPE,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Section-Count": str(template["plsqt_section_count"]),
+            "X-Content-Length": str(len(docx_bytes)),
+            **cache_headers,
+        },
+    )
+
+
+def _build_section_docx(
+    db: SQMDatabase,
+    template: dict,
+    section_rows: list[dict],
+    seqn: int,
+    lite: bool,
+    logger: SQMLogger,
+    parse_cache: ParseCache,
+    parse_pool: ParsePool,
+) -> bytes | PackageStream:
+    """
+    Fetch a template's blob and extract one section: as bytes built in a
+    parse worker, or as a PackageStream if the pool runs tasks in-process.
+    Raises HTTPException 404 if the blob or section is missing, 503/504 if
+    the parse pool cannot run the extraction.
+    """
+    plsqt_id = template["plsqt_id"]
+    blob_id = template["current_blob_id"]
+
+    # Fetch blob bytes (the buffer psycopg2 returns, not a copy)
+    source_bytes = db.get_blob_buffer(blob_id)
     if source_bytes is None:
         detail = f"Blob {blob_id} not found in document_blob"
         logger.log(f"  ERROR 404: {detail}")
         raise HTTPException(status_code=404, detail=detail)
 
-    # 5. Extract section from docx
-    docx_bytes = extract_section_docx(source_bytes, seqn)
-    if docx_bytes is None:
+    # Section ranges come from the section rows when they were recorded for
+    # this blob, else from the parse cache; the worker parses the document
+    # only if neither has them, and the ranges it found are cached
+    parsed = stored_section_ranges(section_rows, template["blob_sha256"])
+    if parsed is None:
+        parsed = parse_cache.get(template["blob_sha256"])
+    try:
+        if parse_pool.in_process:
+            section, ranges = parse_pool.stream_section_docx(source_bytes, seqn, parsed, lite=lite)
+        else:
+            section, ranges = parse_pool.extract_section_docx(source_bytes, seqn, parsed, lite=lite)
+    except (ParsePoolBusy, ParseTimeout) as e:
+        raise _parse_pool_error(e, logger)
+    if parsed is None:
+        parse_cache.put(template["blob_sha256"], ranges)
+    if section is None:
         detail = f"Section {seqn} not found in parsed document for template {plsqt_id}"
         logger.log(f"  ERROR 404: {detail}")
         raise HTTPException(
             status_code=404,
             detail=detail,
         )
+    return section
 
-    # 6. Build filename
-    safe_name = section_name.replace(" ", "_")
-    filename = f"plsqts_content_{plsqt_id}_{blob_id}_{seqn}_{safe_name}.docx"
 
-    logger.log(f"  OK: {filename} ({len(docx_bytes)} bytes)")
+def _stream_file(file: BinaryIO) -> Iterator[bytes]:
+    """
+    Yield an open file in chunks, then close it. Reading goes through the
+    open descriptor, so the whole file is sent even if another process
+    evicts (unlinks) it meanwhile.
+    """
+    with file:
+        while chunk := file.read(FILE_CHUNK_BYTES):
+            yield chunk
+
 
-    return Response(
-        content=docx_bytes,
-        media_type=DOCX_CONTENT_TYPE,
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"',
-            "X-Section-Count": str(template["plsqt_section_count"]),
-            "X-Content-Length": str(len(docx_bytes)),
-        },
+def _stream_and_cache(
+    stream: PackageStream,
+    section_cache: SectionDocCache,
+    blob_id: int,
+    blob_sha256: str | None,
+    seqn: int,
+    lite: bool,
+) -> Iterator[bytes | memoryview]:
+    """
+    Yield a section's chunks; once all of them were sent, store the
+    document in the section cache, if it keeps documents of its size. A
+    client that disconnects early leaves nothing cached.
+    """
+    if not section_cache.would_cache(stream.size):
+        yield from stream
+        return
+    chunks = []
+    for chunk in stream:
+        chunks.append(chunk)
+        yield chunk
+    docx_bytes = b"".join(chunks)
+    section_cache.put(blob_id, seqn, lite, docx_bytes)
+    if blob_sha256:
+        section_cache.put_file(blob_sha256, seqn, lite, docx_bytes)
+
+
+@router.get("/{plsqt_id}/sections.zip")
+def get_sections_zip(
+    plsqt_id: int,
+    lite: bool = False,
+    db: SQMDatabase = Depends(get_db),
+    logger: SQMLogger = Depends(get_logger),
+    parse_cache: ParseCache = Depends(get_parse_cache),
+    parse_pool: ParsePool = Depends(get_parse_pool),
+):
+    """
+    Extract every section of a template and return them as one zip of
+    .docx files, named as the single-section endpoint would name them.
+
+    The blob is fetched and parsed once. With parse workers the whole zip
+    is built in one worker task, under the pool's timeout and memory cap,
+    and sent buffered; without workers sections are built one at a time
+    from the same parsed tree while the zip is being streamed. 503 (with
+    Retry-After) if the parse pool is at capacity, 504 on timeout.
+    """
+    logger.log(f"GET /{plsqt_id}/sections.zip{'?lite=true' if lite else ''}")
+
+    # 1. Look up template
+    template = db.get_template_by_id(plsqt_id)
+    if template is None:
+        detail = f"Template not found: {plsqt_id}"
+        logger.log(f"  ERROR 404: {detail}")
+        raise HTTPException(status_code=404, detail=detail)
+
+    blob_id = template["current_blob_id"]
+    if blob_id is None:
+        detail = f"No document stored for template {plsqt_id}"
+        logger.log(f"  ERROR 404: {detail}")
+        raise HTTPException(status_code=404, detail=detail)
+
+    # 2. Look up all section records; the first record per seqn names it
+    section_rows = db.get_sections(plsqt_id)
+    section_names: dict[int, str] = {}
+    for row in section_rows:
+        section_names.setdefault(row["plsqts_seqn"], _section_name(row))
+    if not section_names:
+        detail = f"No sections for template {plsqt_id}"
+        logger.log(f"  ERROR 404: {detail}")
+        raise HTTPException(status_code=404, detail=detail)
+
+    # 3. Fetch blob bytes (the buffer psycopg2 returns, not a copy)
+    source_bytes = db.get_blob_buffer(blob_id)
+    if source_bytes is None:
+        detail = f"Blob {blob_id} not found in document_blob"
+        logger.log(f"  ERROR 404: {detail}")
+        raise HTTPException(status_code=404, detail=detail)
+
+    # 4. Use the recorded section ranges, else the parse cache, else parse
+    #    once (in the worker, or here); build the zip under the pool's limits
+    filenames = {
+        seqn: _section_filename(plsqt_id, blob_id, seqn, name)
+        for seqn, name in section_names.items()
+    }
+    parsed = stored_section_ranges(section_rows, template["blob_sha256"])
+    if parsed is None:
+        parsed = parse_cache.get(template["blob_sha256"])
+
+    def open_sections():
+        # In-process: sections are sliced out lazily as the zip streams
+        ranges = parsed
+        if ranges is None:
+            ranges = parse_cache.get_or_parse(source_bytes, template["blob_sha256"], with_text=False)
+        return extract_all_sections(source_bytes, ranges, seqns=filenames, lite=lite)
+
+    try:
+        if parse_pool.in_process:
+            sections = parse_pool.run(open_sections)
+            content = iter_stored_zip((filenames[seqn], stream) for seqn, stream in sections)
+        else:
+            content, ranges = parse_pool.build_sections_zip(source_bytes, filenames, parsed, lite=lite)
+            if parsed is None:
+                parse_cache.put(template["blob_sha256"], ranges)
+    except (ParsePoolBusy, ParseTimeout) as e:
+        raise _parse_pool_error(e, logger)
+
+    filename = f"plsqts_content_{plsqt_id}_{blob_id}.zip"
+    logger.log(f"  OK: {filename} ({len(section_names)} sections)")
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "X-Section-Count": str(template["plsqt_section_count"]),
+    }
+    if isinstance(content, bytes):
+        return Response(content=content, media_type=ZIP_CONTENT_TYPE, headers=headers)
+    return StreamingResponse(content, media_type=ZIP_CONTENT_TYPE, headers=headers)
+
+
+@router.get("/{plsqt_id}/docx")
+def get_template_docx(
+    plsqt_id: int,
+    db: SQMDatabase = Depends(get_db),
+    pool: AbstractConnectionPool = Depends(get_db_pool),
+    blob_streams: threading.BoundedSemaphore = Depends(get_blob_streams),
+    logger: SQMLogger = Depends(get_logger),
+):
+    """
+    Return a template's stored .docx file as loaded.
+
+    Files up to BLOB_INLINE_MAX_BYTES are sent from memory; larger ones are
+    streamed from document_blob in fixed-size chunks (see
+    SQMDatabase.iter_blob_chunks), so a download holds one chunk in memory
+    rather than the whole file. 503 (with Retry-After) if LISTLDR_BLOB_STREAMS
+    large downloads are already being streamed.
+    """
+    logger.log(f"GET /{plsqt_id}/docx")
+
+    template = db.get_template_by_id(plsqt_id)
+    if template is None:
+        detail = f"Template not found: {plsqt_id}"
+        logger.log(f"  ERROR 404: {detail}")
+        raise HTTPException(status_code=404, detail=detail)
+
+    blob_id = template["current_blob_id"]
+    size = db.get_blob_size(blob_id) if blob_id is not None else None
+    if size is None:
+        detail = f"No document stored for template {plsqt_id}"
+        logger.log(f"  ERROR 404: {detail}")
+        raise HTTPException(status_code=404, detail=detail)
+
+    filename = f"{template['plsqt_name']}.docx"
+    response = _blob_response(
+        db, pool, blob_streams, blob_id, size,
+        {"Content-Disposition": f'attachment; filename="{filename}"'},
+        logger,
     )
+    logger.log(f"  OK: {filename} ({size} bytes)")
+    return response
@@ -18,6 +18,7 @@ class TemplateResponse(BaseModel):
     is_new: bool
     section_count: int
     blob_id: int
+    unchanged: bool = False
     sections: list[SectionResponse]
 
 
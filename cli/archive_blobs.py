@@ -141,6 +141,10 @@ def main():
                   AND blob_id NOT IN (
                       SELECT blob_id FROM document_blob_history
                   )
+                  AND blob_id NOT IN (
+                      SELECT plsqts_docx_blob_id FROM plsqt_sections
+                      WHERE plsqts_docx_blob_id IS NOT NULL
+                  )
                 RETURNING blob_id, size_bytes
                 """,
                 (candidate_blob_ids,)
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
-# cli/batch_load.py - v2.1 - 2026-02-08
+# cli/batch_load.py - v2.5 - 2026-10-17
 # Batch load WAB sales-quote template files (.docx) into the listmgr1 database
-# Thin orchestrator that delegates core logic to listldr.service.load_template()
+# Thin orchestrator that delegates core logic to listldr.service (prepare_template/apply_template)
+# v2.3: --workers N reads/parses/validates/matches in a process pool; this process stays the only DB writer
+# v2.4: reading, preparing and DB writes overlap in a bounded pipeline (--read-ahead, --parse-ahead)
+# v2.5: files identical to the template's stored document are skipped before parsing (--force reloads them)
 
 """
 SQM Load Quote Template DOCX File - Batch CLI
@@ -15,19 +18,29 @@ See --help for available options.
 
 import argparse
 import configparser
+import hashlib
+import multiprocessing
+import os
+import queue
 import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Iterator
 
 # Ensure project root is on sys.path when run as a script (python cli/batch_load.py)
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from listldr.db import SQMDatabase, DBConfig
 from listldr.logger import SQMLogger
-from listldr.service import load_template
+from listldr.models import PreparedTemplate, TemplateLoadResult
+from listldr.parse_cache import ParseCache
+from listldr.service import apply_template, prepare_template, unchanged_template
+from listldr.text_utils import SectionTypeMatcher
 
 
-VERSION = "2.1"
+VERSION = "2.5"
 
 
 def parse_args() -> argparse.Namespace:
@@ -76,6 +89,28 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Halt on first error (disable CONTINUE_ON_ERRORS)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Worker processes for reading/parsing/matching "
+             "(1 = in-process, 0 = one per CPU; default: WORKERS or 1)"
+    )
+    parser.add_argument(
+        "--read-ahead",
+        type=int,
+        help="Files read ahead of the prepare stage (default: READ_AHEAD or 2)"
+    )
+    parser.add_argument(
+        "--parse-ahead",
+        type=int,
+        help="Prepared files queued ahead of the DB writer "
+             "(default: PARSE_AHEAD, or 0 = max(2, 2 x workers))"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reload files even if identical to the stored document (FORCE_RELOAD)"
+    )
     parser.add_argument(
         "--silent",
         action="store_true",
@@ -111,6 +146,16 @@ def load_config(ini_path: str, args: argparse.Namespace) -> dict:
         'noupdate': args.noupdate or config.getboolean('processing', 'NOUPDATE'),
         'continue_on_errors': not args.no_continue and config.getboolean('processing', 'CONTINUE_ON_ERRORS'),
         'silent': args.silent or config.getboolean('processing', 'SILENT'),
+        'force': args.force or config.getboolean('processing', 'FORCE_RELOAD', fallback=False),
+        'workers': args.workers if args.workers is not None else config.getint(
+            'processing', 'WORKERS', fallback=1),
+        'read_ahead': args.read_ahead if args.read_ahead is not None else config.getint(
+            'processing', 'READ_AHEAD', fallback=2),
+        'parse_ahead': args.parse_ahead if args.parse_ahead is not None else config.getint(
+            'processing', 'PARSE_AHEAD', fallback=0),
+
+        # Cache
+        'parse_cache_dir': config.get('cache', 'PARSE_CACHE_DIR', fallback=''),
 
         # Database
         'db_host': config.get('database', 'host'),
@@ -145,6 +190,182 @@ def discover_files(input_dir: Path, skip: int, process: int) -> list[Path]:
     return files
 
 
+# -----------------------------------------------------------------------------
+# Read / prepare pipeline
+# -----------------------------------------------------------------------------
+
+# Per-process state, set once by _init_worker() so it is not pickled per file
+_worker_section_matcher: SectionTypeMatcher | None = None
+_worker_parse_cache: ParseCache | None = None
+
+_END = object()       # end-of-stream marker passed between pipeline stages
+_POLL_SECONDS = 0.1   # how often blocked stages check for a stop request
+
+
+def _init_worker(section_types: list[tuple[int, str]], parse_cache_dir: str) -> None:
+    """Process-pool initializer: build the section-type matcher and open the parse cache."""
+    global _worker_section_matcher, _worker_parse_cache
+    _worker_section_matcher = SectionTypeMatcher(section_types)
+    _worker_parse_cache = ParseCache(parse_cache_dir or None)
+
+
+def prepare_file(file_bytes: bytes, filename: str, sha256: bytes | None = None) -> PreparedTemplate:
+    """Parse, validate and match one file's bytes (no database access)."""
+    return prepare_template(
+        file_bytes,
+        filename,
+        _worker_section_matcher,
+        parse_cache=_worker_parse_cache,
+        sha256=sha256,
+    )
+
+
+def iter_prepared(
+    files: list[Path],
+    workers: int,
+    section_types: list[tuple[int, str]],
+    parse_cache_dir: str,
+    read_ahead: int = 2,
+    parse_ahead: int = 2,
+    precheck: Callable[[bytes, str, bytes], TemplateLoadResult | None] | None = None,
+) -> Iterator[tuple[int, Path, Callable[[], PreparedTemplate | TemplateLoadResult]]]:
+    """
+    Yield (index, path, prepare) for each file, in input order.
+
+    Calling prepare() returns the PreparedTemplate or raises the error the
+    file failed with. If precheck(file_bytes, filename, sha256) returns a
+    result for a file, prepare() returns that instead and the file is not
+    parsed; otherwise the digest is passed on, so the file is hashed once.
+    Files flow through a three-stage pipeline:
+
+        reader thread --read queue--> prepare stage --prepared queue--> caller
+
+    The reader prefetches file bytes; the prepare stage parses, validates
+    and matches them, in its own thread (workers <= 1) or by handing them to
+    a pool of worker processes. The caller -- the single database writer --
+    consumes results while the next files are already being read and
+    prepared. Each queue is bounded (read_ahead, parse_ahead), so a fast
+    stage blocks instead of piling files up in memory. Closing the iterator
+    early stops both stages and cancels the files not yet started.
+
+    Raises RuntimeError if a stage thread dies instead of ending its
+    stream, rather than waiting for it forever.
+    """
+    stop = threading.Event()
+    stage_errors: list[BaseException] = []
+    read_queue: queue.Queue = queue.Queue(maxsize=max(1, read_ahead))
+    prepared_queue: queue.Queue = queue.Queue(maxsize=max(1, parse_ahead))
+
+    def put(q: queue.Queue, item) -> bool:
+        """Blocking put that gives up (returns False) once stop is set."""
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get(q: queue.Queue):
+        """Blocking get that returns _END once stop is set."""
+        while not stop.is_set():
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                pass
+        return _END
+
+    def read_stage() -> None:
+        for idx, file_path in enumerate(files, 1):
+            try:
+                data = file_path.read_bytes()
+            except Exception as e:
+                data = e
+            if not put(read_queue, (idx, file_path, data)):
+                return
+        put(read_queue, _END)
+
+    def prepare_stage(pool: ProcessPoolExecutor | None) -> None:
+        while (item := get(read_queue)) is not _END:
+            idx, file_path, data = item
+            try:
+                if isinstance(data, Exception):
+                    raise data  # the read failed; report it for this file
+                sha256 = checked = None
+                if precheck is not None:
+                    sha256 = hashlib.sha256(data).digest()
+                    checked = precheck(data, file_path.name, sha256)
+                if checked is not None:
+                    future = Future()
+                    future.set_result(checked)
+                elif pool is not None:
+                    future = pool.submit(prepare_file, data, file_path.name, sha256)
+                else:
+                    future = Future()
+                    future.set_result(prepare_file(data, file_path.name, sha256))
+            except Exception as e:
+                future = Future()
+                future.set_exception(e)
+            if not put(prepared_queue, (idx, file_path, future)):
+                future.cancel()
+                return
+        put(prepared_queue, _END)
+
+    def run_stage(target: Callable, *args) -> None:
+        """Thread body: a stage that fails stops the pipeline and records why."""
+        try:
+            target(*args)
+        except BaseException as e:
+            stage_errors.append(e)
+            stop.set()
+
+    _init_worker(section_types, parse_cache_dir)
+    pool = None
+    if workers > 1:
+        # Spawned, not forked: the reader and prepare threads are already
+        # running (and the caller holds a database connection) when
+        # workers start, and a forked child can inherit locks they hold
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(section_types, parse_cache_dir),
+        )
+    stages = [
+        threading.Thread(target=run_stage, args=(read_stage,), name="batch-read", daemon=True),
+        threading.Thread(target=run_stage, args=(prepare_stage, pool), name="batch-prepare", daemon=True),
+    ]
+    for stage in stages:
+        stage.start()
+
+    try:
+        while True:
+            try:
+                item = prepared_queue.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                # The prepare stage puts _END before it exits, so an empty
+                # queue with the stage gone means it died
+                if stage_errors or not stages[1].is_alive():
+                    raise RuntimeError("Batch pipeline stage stopped unexpectedly") from (
+                        stage_errors[0] if stage_errors else None
+                    )
+                continue
+            if item is _END:
+                break
+            idx, file_path, future = item
+            yield idx, file_path, future.result
+    finally:
+        stop.set()
+        for stage in stages:
+            stage.join()
+        while not prepared_queue.empty():
+            item = prepared_queue.get_nowait()
+            if item is not _END:
+                item[2].cancel()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
 def main():
     """Main entry point."""
     args = parse_args()
@@ -181,6 +402,12 @@ def main():
         if cfg['skip'] > 0:
             logger.log(f"  (skipped first {cfg['skip']} files)")
 
+        workers = cfg['workers'] if cfg['workers'] > 0 else (os.cpu_count() or 1)
+        workers = min(workers, len(files))
+        if workers > 1:
+            logger.log(f"Preparing files in {workers} worker processes")
+        parse_ahead = cfg['parse_ahead'] if cfg['parse_ahead'] > 0 else max(2, 2 * workers)
+
         # Database setup
         db_config = DBConfig(
             host=cfg['db_host'],
@@ -193,6 +420,7 @@ def main():
         # Statistics
         files_read = 0
         files_stored = 0
+        files_unchanged = 0
         files_failed = 0
         total_sections = 0
 
@@ -214,21 +442,43 @@ def main():
             section_types = db.fetch_all_section_types()
             logger.log(f"Loaded {len(section_types)} section types for matching")
 
-            # Process each file
-            for idx, file_path in enumerate(files, 1):
+            # Stored document hashes, so unchanged files skip parsing and
+            # writing (one query for the whole run)
+            fingerprints = {} if cfg['force'] else db.get_template_fingerprints()
+
+            def precheck(file_bytes: bytes, filename: str, sha256: bytes) -> TemplateLoadResult | None:
+                return unchanged_template(
+                    file_bytes, filename, fingerprints.get(Path(filename).stem),
+                    country_id, currency_id, sha256=sha256,
+                )
+
+            # Process each file: reading and preparation (parse, validate,
+            # match) run ahead in background stages, but results are applied
+            # here, one file at a time in input order, each with its own
+            # commit. The parse-result cache lets a re-run skip files already
+            # parsed.
+            prepared_files = iter_prepared(
+                files, workers, section_types, cfg['parse_cache_dir'],
+                read_ahead=cfg['read_ahead'], parse_ahead=parse_ahead,
+                precheck=None if cfg['force'] else precheck,
+            )
+            for idx, file_path, prepare in prepared_files:
                 try:
                     files_read += 1
                     logger.log(f'Reading file "{file_path}"')
                     logger.progress('T')
 
-                    file_bytes = file_path.read_bytes()
-                    result = load_template(
-                        file_bytes=file_bytes,
-                        filename=file_path.name,
-                        db=db,
-                        country_id=country_id,
-                        currency_id=currency_id,
-                        section_types=section_types,
+                    prepared = prepare()
+                    if isinstance(prepared, TemplateLoadResult):
+                        logger.log(f"  Unchanged - template ID {prepared.plsqt_id} already holds this file")
+                        files_unchanged += 1
+                        continue
+
+                    result = apply_template(
+                        prepared,
+                        db,
+                        country_id,
+                        currency_id,
                         update_user="SQM_loader",
                         dry_run=cfg['noupdate'],
                         file_ref=str(file_path),
@@ -260,6 +510,7 @@ def main():
 
                     if not cfg['continue_on_errors']:
                         logger.log("Halting due to error (CONTINUE_ON_ERRORS=false)")
+                        prepared_files.close()
                         break
 
         # End summary
@@ -275,6 +526,7 @@ def main():
         logger.log(f"Elapsed:          {elapsed:.1f} seconds")
         logger.log(f"Files read:       {files_read}")
         logger.log(f"Files stored:     {files_stored}")
+        logger.log(f"Files unchanged:  {files_unchanged}")
         logger.log(f"Sections stored:  {total_sections}")
         logger.log(f"Files skipped:    {cfg['skip']}")
         logger.log(f"Files failed:     {files_failed}")
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# cli/explain_queries.py - v1.0 - 2026-10-17
+# EXPLAIN every query issued by listldr/db.py and flag sequential scans
+
+"""
+Query Plan Check
+
+Calls every public SQMDatabase method once with sample arguments against a
+(local) database, but instead of running each statement asks PostgreSQL
+for its plan with EXPLAIN. Sequential scans are disabled for the check
+(enable_seqscan = off), so a Seq Scan left in a plan means no index can
+serve that query. Seq scans of the large tables fail the check unless the
+method is listed in ALLOW_SEQ_SCAN, i.e. reads the whole table by design.
+
+Statements EXPLAIN cannot take (CREATE/DROP of temp tables) are executed,
+and the whole run is rolled back, so nothing is written. A method that
+reads the rows of an EXPLAINed statement stops there; any other error in
+a sample call (a wrong signature, invalid SQL) fails the check.
+
+Exits with status 1 if a plan or sample call fails the check or a public
+method has no sample call here (add one when adding a method to
+SQMDatabase).
+
+Usage:
+    python cli/explain_queries.py [--ini PATH] [--verbose]
+
+See --help for all options.
+"""
+
+import argparse
+import inspect
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator
+
+import psycopg2
+
+# Ensure project root is on sys.path when run as a script (python cli/explain_queries.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from listldr.config import db_config_from_ini
+from listldr.db import SQMDatabase, SectionRow
+
+
+# Tables that grow with the number of templates / uploads
+LARGE_TABLES = {
+    "document_blob",
+    "document_blob_history",
+    "plsq_templates",
+    "plsqt_sections",
+}
+
+# Methods that read every row of a large table by design
+ALLOW_SEQ_SCAN = {
+    "get_templates_to_materialize": "scans all templates for approved ones",
+    "get_templates_missing_headings": "one-off backfill over all templates",
+    "iter_section_headings": "streams every distinct heading",
+    "reclassify_sections": "joins every section to the new types",
+}
+
+# Connection management and pure-Python helpers: no SQL to check
+NOT_QUERIES = {"connect", "close", "commit", "rollback", "lookup_section_type_by_lcs"}
+
+SHA = b"\x00" * 32
+SECTIONS = [SectionRow(section_type_id=1, seqn=1, content="text", heading="Heading",
+                       elem_start=0, elem_end=5)]
+
+# Method name -> sample call
+SAMPLE_CALLS: dict[str, Callable[[SQMDatabase], object]] = {
+    "lookup_country": lambda db: db.lookup_country("CHE"),
+    "lookup_currency": lambda db: db.lookup_currency("CHF"),
+    "lookup_product_line": lambda db: db.lookup_product_line("ECM"),
+    "fetch_all_section_types": lambda db: db.fetch_all_section_types(),
+    "get_or_create_blob": lambda db: db.get_or_create_blob(b"docx", "x.docx", SHA),
+    "get_blob_bytes": lambda db: db.get_blob_bytes(1),
+    "get_blob_buffer": lambda db: db.get_blob_buffer(1),
+    "get_blob_size": lambda db: db.get_blob_size(1),
+    "iter_blob_chunks": lambda db: list(db.iter_blob_chunks(1)),
+    "get_template_by_id": lambda db: db.get_template_by_id(1),
+    "get_section_info": lambda db: db.get_section_info(1, 1),
+    "get_sections": lambda db: db.get_sections(1),
+    "get_template_fingerprints": lambda db: db.get_template_fingerprints("ECM AP 10 CHE"),
+    "get_templates_to_materialize": lambda db: db.get_templates_to_materialize(),
+    "set_section_docx_blob": lambda db: db.set_section_docx_blob(1, 1),
+    "get_templates_missing_headings": lambda db: db.get_templates_missing_headings(),
+    "set_section_headings": lambda db: db.set_section_headings([(1, "Heading")]),
+    "iter_section_headings": lambda db: list(db.iter_section_headings()),
+    "get_section_type_matches": lambda db: db.get_section_type_matches("0" * 64),
+    "save_section_type_matches": lambda db: db.save_section_type_matches("0" * 64, [("heading", 1)]),
+    "reclassify_sections": lambda db: db.reclassify_sections([("Heading", 1)]),
+    "upsert_template": lambda db: db.upsert_template(
+        "x", "ECM", 1, 1, b"docx", "x.docx", SHA, "x.docx", SECTIONS, 10),
+}
+
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "VALUES")
+
+
+class _PlanOnly(Exception):
+    """Raised when a method reads the rows of a statement that was only EXPLAINed."""
+
+
+class _ExplainCursor:
+    """Cursor proxy: EXPLAINs data statements instead of running them."""
+
+    def __init__(self, cursor, plans: list):
+        self._cursor = cursor
+        self._plans = plans
+        self._explained = False
+
+    def execute(self, sql, params=None):
+        text = sql.decode() if isinstance(sql, bytes) else sql
+        if text.lstrip().upper().startswith(_EXPLAINABLE):
+            self._cursor.execute(
+                b"EXPLAIN (FORMAT JSON) " + sql if isinstance(sql, bytes)
+                else "EXPLAIN (FORMAT JSON) " + sql,
+                params,
+            )
+            row = self._cursor.fetchone()
+            plan = row["QUERY PLAN"] if isinstance(row, dict) else row[0]
+            self._plans.append((text, plan))
+            self._explained = True
+        else:
+            self._cursor.execute(sql, params)
+            self._explained = False
+
+    def _rows(self, name: str):
+        if self._explained:
+            raise _PlanOnly(f"{name}() on an EXPLAINed statement")
+        return getattr(self._cursor, name)
+
+    def fetchone(self):
+        return self._rows("fetchone")()
+
+    def fetchmany(self, *args):
+        return self._rows("fetchmany")(*args)
+
+    def fetchall(self):
+        return self._rows("fetchall")()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._rows("fetchall")())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._cursor.close()
+
+
+class _ExplainConnection:
+    """Connection proxy handing out _ExplainCursors (named cursors become plain ones)."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.plans: list = []
+
+    def cursor(self, name=None, cursor_factory=None):
+        return _ExplainCursor(self._conn.cursor(cursor_factory=cursor_factory), self.plans)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def explain_method(name: str, db: SQMDatabase, proxy: _ExplainConnection) -> list:
+    """
+    Run one sample call on db (backed by proxy) and return the (statement,
+    plan) pairs it produced. Whatever the method raises, other than reading
+    rows of an EXPLAINed statement, is raised.
+    """
+    proxy.plans.clear()
+    try:
+        SAMPLE_CALLS[name](db)
+    except _PlanOnly:
+        pass  # the method got a plan back instead of rows
+    return list(proxy.plans)
+
+
+def iter_seq_scans(node: dict) -> Iterator[str]:
+    """Yield the relation name of every Seq Scan in a JSON plan tree."""
+    if node.get("Node Type") == "Seq Scan":
+        yield node.get("Relation Name", "?")
+    for child in node.get("Plans", []):
+        yield from iter_seq_scans(child)
+
+
+def large_table_seq_scans(plans: list) -> list[str]:
+    """The LARGE_TABLES read by a Seq Scan in any of the (statement, plan) pairs."""
+    return sorted({
+        relation
+        for _, plan in plans
+        for relation in iter_seq_scans(plan[0]["Plan"])
+        if relation in LARGE_TABLES
+    })
+
+
+def query_methods() -> list[str]:
+    """Public SQMDatabase methods that issue SQL."""
+    return sorted(
+        name for name, _ in inspect.getmembers(SQMDatabase, inspect.isfunction)
+        if not name.startswith("_") and name not in NOT_QUERIES
+    )
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="EXPLAIN every SQMDatabase query and flag sequential scans of large tables."
+    )
+    parser.add_argument(
+        "--ini",
+        default="./conf/listldr_sqt.ini",
+        help="Config file path (default: ./conf/listldr_sqt.ini)"
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print each statement's plan"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    db_config = db_config_from_ini(args.ini)
+
+    print("Query Plan Check")
+    print(f"Started: {datetime.now():%Y-%m-%d %H:%M:%S}")
+    print()
+
+    failures = 0
+    missing = [name for name in query_methods() if name not in SAMPLE_CALLS]
+
+    with SQMDatabase(db_config) as real_db:
+        with real_db.conn.cursor() as cur:
+            cur.execute("SET LOCAL enable_seqscan = off")
+        proxy = _ExplainConnection(real_db.conn)
+        db = SQMDatabase(conn=proxy)
+
+        for name in sorted(SAMPLE_CALLS):
+            try:
+                plans = explain_method(name, db, proxy)
+            except Exception as e:
+                detail = str(e).strip()
+                if not isinstance(e, psycopg2.Error):
+                    detail = f"{type(e).__name__}: {detail}"
+                print(f"  ERROR    {name}: {detail}")
+                failures += 1
+                real_db.rollback()
+                with real_db.conn.cursor() as cur:
+                    cur.execute("SET LOCAL enable_seqscan = off")
+                continue
+
+            scanned = large_table_seq_scans(plans)
+            if scanned and name not in ALLOW_SEQ_SCAN:
+                print(f"  SEQ SCAN {name}: {', '.join(scanned)}")
+                failures += 1
+            elif scanned:
+                print(f"  allowed  {name}: {', '.join(scanned)} ({ALLOW_SEQ_SCAN[name]})")
+            else:
+                print(f"  ok       {name}")
+
+            if args.verbose:
+                for text, plan in plans:
+                    print("    " + " ".join(text.split())[:100])
+                    print("    " + json.dumps(plan[0]["Plan"], indent=2).replace("\n", "\n    "))
+
+        real_db.rollback()
+
+    for name in missing:
+        print(f"  MISSING  {name}: no sample call in SAMPLE_CALLS")
+
+    print()
+    print(f"Methods checked: {len(SAMPLE_CALLS)}")
+    print(f"Failures:        {failures + len(missing)}")
+    sys.exit(1 if failures or missing else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# cli/materialize_sections.py - v1.0 - 2026-10-17
+# Pre-build the section .docx documents of approved templates
+
+"""
+Section Materialization Worker
+
+Finds approved templates whose sections have no pre-built .docx yet,
+extracts every section of the template's current document once, stores
+the results as content-addressed document_blob rows and links them from
+plsqt_sections. The section endpoint then serves those bytes directly.
+
+Each template is committed on its own; a failure is rolled back and
+reported, and the run continues with the next template.
+
+Usage:
+    python cli/materialize_sections.py [options]
+
+Examples:
+    python cli/materialize_sections.py --dry-run
+    python cli/materialize_sections.py --plsqt-id 41
+    python cli/materialize_sections.py
+
+See --help for all options.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Ensure project root is on sys.path when run as a script (python cli/materialize_sections.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from listldr.config import db_config_from_ini
+from listldr.db import SQMDatabase
+from listldr.service import materialize_section_docs
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Pre-build section .docx documents for approved templates."
+    )
+    parser.add_argument(
+        "--plsqt-id",
+        type=int,
+        help="Only this template (default: every approved template that needs it)"
+    )
+    parser.add_argument(
+        "--ini",
+        default="./conf/listldr_sqt.ini",
+        help="Config file path (default: ./conf/listldr_sqt.ini)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Build the documents but roll back instead of committing"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    db_config = db_config_from_ini(args.ini)
+
+    print("Section Materialization")
+    if args.dry_run:
+        print("DRY RUN — no changes will be made")
+    print()
+
+    templates_done = 0
+    templates_failed = 0
+    sections_linked = 0
+
+    with SQMDatabase(db_config) as db:
+        templates = db.get_templates_to_materialize(args.plsqt_id)
+        print(f"Templates to process: {len(templates)}")
+
+        for template in templates:
+            plsqt_id = template["plsqt_id"]
+            try:
+                source_bytes = db.get_blob_bytes(template["current_blob_id"])
+                if source_bytes is None:
+                    raise ValueError(f"Blob {template['current_blob_id']} not found in document_blob")
+
+                linked = materialize_section_docs(
+                    db, plsqt_id, template["current_blob_id"], source_bytes,
+                )
+                if args.dry_run:
+                    db.rollback()
+                else:
+                    db.commit()
+                templates_done += 1
+                sections_linked += linked
+                print(f"  {plsqt_id} {template['plsqt_name']}: {linked} sections")
+
+            except Exception as e:
+                db.rollback()
+                templates_failed += 1
+                print(f"  {plsqt_id} {template['plsqt_name']}: ERROR {e}")
+
+    print()
+    print(f"Templates processed: {templates_done}")
+    print(f"Templates failed:    {templates_failed}")
+    print(f"Sections linked:     {sections_linked}")
+    if args.dry_run:
+        print("\nRolled back — no changes applied.")
+
+
+if __name__ == "__main__":
+    main()
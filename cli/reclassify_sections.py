@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# cli/reclassify_sections.py - v1.0 - 2026-10-17
+# Re-match stored section headings against the current section types
+
+"""
+Section Reclassification Job
+
+After plsqts_type has been edited, brings plsqt_sections.section_type_id
+in line with the current catalog without reloading any template:
+
+1. Sections loaded before headings were stored get their heading filled in
+   from the template's current document (one parse per template, only once).
+2. Every distinct heading is matched once per catalog version. Results are
+   memoized in plsqts_type_match, so unchanged headings are not matched
+   again on later runs against the same catalog.
+3. The new types are applied with a single set-based UPDATE; sections whose
+   type changes are reset to status 'not started'. Headings that no longer
+   match any type are reported and left unchanged.
+
+Usage:
+    python cli/reclassify_sections.py [options]
+
+Examples:
+    python cli/reclassify_sections.py --dry-run
+    python cli/reclassify_sections.py
+
+See --help for all options.
+"""
+
+import argparse
+import sys
+from io import BytesIO
+from pathlib import Path
+
+# Ensure project root is on sys.path when run as a script (python cli/reclassify_sections.py)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from listldr.config import db_config_from_ini
+from listldr.db import SQMDatabase
+from listldr.parser import parse_document
+from listldr.text_utils import SectionTypeMatcher, section_type_catalog_version
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Re-match stored section headings against the current section types."
+    )
+    parser.add_argument(
+        "--ini",
+        default="./conf/listldr_sqt.ini",
+        help="Config file path (default: ./conf/listldr_sqt.ini)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Match and update, then roll back instead of committing"
+    )
+    parser.add_argument(
+        "--update-user",
+        default="SQM_reclassify",
+        help="Audit trail user name (default: SQM_reclassify)"
+    )
+    return parser.parse_args()
+
+
+def backfill_headings(db: SQMDatabase) -> tuple[int, int]:
+    """
+    Fill in plsqts_heading for sections loaded before headings were stored.
+
+    Each template's current document is parsed once; its sections are
+    paired with the parsed sections in load order. Templates whose section
+    count no longer matches the document are skipped.
+
+    Returns (sections updated, templates skipped).
+    """
+    updated = 0
+    skipped = 0
+    for template in db.get_templates_missing_headings():
+        source_bytes = db.get_blob_bytes(template["current_blob_id"])
+        if source_bytes is None:
+            print(f"  {template['plsqt_id']} {template['plsqt_name']}: blob not found, skipped")
+            skipped += 1
+            continue
+        parsed = parse_document(BytesIO(source_bytes))
+        rows = db.get_sections(template["plsqt_id"])
+        if [row["plsqts_seqn"] for row in rows] != [sec.sequence for sec in parsed.sections]:
+            print(f"  {template['plsqt_id']} {template['plsqt_name']}: "
+                  f"sections differ from the stored document, skipped")
+            skipped += 1
+            continue
+        updated += db.set_section_headings(
+            [(row["plsqts_id"], sec.heading) for row, sec in zip(rows, parsed.sections)]
+        )
+    return updated, skipped
+
+
+def main():
+    args = parse_args()
+    db_config = db_config_from_ini(args.ini)
+
+    print("Section Reclassification")
+    if args.dry_run:
+        print("DRY RUN — no changes will be made")
+    print()
+
+    with SQMDatabase(db_config) as db:
+        section_types = db.fetch_all_section_types()
+        catalog_version = section_type_catalog_version(section_types)
+        print(f"Section types: {len(section_types)} (catalog {catalog_version[:12]})")
+
+        headings_filled, templates_skipped = backfill_headings(db)
+        print(f"Headings filled in: {headings_filled} ({templates_skipped} templates skipped)")
+
+        # Match each distinct heading once; lowercasing is lossless for the
+        # case-insensitive matcher, so it is the memo key
+        memo = db.get_section_type_matches(catalog_version)
+        matcher = None
+        new_matches: dict[str, int | None] = {}
+        assignments: list[tuple[str, int]] = []
+        unmatched: list[str] = []
+        heading_count = 0
+
+        for heading in db.iter_section_headings():
+            heading_count += 1
+            heading_norm = heading.lower()
+            if heading_norm in memo:
+                type_id = memo[heading_norm]
+            elif heading_norm in new_matches:
+                type_id = new_matches[heading_norm]
+            else:
+                if matcher is None:
+                    matcher = SectionTypeMatcher(section_types)
+                type_id = new_matches[heading_norm] = matcher.match(heading)
+            if type_id is None:
+                unmatched.append(heading)
+            else:
+                assignments.append((heading, type_id))
+
+        print(f"Distinct headings: {heading_count} ({len(new_matches)} newly matched)")
+
+        db.save_section_type_matches(catalog_version, list(new_matches.items()))
+        sections_updated = db.reclassify_sections(assignments, update_user=args.update_user)
+
+        if args.dry_run:
+            db.rollback()
+        else:
+            db.commit()
+
+    for heading in unmatched:
+        print(f"  No section type for heading: '{heading}'")
+
+    print()
+    print(f"Sections reclassified: {sections_updated}")
+    print(f"Unmatched headings:    {len(unmatched)}")
+    if args.dry_run:
+        print("\nRolled back — no changes applied.")
+
+
+if __name__ == "__main__":
+    main()
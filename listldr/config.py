@@ -1,14 +1,21 @@
 """
 Configuration factories for the SQM template loader.
 
-Provides DBConfig construction from environment variables or INI files.
+Provides DBConfig construction from environment variables or INI files,
+and the ParseCache, section cache, load executor, blob stream limit and
+parse worker pool used by the API.
 """
 
 import configparser
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from listldr.db import DBConfig
+from listldr.parse_cache import ParseCache
+from listldr.parse_pool import ParsePool
+from listldr.section_cache import SectionDocCache
 
 
 def db_config_from_env() -> DBConfig:
@@ -38,3 +45,75 @@ def db_config_from_ini(ini_path: str | Path) -> DBConfig:
         password=config.get("database", "password"),
         database=config.get("database", "database"),
     )
+
+
+def load_executor_from_env() -> ThreadPoolExecutor:
+    """
+    Build the executor that runs template loads for the API.
+
+    Expected vars: LISTLDR_LOAD_WORKERS (concurrent loads, default 2)
+    """
+    return ThreadPoolExecutor(
+        max_workers=int(os.environ.get("LISTLDR_LOAD_WORKERS", "2")),
+        thread_name_prefix="listldr-load",
+    )
+
+
+def blob_streams_from_env() -> threading.BoundedSemaphore:
+    """
+    Build the API's limit on blob downloads streamed at once, each holding
+    a pooled database connection while it is sent.
+
+    Expected vars: LISTLDR_BLOB_STREAMS (concurrent streams, default 4;
+                   keep it below the connection pool size)
+    """
+    return threading.BoundedSemaphore(int(os.environ.get("LISTLDR_BLOB_STREAMS", "4")))
+
+
+def parse_pool_from_env(section_types: list[tuple[int, str]], parse_cache_dir: str | None) -> ParsePool:
+    """
+    Build the API's ParsePool from environment variables.
+
+    Expected vars: LISTLDR_PARSE_WORKERS (processes, 0 = parse in-process, default 2),
+                   LISTLDR_PARSE_QUEUE (tasks waiting beyond those running, default 8),
+                   LISTLDR_PARSE_TIMEOUT (seconds per task, default 60),
+                   LISTLDR_PARSE_MEMORY_MB (address space per worker, 0 = no cap, default 1024),
+                   LISTLDR_PARSE_MAX_TASKS (tasks before a worker is replaced, default 50)
+    """
+    return ParsePool(
+        section_types,
+        parse_cache_dir=parse_cache_dir,
+        max_workers=int(os.environ.get("LISTLDR_PARSE_WORKERS", "2")),
+        max_queue=int(os.environ.get("LISTLDR_PARSE_QUEUE", "8")),
+        task_timeout=float(os.environ.get("LISTLDR_PARSE_TIMEOUT", "60")),
+        memory_limit_mb=int(os.environ.get("LISTLDR_PARSE_MEMORY_MB", "1024")),
+        max_tasks_per_child=int(os.environ.get("LISTLDR_PARSE_MAX_TASKS", "50")),
+    )
+
+
+def section_cache_from_env() -> SectionDocCache:
+    """
+    Build the API's SectionDocCache from environment variables.
+
+    Expected vars: LISTLDR_SECTION_CACHE_MB (memory budget, 0 = off, default 64),
+                   LISTLDR_SECTION_CACHE_DIR (shared disk tier, empty = off),
+                   LISTLDR_SECTION_CACHE_DIR_MB (disk budget, default 1024)
+    """
+    return SectionDocCache(
+        max_bytes=int(float(os.environ.get("LISTLDR_SECTION_CACHE_MB", "64")) * 1024 * 1024),
+        cache_dir=os.environ.get("LISTLDR_SECTION_CACHE_DIR") or None,
+        max_disk_bytes=int(float(os.environ.get("LISTLDR_SECTION_CACHE_DIR_MB", "1024")) * 1024 * 1024),
+    )
+
+
+def parse_cache_from_env() -> ParseCache:
+    """
+    Build a ParseCache from environment variables.
+
+    Expected vars: LISTLDR_PARSE_CACHE_DIR (empty = memory tier only),
+                   LISTLDR_PARSE_CACHE_ENTRIES (in-memory LRU size, default 64)
+    """
+    return ParseCache(
+        cache_dir=os.environ.get("LISTLDR_PARSE_CACHE_DIR") or None,
+        max_entries=int(os.environ.get("LISTLDR_PARSE_CACHE_ENTRIES", "64")),
+    )
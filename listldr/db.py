@@ -8,16 +8,19 @@ Handles lookups, CRUD operations, and transaction management.
 import hashlib
 from dataclasses import dataclass
 from datetime import datetime, date
-from typing import Optional
+from typing import Iterator, Optional
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 
-from listldr.text_utils import longest_common_substring
+from listldr.text_utils import SectionTypeMatcher, match_section_type
 
 
 DOCX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
 
+# Bytes fetched per query by SQMDatabase.iter_blob_chunks()
+BLOB_CHUNK_SIZE = 256 * 1024
+
 
 @dataclass
 class DBConfig:
@@ -29,6 +32,32 @@ class DBConfig:
     database: str
 
 
+@dataclass
+class SectionRow:
+    """One plsqt_sections row to write (see SQMDatabase.upsert_template)."""
+    section_type_id: int
+    seqn: int
+    content: str
+    heading: str | None = None
+    elem_start: int | None = None
+    elem_end: int | None = None
+
+
+# Columns of a new plsqt_sections row, in the order upsert_template()
+# supplies their values
+_SECTION_INSERT_COLUMNS = """
+    plsqt_id, section_type_id, plsqts_seqn, plsqts_content, plsqts_content_sha256,
+    plsqts_active, plsqts_status, last_update_datetime, last_update_user, plsqts_enabled,
+    plsqts_elem_start, plsqts_elem_end, plsqts_body_elem_count, plsqts_source_sha256,
+    plsqts_heading
+"""
+
+
+def section_content_sha256(content: str) -> bytes:
+    """SHA-256 of a section's text, stored as plsqts_content_sha256."""
+    return hashlib.sha256(content.encode("utf-8")).digest()
+
+
 class SQMDatabase:
     """Database manager for SQM template loading."""
 
@@ -135,28 +164,19 @@ class SQMDatabase:
     def lookup_section_type_by_lcs(
         self,
         heading_text: str,
-        section_types: list[tuple[int, str]],
+        section_types: list[tuple[int, str]] | SectionTypeMatcher,
         min_match_length: int = 4,
     ) -> Optional[int]:
         """
         Match heading_text to a section type using longest-common-substring.
 
-        Iterates over pre-fetched section_types, computes LCS against heading_text.
+        section_types is the pre-fetched list, or a SectionTypeMatcher built
+        from it once (preferred when matching many headings).
         Returns plsqtst_id of the best match (longest LCS); ties broken by lowest id.
         Returns None if the best LCS length < min_match_length.
+        See text_utils.match_section_type(), which does the work without a database.
         """
-        best_id = None
-        best_len = 0
-
-        for type_id, type_name in section_types:
-            lcs_len = longest_common_substring(heading_text, type_name)
-            if lcs_len > best_len:
-                best_len = lcs_len
-                best_id = type_id
-
-        if best_len < min_match_length:
-            return None
-        return best_id
+        return match_section_type(heading_text, section_types, min_match_length)
 
     # -------------------------------------------------------------------------
     # Blob Operations
@@ -165,68 +185,111 @@ class SQMDatabase:
     def get_or_create_blob(
         self,
         file_bytes: bytes,
-        original_filename: str
+        original_filename: str,
+        sha256_hash: bytes | None = None,
     ) -> int:
         """
         Get existing blob by SHA256 or create new one.
+        Pass sha256_hash (raw digest) if the caller has already computed it.
         Returns blob_id.
+
+        One statement, safe against concurrent loaders storing the same
+        bytes: the unique index on sha256 finds an existing blob, and
+        ON CONFLICT returns the blob another transaction has just inserted.
         """
-        sha256_hash = hashlib.sha256(file_bytes).digest()
+        if sha256_hash is None:
+            sha256_hash = hashlib.sha256(file_bytes).digest()
         size_bytes = len(file_bytes)
 
         with self.conn.cursor() as cur:
-            # Check if blob already exists
-            cur.execute(
-                "SELECT blob_id FROM document_blob WHERE sha256 = %s",
-                (sha256_hash,)
-            )
-            row = cur.fetchone()
-            if row:
-                return row[0]
-
-            # Insert new blob
             cur.execute(
                 """
-                INSERT INTO document_blob (bytes, sha256, size_bytes, content_type, original_filename)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING blob_id
-                """,
-                (
-                    psycopg2.Binary(file_bytes),
-                    psycopg2.Binary(sha256_hash),
-                    size_bytes,
-                    DOCX_CONTENT_TYPE,
-                    original_filename,
+                WITH found AS (
+                    SELECT blob_id FROM document_blob WHERE sha256 = %(sha256)s
+                ),
+                inserted AS (
+                    -- The no-op update only happens when a concurrent
+                    -- insert committed after this statement's snapshot;
+                    -- it makes RETURNING yield that row's blob_id
+                    INSERT INTO document_blob (bytes, sha256, size_bytes, content_type, original_filename)
+                    SELECT %(bytes)s, %(sha256)s, %(size_bytes)s, %(content_type)s, %(original_filename)s
+                    WHERE NOT EXISTS (SELECT 1 FROM found)
+                    ON CONFLICT (sha256) DO UPDATE SET sha256 = EXCLUDED.sha256
+                    RETURNING blob_id
                 )
+                SELECT blob_id FROM found
+                UNION ALL
+                SELECT blob_id FROM inserted
+                """,
+                {
+                    "bytes": psycopg2.Binary(file_bytes),
+                    "sha256": psycopg2.Binary(sha256_hash),
+                    "size_bytes": size_bytes,
+                    "content_type": DOCX_CONTENT_TYPE,
+                    "original_filename": original_filename,
+                }
             )
             return cur.fetchone()[0]
 
-    def archive_blob(
-        self,
-        entity_type: str,
-        entity_id: int,
-        blob_id: int,
-        replaced_by: str = "SQM_loader"
-    ) -> None:
-        """Record old blob in history before replacement."""
+    def get_blob_bytes(self, blob_id: int) -> Optional[bytes]:
+        """Fetch the raw file bytes from document_blob. Returns None if not found."""
         with self.conn.cursor() as cur:
             cur.execute(
-                """
-                INSERT INTO document_blob_history (entity_type, entity_id, blob_id, replaced_by)
-                VALUES (%s, %s, %s, %s)
-                """,
-                (entity_type, entity_id, blob_id, replaced_by)
+                "SELECT bytes FROM document_blob WHERE blob_id = %s",
+                (blob_id,)
             )
+            row = cur.fetchone()
+            return bytes(row[0]) if row else None
 
-    def get_blob_bytes(self, blob_id: int) -> Optional[bytes]:
-        """Fetch the raw file bytes from document_blob. Returns None if not found."""
+    def get_blob_buffer(self, blob_id: int) -> Optional[memoryview]:
+        """
+        Fetch the raw file bytes from document_blob without copying them.
+
+        Returns the read-only buffer psycopg2 decoded the bytea into, or None
+        if not found. Use instead of get_blob_bytes() when the bytes are only
+        read (parsed, sliced, hashed), so one copy of the file is held.
+        """
         with self.conn.cursor() as cur:
             cur.execute(
                 "SELECT bytes FROM document_blob WHERE blob_id = %s",
                 (blob_id,)
             )
             row = cur.fetchone()
-            return bytes(row[0]) if row else None
+            return row[0] if row else None
+
+    def get_blob_size(self, blob_id: int) -> Optional[int]:
+        """Return the length in bytes of a stored blob, or None if not found."""
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "SELECT octet_length(bytes) FROM document_blob WHERE blob_id = %s",
+                (blob_id,)
+            )
+            row = cur.fetchone()
+            return row[0] if row else None
+
+    def iter_blob_chunks(self, blob_id: int, chunk_size: int = BLOB_CHUNK_SIZE) -> Iterator[memoryview]:
+        """
+        Yield the bytes of a stored blob in chunks of up to chunk_size.
+
+        Each chunk is read with its own substring() query, so only one chunk
+        is in memory at a time; for uncompressed (STORAGE EXTERNAL) values
+        PostgreSQL reads just the TOAST pages the chunk covers. Yields
+        nothing if the blob does not exist.
+        """
+        offset = 0
+        with self.conn.cursor() as cur:
+            while True:
+                cur.execute(
+                    "SELECT substring(bytes FROM %s FOR %s) FROM document_blob WHERE blob_id = %s",
+                    (offset + 1, chunk_size, blob_id)
+                )
+                row = cur.fetchone()
+                if row is None or not row[0]:
+                    return
+                yield row[0]
+                if len(row[0]) < chunk_size:
+                    return
+                offset += len(row[0])
 
     # -------------------------------------------------------------------------
     # Template Operations
@@ -235,14 +298,17 @@ class SQMDatabase:
     def get_template_by_id(self, plsqt_id: int) -> Optional[dict]:
         """
         Get template by ID.
-        Returns dict with plsqt_id, plsqt_name, current_blob_id, plsqt_section_count, or None.
+        Returns dict with plsqt_id, plsqt_name, current_blob_id, plsqt_section_count,
+        and blob_sha256 (hex SHA-256 of the current blob, or None), or None.
         """
         with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(
                 """
-                SELECT plsqt_id, plsqt_name, current_blob_id, plsqt_section_count
-                FROM plsq_templates
-                WHERE plsqt_id = %s
+                SELECT t.plsqt_id, t.plsqt_name, t.current_blob_id, t.plsqt_section_count,
+                       encode(b.sha256, 'hex') AS blob_sha256
+                FROM plsq_templates t
+                LEFT JOIN document_blob b ON b.blob_id = t.current_blob_id
+                WHERE t.plsqt_id = %s
                 """,
                 (plsqt_id,)
             )
@@ -254,13 +320,19 @@ class SQMDatabase:
         joined to plsqts_type for the type name.
 
         Returns list of dicts with: plsqts_id, plsqts_seqn, section_type_id,
-        plsqtst_name, plsqts_use_alt_name, plsqts_alt_name.
+        plsqtst_name, plsqts_use_alt_name, plsqts_alt_name, and the stored
+        element range: plsqts_elem_start, plsqts_elem_end, plsqts_body_elem_count,
+        plsqts_source_sha256 (hex, or None if the range was never recorded),
+        and plsqts_docx_blob_id (pre-built section .docx, or None).
         """
         with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(
                 """
                 SELECT s.plsqts_id, s.plsqts_seqn, s.section_type_id,
-                       t.plsqtst_name, s.plsqts_use_alt_name, s.plsqts_alt_name
+                       t.plsqtst_name, s.plsqts_use_alt_name, s.plsqts_alt_name,
+                       s.plsqts_elem_start, s.plsqts_elem_end, s.plsqts_body_elem_count,
+                       encode(s.plsqts_source_sha256, 'hex') AS plsqts_source_sha256,
+                       s.plsqts_docx_blob_id
                 FROM plsqt_sections s
                 JOIN plsqts_type t ON s.section_type_id = t.plsqtst_id
                 WHERE s.plsqt_id = %s AND s.plsqts_seqn = %s
@@ -270,166 +342,489 @@ class SQMDatabase:
             )
             return cur.fetchall()
 
-    def get_template_by_name(self, plsqt_name: str) -> Optional[dict]:
+    def get_sections(self, plsqt_id: int) -> list[dict]:
         """
-        Get existing template by name.
-        Returns dict with plsqt_id and current_blob_id, or None.
+        Get all section records for a template, joined to plsqts_type for the
+        type name, in load order (plsqts_id).
+
+        Returns list of dicts with the same keys as get_section_info().
         """
         with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(
                 """
-                SELECT plsqt_id, current_blob_id FROM plsq_templates
-                WHERE plsqt_name = %s
+                SELECT s.plsqts_id, s.plsqts_seqn, s.section_type_id,
+                       t.plsqtst_name, s.plsqts_use_alt_name, s.plsqts_alt_name,
+                       s.plsqts_elem_start, s.plsqts_elem_end, s.plsqts_body_elem_count,
+                       encode(s.plsqts_source_sha256, 'hex') AS plsqts_source_sha256,
+                       s.plsqts_docx_blob_id
+                FROM plsqt_sections s
+                JOIN plsqts_type t ON s.section_type_id = t.plsqtst_id
+                WHERE s.plsqt_id = %s
+                ORDER BY s.plsqts_id
                 """,
-                (plsqt_name,)
+                (plsqt_id,)
             )
-            return cur.fetchone()
+            return cur.fetchall()
 
-    def delete_template_sections(self, plsqt_id: int) -> int:
-        """Delete all sections for a template. Returns count deleted."""
+    def get_template_fingerprints(self, plsqt_name: str | None = None) -> dict[str, dict]:
+        """
+        What a reload would compare against: for each template with a stored
+        document (or just the one named plsqt_name), its plsqt_id,
+        current_blob_id, plsqt_section_count, country_id, currency_id,
+        product_line_abbr and blob_sha256 (hex).
+
+        Returns {plsqt_name: dict}. Fetch once per batch run to check every
+        file without a query per file.
+        """
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                """
+                SELECT t.plsqt_name, t.plsqt_id, t.current_blob_id, t.plsqt_section_count,
+                       t.country_id, t.currency_id, pl.product_line_abbr,
+                       encode(b.sha256, 'hex') AS blob_sha256
+                FROM plsq_templates t
+                JOIN document_blob b ON b.blob_id = t.current_blob_id
+                LEFT JOIN product_line pl ON pl.product_line_id = t.product_line_id
+                WHERE %s::text IS NULL OR t.plsqt_name = %s
+                """,
+                (plsqt_name, plsqt_name)
+            )
+            return {row["plsqt_name"]: row for row in cur.fetchall()}
+
+    def get_templates_to_materialize(self, plsqt_id: int | None = None) -> list[dict]:
+        """
+        Get approved templates with a stored document where at least one
+        section has no pre-built .docx yet (optionally just one template).
+
+        Returns list of dicts with plsqt_id, plsqt_name, current_blob_id and
+        blob_sha256 (hex), ordered by plsqt_id.
+        """
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                """
+                SELECT t.plsqt_id, t.plsqt_name, t.current_blob_id,
+                       encode(b.sha256, 'hex') AS blob_sha256
+                FROM plsq_templates t
+                JOIN document_blob b ON b.blob_id = t.current_blob_id
+                WHERE t.plsqt_status = 'approved'
+                  AND (%s::integer IS NULL OR t.plsqt_id = %s)
+                  AND EXISTS (
+                      SELECT 1 FROM plsqt_sections s
+                      WHERE s.plsqt_id = t.plsqt_id AND s.plsqts_docx_blob_id IS NULL
+                  )
+                ORDER BY t.plsqt_id
+                """,
+                (plsqt_id, plsqt_id)
+            )
+            return cur.fetchall()
+
+    def set_section_docx_blob(self, plsqts_id: int, blob_id: int) -> None:
+        """Link a section row to its pre-built .docx blob."""
         with self.conn.cursor() as cur:
             cur.execute(
-                "DELETE FROM plsqt_sections WHERE plsqt_id = %s",
-                (plsqt_id,)
+                "UPDATE plsqt_sections SET plsqts_docx_blob_id = %s WHERE plsqts_id = %s",
+                (blob_id, plsqts_id)
+            )
+
+    def get_templates_missing_headings(self) -> list[dict]:
+        """
+        Get templates with a stored document where at least one section has
+        no recorded heading (loaded before headings were stored).
+
+        Returns list of dicts with plsqt_id, plsqt_name and current_blob_id,
+        ordered by plsqt_id.
+        """
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(
+                """
+                SELECT t.plsqt_id, t.plsqt_name, t.current_blob_id
+                FROM plsq_templates t
+                WHERE t.current_blob_id IS NOT NULL
+                  AND EXISTS (
+                      SELECT 1 FROM plsqt_sections s
+                      WHERE s.plsqt_id = t.plsqt_id AND s.plsqts_heading IS NULL
+                  )
+                ORDER BY t.plsqt_id
+                """
+            )
+            return cur.fetchall()
+
+    def set_section_headings(self, headings: list[tuple[int, str]]) -> int:
+        """Set plsqts_heading from (plsqts_id, heading) pairs. Returns count updated."""
+        with self.conn.cursor() as cur:
+            execute_values(
+                cur,
+                """
+                UPDATE plsqt_sections s SET plsqts_heading = v.heading
+                FROM (VALUES %s) AS v (plsqts_id, heading)
+                WHERE s.plsqts_id = v.plsqts_id
+                """,
+                headings,
             )
             return cur.rowcount
 
-    def update_template(
+    def iter_section_headings(self, batch_size: int = 5000) -> Iterator[str]:
+        """
+        Yield each distinct non-NULL plsqts_heading once.
+
+        Uses a server-side cursor, so the headings are fetched in batches of
+        batch_size rather than all at once.
+        """
+        with self.conn.cursor(name="section_headings") as cur:
+            cur.itersize = batch_size
+            cur.execute(
+                "SELECT DISTINCT plsqts_heading FROM plsqt_sections WHERE plsqts_heading IS NOT NULL"
+            )
+            for (heading,) in cur:
+                yield heading
+
+    def get_section_type_matches(self, catalog_version: str) -> dict[str, Optional[int]]:
+        """
+        Memoized heading matches for a section-type catalog version.
+
+        Returns {lowercased heading: plsqtst_id or None (no match)}.
+        """
+        with self.conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT heading_norm, section_type_id FROM plsqts_type_match
+                WHERE catalog_version = %s
+                """,
+                (catalog_version,)
+            )
+            return dict(cur.fetchall())
+
+    def save_section_type_matches(
         self,
-        plsqt_id: int,
-        country_id: int,
-        currency_id: int,
-        product_cat_id: int,
-        product_line_id: int,
-        blob_id: int,
-        section_count: int,
-        file_path: str,
-        update_user: str = "SQM_loader",
+        catalog_version: str,
+        matches: list[tuple[str, Optional[int]]],
     ) -> None:
-        """Update an existing template row."""
-        now = datetime.now()
+        """Memoize (lowercased heading, plsqtst_id or None) pairs for a catalog version."""
         with self.conn.cursor() as cur:
-            cur.execute(
+            execute_values(
+                cur,
                 """
-                UPDATE plsq_templates SET
-                    country_id = %s,
-                    currency_id = %s,
-                    product_cat_id = %s,
-                    product_line_id = %s,
-                    current_blob_id = %s,
-                    plsqt_section_count = %s,
-                    plsqt_as_of_date = %s,
-                    plsqt_extrn_file_ref = %s,
-                    plsqt_active = true,
-                    plsqt_status = 'not started',
-                    last_update_datetime = %s,
-                    last_update_user = %s,
-                    plsqt_enabled = 1
-                WHERE plsqt_id = %s
+                INSERT INTO plsqts_type_match (heading_norm, catalog_version, section_type_id)
+                VALUES %s
+                ON CONFLICT (heading_norm, catalog_version) DO NOTHING
                 """,
-                (
-                    country_id,
-                    currency_id,
-                    product_cat_id,
-                    product_line_id,
-                    blob_id,
-                    section_count,
-                    date.today(),
-                    file_path,
-                    now,
-                    update_user,
-                    plsqt_id,
-                )
+                [(heading_norm, catalog_version, type_id) for heading_norm, type_id in matches],
+                page_size=1000,
             )
 
-    def insert_template(
+    def reclassify_sections(
         self,
-        plsqt_name: str,
-        country_id: int,
-        currency_id: int,
-        product_cat_id: int,
-        product_line_id: int,
-        blob_id: int,
-        section_count: int,
-        file_path: str,
+        assignments: list[tuple[str, int]],
         update_user: str = "SQM_loader",
     ) -> int:
-        """Insert a new template row. Returns plsqt_id."""
-        now = datetime.now()
+        """
+        Set section_type_id on every section whose heading is listed in
+        assignments (heading, plsqtst_id) and whose type differs, in one
+        set-based UPDATE. As in upsert_template, a section whose type
+        changes goes back to status 'not started'. Returns count updated.
+        """
         with self.conn.cursor() as cur:
             cur.execute(
                 """
-                INSERT INTO plsq_templates (
-                    plsqt_name,
-                    country_id,
-                    currency_id,
-                    product_cat_id,
-                    product_line_id,
-                    current_blob_id,
-                    plsqt_section_count,
-                    plsqt_as_of_date,
-                    plsqt_extrn_file_ref,
-                    plsqt_active,
-                    plsqt_status,
-                    last_update_datetime,
-                    last_update_user,
-                    plsqt_enabled
-                ) VALUES (
-                    %s, %s, %s, %s, %s, %s, %s, %s, %s, true, 'not started', %s, %s, 1
+                CREATE TEMP TABLE tmp_section_reclass (
+                    heading text PRIMARY KEY,
+                    section_type_id integer NOT NULL
                 )
-                RETURNING plsqt_id
+                """
+            )
+            execute_values(
+                cur,
+                "INSERT INTO tmp_section_reclass (heading, section_type_id) VALUES %s",
+                assignments,
+                page_size=1000,
+            )
+            cur.execute(
+                """
+                UPDATE plsqt_sections s
+                SET section_type_id = r.section_type_id,
+                    plsqts_status = 'not started',
+                    last_update_datetime = %s,
+                    last_update_user = %s
+                FROM tmp_section_reclass r
+                WHERE s.plsqts_heading = r.heading
+                  AND s.section_type_id IS DISTINCT FROM r.section_type_id
                 """,
-                (
-                    plsqt_name,
-                    country_id,
-                    currency_id,
-                    product_cat_id,
-                    product_line_id,
-                    blob_id,
-                    section_count,
-                    date.today(),
-                    file_path,
-                    now,
-                    update_user,
-                )
+                (datetime.now(), update_user)
             )
-            return cur.fetchone()[0]
+            updated = cur.rowcount
+            cur.execute("DROP TABLE tmp_section_reclass")
+            return updated
 
-    # -------------------------------------------------------------------------
-    # Section Operations
-    # -------------------------------------------------------------------------
-
-    def insert_section(
+    def upsert_template(
         self,
-        plsqt_id: int,
-        section_type_id: int,
-        seqn: int,
-        content: str,
+        plsqt_name: str,
+        product_line_abbr: str,
+        country_id: int,
+        currency_id: int,
+        file_bytes: bytes,
+        original_filename: str,
+        sha256_hash: bytes,
+        file_path: str,
+        sections: list[SectionRow],
+        body_elem_count: int | None = None,
         update_user: str = "SQM_loader",
-    ) -> int:
-        """Insert a section row. Returns plsqts_id."""
+    ) -> Optional[dict]:
+        """
+        Store a template .docx with all its sections in one statement.
+
+        Looks up the product line, stores the file (get_or_create_blob),
+        records a replaced blob in document_blob_history, inserts or updates
+        the template row and writes its sections -- as data-modifying CTEs of
+        a single statement, so a load costs one round trip.
+
+        Sections of an existing template are merged by plsqts_seqn rather
+        than replaced, so their plsqts_id, alt name and status survive a
+        reload:
+
+        - a section whose type, heading and content hash are unchanged keeps
+          its row; only its element range is refreshed if the blob changed
+        - a changed section is updated in place; its status is reset if its
+          type or content changed
+        - sections no longer present are deleted, new ones inserted
+
+        If either side has a duplicated plsqts_seqn, all old rows are
+        deleted and the new ones inserted. Pre-built section documents are
+        unlinked (and recorded in history) when their row is deleted, the
+        template's blob changes, or the section's element range changes
+        (e.g. a forced reload after a parser change).
+
+        Returns dict with plsqt_id, is_new, blob_id and
+        sections_inserted / sections_updated / sections_deleted, or None if
+        the product line is unknown, in which case nothing is written.
+        """
         now = datetime.now()
-        with self.conn.cursor() as cur:
+        params = {
+            "plsqt_name": plsqt_name,
+            "product_line_abbr": product_line_abbr,
+            "country_id": country_id,
+            "currency_id": currency_id,
+            "bytes": psycopg2.Binary(file_bytes),
+            "sha256": psycopg2.Binary(sha256_hash),
+            "size_bytes": len(file_bytes),
+            "content_type": DOCX_CONTENT_TYPE,
+            "original_filename": original_filename,
+            "section_count": len(sections),
+            "as_of_date": date.today(),
+            "file_path": file_path,
+            "now": now,
+            "update_user": update_user,
+            "body_elem_count": body_elem_count,
+            "type_ids": [s.section_type_id for s in sections],
+            "seqns": [s.seqn for s in sections],
+            "contents": [s.content for s in sections],
+            "content_shas": [psycopg2.Binary(section_content_sha256(s.content)) for s in sections],
+            "elem_starts": [s.elem_start for s in sections],
+            "elem_ends": [s.elem_end for s in sections],
+            "headings": [s.heading for s in sections],
+        }
+        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+            # Every write joins pl, so an unknown product line writes nothing.
+            # All CTEs see the same snapshot: "existing" and "old_sections"
+            # are the rows as they were before this statement, and each
+            # section row is written by at most one of deleted /
+            # updated_sections.
             cur.execute(
-                """
-                INSERT INTO plsqt_sections (
-                    plsqt_id,
-                    section_type_id,
-                    plsqts_seqn,
-                    plsqts_content,
-                    plsqts_active,
-                    plsqts_status,
-                    last_update_datetime,
-                    last_update_user,
-                    plsqts_enabled
-                ) VALUES (
-                    %s, %s, %s, %s, true, 'not started', %s, %s, 1
+                f"""
+                WITH pl AS (
+                    SELECT product_line_id, product_cat_id FROM product_line
+                    WHERE product_line_abbr = %(product_line_abbr)s AND product_line_enabled = 1
+                ),
+                found_blob AS (
+                    SELECT blob_id FROM document_blob WHERE sha256 = %(sha256)s
+                ),
+                new_blob AS (
+                    -- See get_or_create_blob() for the ON CONFLICT clause
+                    INSERT INTO document_blob (bytes, sha256, size_bytes, content_type, original_filename)
+                    SELECT %(bytes)s, %(sha256)s, %(size_bytes)s, %(content_type)s, %(original_filename)s
+                    FROM pl
+                    WHERE NOT EXISTS (SELECT 1 FROM found_blob)
+                    ON CONFLICT (sha256) DO UPDATE SET sha256 = EXCLUDED.sha256
+                    RETURNING blob_id
+                ),
+                blob AS (
+                    SELECT blob_id FROM found_blob
+                    UNION ALL
+                    SELECT blob_id FROM new_blob
+                ),
+                existing AS (
+                    SELECT plsqt_id, current_blob_id FROM plsq_templates
+                    WHERE plsqt_name = %(plsqt_name)s
+                    LIMIT 1
+                ),
+                incoming AS (
+                    SELECT * FROM unnest(
+                        %(type_ids)s::integer[], %(seqns)s::integer[], %(contents)s::text[],
+                        %(content_shas)s::bytea[], %(elem_starts)s::integer[],
+                        %(elem_ends)s::integer[], %(headings)s::text[]
+                    ) WITH ORDINALITY AS u (section_type_id, seqn, content, content_sha256,
+                                            elem_start, elem_end, heading, ord)
+                ),
+                old_sections AS (
+                    SELECT s.* FROM plsqt_sections s
+                    JOIN existing e ON s.plsqt_id = e.plsqt_id
+                ),
+                pairing AS (
+                    -- Rows can be paired by seqn only if it is unique on both sides
+                    SELECT (SELECT count(*) = count(DISTINCT seqn) FROM incoming)
+                       AND (SELECT count(*) = count(DISTINCT plsqts_seqn) FROM old_sections)
+                       AS by_seqn
+                ),
+                dropped AS (
+                    -- Old rows to delete: all of them, or those with no new seqn
+                    SELECT o.plsqts_id, o.plsqts_docx_blob_id FROM old_sections o, pairing m
+                    WHERE NOT m.by_seqn
+                       OR NOT EXISTS (SELECT 1 FROM incoming i WHERE i.seqn = o.plsqts_seqn)
+                ),
+                archived AS (
+                    INSERT INTO document_blob_history (entity_type, entity_id, blob_id, replaced_by)
+                    SELECT 'template', e.plsqt_id, prev.blob_id, %(update_user)s
+                    FROM existing e
+                    CROSS JOIN blob b
+                    CROSS JOIN pl
+                    CROSS JOIN LATERAL (
+                        SELECT e.current_blob_id AS blob_id
+                        WHERE e.current_blob_id IS NOT NULL AND e.current_blob_id <> b.blob_id
+                        UNION ALL
+                        -- Pre-built documents of deleted rows, of every row
+                        -- when the blob they were built from changes, and of
+                        -- rows whose element range changes
+                        SELECT DISTINCT o.plsqts_docx_blob_id FROM old_sections o
+                        WHERE o.plsqts_docx_blob_id IS NOT NULL
+                          AND (o.plsqts_source_sha256 IS DISTINCT FROM %(sha256)s
+                               OR o.plsqts_id IN (SELECT plsqts_id FROM dropped)
+                               OR EXISTS (
+                                   SELECT 1 FROM incoming i
+                                   WHERE i.seqn = o.plsqts_seqn
+                                     AND (i.elem_start, i.elem_end)
+                                         IS DISTINCT FROM (o.plsqts_elem_start, o.plsqts_elem_end)
+                               ))
+                    ) prev
+                ),
+                deleted AS (
+                    DELETE FROM plsqt_sections s
+                    USING pl
+                    WHERE s.plsqts_id IN (SELECT plsqts_id FROM dropped)
+                    RETURNING s.plsqts_id
+                ),
+                updated_sections AS (
+                    -- Unchanged columns are set from the old row, so their
+                    -- stored (TOASTed) values are kept rather than rewritten
+                    UPDATE plsqt_sections s SET
+                        section_type_id = i.section_type_id,
+                        plsqts_content = CASE WHEN s.plsqts_content_sha256 IS DISTINCT FROM i.content_sha256
+                                              THEN i.content ELSE s.plsqts_content END,
+                        plsqts_content_sha256 = i.content_sha256,
+                        plsqts_heading = i.heading,
+                        plsqts_status = CASE WHEN (s.section_type_id, s.plsqts_content_sha256)
+                                                  IS DISTINCT FROM (i.section_type_id, i.content_sha256)
+                                             THEN 'not started' ELSE s.plsqts_status END,
+                        plsqts_elem_start = i.elem_start,
+                        plsqts_elem_end = i.elem_end,
+                        plsqts_body_elem_count = %(body_elem_count)s,
+                        plsqts_source_sha256 = %(sha256)s,
+                        -- The pre-built document shows the old range of the old blob
+                        plsqts_docx_blob_id = CASE WHEN (s.plsqts_source_sha256, s.plsqts_elem_start,
+                                                         s.plsqts_elem_end)
+                                                        IS DISTINCT FROM
+                                                        (%(sha256)s::bytea, i.elem_start, i.elem_end)
+                                                   THEN NULL ELSE s.plsqts_docx_blob_id END,
+                        last_update_datetime = %(now)s,
+                        last_update_user = %(update_user)s
+                    FROM incoming i, pairing m, pl
+                    WHERE m.by_seqn
+                      AND s.plsqts_id IN (SELECT plsqts_id FROM old_sections)
+                      AND s.plsqts_seqn = i.seqn
+                      AND (s.section_type_id, s.plsqts_content_sha256, s.plsqts_heading,
+                           s.plsqts_elem_start, s.plsqts_elem_end, s.plsqts_body_elem_count,
+                           s.plsqts_source_sha256)
+                          IS DISTINCT FROM
+                          (i.section_type_id, i.content_sha256, i.heading,
+                           i.elem_start, i.elem_end, %(body_elem_count)s::integer,
+                           %(sha256)s::bytea)
+                    RETURNING s.plsqts_id
+                ),
+                updated AS (
+                    UPDATE plsq_templates t SET
+                        country_id = %(country_id)s,
+                        currency_id = %(currency_id)s,
+                        product_cat_id = pl.product_cat_id,
+                        product_line_id = pl.product_line_id,
+                        current_blob_id = b.blob_id,
+                        plsqt_section_count = %(section_count)s,
+                        plsqt_as_of_date = %(as_of_date)s,
+                        plsqt_extrn_file_ref = %(file_path)s,
+                        plsqt_active = true,
+                        plsqt_status = 'not started',
+                        last_update_datetime = %(now)s,
+                        last_update_user = %(update_user)s,
+                        plsqt_enabled = 1
+                    FROM existing e, pl, blob b
+                    WHERE t.plsqt_id = e.plsqt_id
+                    RETURNING t.plsqt_id
+                ),
+                inserted AS (
+                    INSERT INTO plsq_templates (
+                        plsqt_name,
+                        country_id,
+                        currency_id,
+                        product_cat_id,
+                        product_line_id,
+                        current_blob_id,
+                        plsqt_section_count,
+                        plsqt_as_of_date,
+                        plsqt_extrn_file_ref,
+                        plsqt_active,
+                        plsqt_status,
+                        last_update_datetime,
+                        last_update_user,
+                        plsqt_enabled
+                    )
+                    SELECT %(plsqt_name)s, %(country_id)s, %(currency_id)s,
+                           pl.product_cat_id, pl.product_line_id, b.blob_id,
+                           %(section_count)s, %(as_of_date)s, %(file_path)s,
+                           true, 'not started', %(now)s, %(update_user)s, 1
+                    FROM pl, blob b
+                    WHERE NOT EXISTS (SELECT 1 FROM existing)
+                    RETURNING plsqt_id
+                ),
+                tmpl AS (
+                    SELECT plsqt_id, false AS is_new FROM updated
+                    UNION ALL
+                    SELECT plsqt_id, true AS is_new FROM inserted
+                ),
+                new_sections AS (
+                    -- Sections with no old row to update (all of them for a
+                    -- new template or when not merging by seqn)
+                    INSERT INTO plsqt_sections ({_SECTION_INSERT_COLUMNS})
+                    SELECT t.plsqt_id, i.section_type_id, i.seqn, i.content, i.content_sha256,
+                           true, 'not started', %(now)s, %(update_user)s, 1,
+                           i.elem_start, i.elem_end, %(body_elem_count)s, %(sha256)s, i.heading
+                    FROM tmpl t
+                    CROSS JOIN incoming i
+                    CROSS JOIN pairing m
+                    WHERE NOT m.by_seqn
+                       OR NOT EXISTS (
+                           SELECT 1 FROM old_sections o
+                           WHERE o.plsqts_seqn = i.seqn
+                       )
+                    ORDER BY i.ord
+                    RETURNING plsqts_id
                 )
-                RETURNING plsqts_id
+                SELECT t.plsqt_id, t.is_new,
+                       (SELECT blob_id FROM blob) AS blob_id,
+                       (SELECT count(*) FROM new_sections) AS sections_inserted,
+                       (SELECT count(*) FROM updated_sections) AS sections_updated,
+                       (SELECT count(*) FROM deleted) AS sections_deleted
+                FROM tmpl t
                 """,
-                (plsqt_id, section_type_id, seqn, content, now, update_user)
+                params
             )
-            return cur.fetchone()[0]
+            return cur.fetchone()
 
     def __enter__(self):
         self.connect()
@@ -0,0 +1,484 @@
+"""
+DOCX Package Module
+
+Zip-level access to .docx packages, without python-docx.
+
+PackageReader indexes a package held in memory and inflates individual
+parts on demand. PackageStream writes a new package from a reader: parts
+that are replaced get deflated afresh, every other entry's compressed bytes
+are copied verbatim (never inflated or re-deflated), and the output is
+produced as a sequence of chunks whose total size is known up front.
+prune_package() garbage-collects relationships and parts (images, headers,
+...) that rewritten parts no longer reference. iter_stored_zip() bundles
+several packages into one uncompressed zip, streamed member by member.
+
+Only the plain (non-zip64, unencrypted) packages Word produces are supported.
+"""
+
+import posixpath
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator
+
+from lxml import etree
+
+
+# Zip record layouts (little-endian, see APPNOTE.TXT)
+_LOCAL_HEADER = struct.Struct("<4sHHHHHLLLHH")
+_CENTRAL_HEADER = struct.Struct("<4sHHHHHHLLLHHHHHLL")
+_END_RECORD = struct.Struct("<4sHHHHLLH")
+_LOCAL_SIG = b"PK\x03\x04"
+_CENTRAL_SIG = b"PK\x01\x02"
+_END_SIG = b"PK\x05\x06"
+
+_STORED = 0
+_DEFLATED = 8
+_FLAG_ENCRYPTED = 0x0001
+_FLAG_DATA_DESCRIPTOR = 0x0008
+_FLAG_UTF8 = 0x0800
+_ZIP_VERSION = 20
+
+_CHUNK_SIZE = 64 * 1024
+
+# Package-level names used to locate the main document part
+PACKAGE_RELS_PART = "_rels/.rels"
+DEFAULT_DOCUMENT_PART = "word/document.xml"
+PKG_RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_DOCUMENT_REL_TYPE = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+CONTENT_TYPES_PART = "[Content_Types].xml"
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+
+# Namespace of r:id / r:embed / r:link attributes in part XML
+OFFICE_RELS_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+# Relationship types that exist only because some element in the source part
+# points at them by Id. Anything else (styles, numbering, settings, theme,
+# footnotes, ...) is an implicit relationship and is always kept.
+_EXPLICIT_REL_TYPES = frozenset(
+    OFFICE_RELS_NS + "/" + t for t in (
+        "image", "hyperlink", "header", "footer", "oleObject", "package",
+        "chart", "video", "audio", "media",
+        "diagramData", "diagramLayout", "diagramQuickStyle", "diagramColors",
+    )
+)
+
+
+@dataclass
+class ZipEntry:
+    """One member of a zip package, as described by its central directory record."""
+    name: str
+    flag_bits: int
+    compress_type: int
+    dos_time: int
+    dos_date: int
+    crc: int
+    compress_size: int
+    file_size: int
+    external_attr: int
+    header_offset: int
+
+
+class PackageReader:
+    """Read-only view of a .docx (zip) package held in memory."""
+
+    def __init__(self, data: bytes | memoryview):
+        self.data = memoryview(data)
+        self.entries: dict[str, ZipEntry] = {}
+        self._read_central_directory()
+
+    def _read_central_directory(self) -> None:
+        """Locate the end-of-central-directory record and index all entries."""
+        data = self.data
+        # The end record sits in the last 22 bytes plus an optional comment
+        tail_start = max(0, len(data) - _END_RECORD.size - 0xFFFF)
+        pos = bytes(data[tail_start:]).rfind(_END_SIG)
+        if pos < 0:
+            raise ValueError("Not a zip package: end of central directory not found")
+        pos += tail_start
+
+        (_sig, _disk, _cd_disk, _n_disk, count, cd_size, cd_offset,
+         _comment_len) = _END_RECORD.unpack_from(data, pos)
+        if count == 0xFFFF or cd_offset == 0xFFFFFFFF or cd_size == 0xFFFFFFFF:
+            raise ValueError("Zip64 packages are not supported")
+
+        offset = cd_offset
+        for _ in range(count):
+            if bytes(data[offset:offset + 4]) != _CENTRAL_SIG:
+                raise ValueError("Corrupt zip package: bad central directory record")
+            (_sig, _made_by, _needed, flags, method, dos_time, dos_date, crc,
+             csize, usize, name_len, extra_len, comment_len, _disk_start,
+             _internal, external, header_offset) = _CENTRAL_HEADER.unpack_from(data, offset)
+            offset += _CENTRAL_HEADER.size
+            raw_name = bytes(data[offset:offset + name_len])
+            name = raw_name.decode("utf-8" if flags & _FLAG_UTF8 else "cp437")
+            offset += name_len + extra_len + comment_len
+
+            if flags & _FLAG_ENCRYPTED:
+                raise ValueError(f"Encrypted zip entry not supported: {name}")
+            self.entries[name] = ZipEntry(
+                name=name,
+                flag_bits=flags,
+                compress_type=method,
+                dos_time=dos_time,
+                dos_date=dos_date,
+                crc=crc,
+                compress_size=csize,
+                file_size=usize,
+                external_attr=external,
+                header_offset=header_offset,
+            )
+
+    def raw(self, name: str) -> memoryview:
+        """Return the stored (still compressed) bytes of an entry, without copying."""
+        entry = self.entries[name]
+        data = self.data
+        offset = entry.header_offset
+        if bytes(data[offset:offset + 4]) != _LOCAL_SIG:
+            raise ValueError(f"Corrupt zip package: bad local header for {name}")
+        fields = _LOCAL_HEADER.unpack_from(data, offset)
+        name_len, extra_len = fields[9], fields[10]
+        start = offset + _LOCAL_HEADER.size + name_len + extra_len
+        return data[start:start + entry.compress_size]
+
+    def read(self, name: str) -> bytes:
+        """
+        Return the uncompressed bytes of an entry.
+
+        Raises:
+            KeyError: If the package has no such entry
+            ValueError: If the entry is corrupt or uses an unsupported method
+        """
+        entry = self.entries[name]
+        raw = self.raw(name)
+        if entry.compress_type == _STORED:
+            content = bytes(raw)
+        elif entry.compress_type == _DEFLATED:
+            try:
+                content = zlib.decompress(raw, -zlib.MAX_WBITS)
+            except zlib.error as e:
+                raise ValueError(f"Corrupt zip entry {name}: {e}") from e
+        else:
+            raise ValueError(f"Unsupported compression method {entry.compress_type} for {name}")
+        if zlib.crc32(content) != entry.crc:
+            raise ValueError(f"Corrupt zip entry {name}: CRC mismatch")
+        return content
+
+
+def rels_part_name(part: str) -> str:
+    """Return the name of a part's relationships part (word/x.xml -> word/_rels/x.xml.rels)."""
+    folder, filename = posixpath.split(part)
+    return posixpath.join(folder, "_rels", filename + ".rels")
+
+
+def _resolve_target(part: str, target: str) -> str:
+    """Resolve a relationship Target against the directory of its source part."""
+    if target.startswith("/"):
+        return posixpath.normpath(target.lstrip("/"))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(part), target))
+
+
+def related_parts(package, part: str, rel_types: Iterable[str]) -> list[str]:
+    """
+    Return the internal parts that part relates to with any of rel_types.
+
+    Accepts anything with a zipfile-style read(name) method; returns an
+    empty list when the part has no relationships.
+    """
+    rel_types = set(rel_types)
+    try:
+        rels = etree.fromstring(package.read(rels_part_name(part)))
+    except (KeyError, etree.XMLSyntaxError):
+        return []
+    return [
+        _resolve_target(part, rel.get('Target', ''))
+        for rel in rels.iterchildren('{%s}Relationship' % PKG_RELS_NS)
+        if rel.get('Type') in rel_types and rel.get('TargetMode') != 'External'
+    ]
+
+
+def main_document_part(package) -> str:
+    """
+    Return the name of the package's main document part.
+
+    Resolved through the package relationships (_rels/.rels) the same way
+    python-docx does; falls back to word/document.xml. Accepts anything
+    with a zipfile-style read(name) method.
+    """
+    try:
+        rels = etree.fromstring(package.read(PACKAGE_RELS_PART))
+    except (KeyError, etree.XMLSyntaxError):
+        return DEFAULT_DOCUMENT_PART
+    for rel in rels.iterchildren('{%s}Relationship' % PKG_RELS_NS):
+        if rel.get('Type') == OFFICE_DOCUMENT_REL_TYPE and rel.get('TargetMode') != 'External':
+            return posixpath.normpath(rel.get('Target', '').lstrip('/'))
+    return DEFAULT_DOCUMENT_PART
+
+
+def _reachable_parts(entries, load_rels: Callable[[str], object]) -> set[str]:
+    """
+    Return every part reachable from the package relationships.
+
+    load_rels(name) returns the parsed relationships part, or None when the
+    package has no such entry.
+    """
+    reachable: set[str] = set()
+    pending = [""]  # "" stands for the package itself (_rels/.rels)
+    while pending:
+        source = pending.pop()
+        rels = load_rels(PACKAGE_RELS_PART if source == "" else rels_part_name(source))
+        if rels is None:
+            continue
+        for rel in rels.iterchildren('{%s}Relationship' % PKG_RELS_NS):
+            if rel.get('TargetMode') == 'External':
+                continue
+            target = _resolve_target(source, rel.get('Target', ''))
+            if target in entries and target not in reachable:
+                reachable.add(target)
+                pending.append(target)
+    return reachable
+
+
+def prune_package(
+    package: PackageReader,
+    parts: dict[str, etree._Element],
+) -> tuple[dict[str, bytes], set[str]]:
+    """
+    Serialize rewritten parts and garbage-collect what they no longer use.
+
+    For each rewritten part, relationships of an explicit type (image,
+    hyperlink, header, footer, ...) whose Id no attribute in the part
+    mentions any more are removed. Any attribute counts, not only r:id /
+    r:embed: VML refers to images by o:relid, SmartArt drawings by an
+    unqualified relId, and extensions may use names of their own. Parts that were reachable from the
+    package relationships before and are not after -- typically
+    word/media/* images, but also headers, footers and charts together with
+    their own relationships -- are dropped, and their [Content_Types].xml
+    overrides removed. Parts that were never reachable are left alone.
+
+    Args:
+        package: The source package.
+        parts: Part name -> rewritten XML root for every part that changed.
+
+    Returns:
+        (replace, drop) ready to pass to PackageStream.
+    """
+    replace: dict[str, bytes] = {}
+    rewritten_rels: dict[str, etree._Element] = {}
+
+    for name, root in parts.items():
+        replace[name] = etree.tostring(root, encoding='UTF-8', standalone=True)
+        rels_name = rels_part_name(name)
+        if rels_name not in package.entries:
+            continue
+        rels = etree.fromstring(package.read(rels_name))
+        explicit = [
+            rel for rel in rels.iterchildren('{%s}Relationship' % PKG_RELS_NS)
+            if rel.get('Type') in _EXPLICIT_REL_TYPES
+        ]
+        ids = {rel.get('Id') for rel in explicit}
+        used = {
+            value
+            for el in root.iter(tag=etree.Element)
+            for value in el.attrib.values()
+            if value in ids
+        }
+        unused = [rel for rel in explicit if rel.get('Id') not in used]
+        for rel in unused:
+            rels.remove(rel)
+        if unused:
+            rewritten_rels[rels_name] = rels
+
+    if not rewritten_rels:
+        return replace, set()
+
+    source_rels: dict[str, etree._Element | None] = {}
+
+    def load_source_rels(name: str):
+        if name not in source_rels:
+            source_rels[name] = (
+                etree.fromstring(package.read(name)) if name in package.entries else None
+            )
+        return source_rels[name]
+
+    def load_pruned_rels(name: str):
+        return rewritten_rels[name] if name in rewritten_rels else load_source_rels(name)
+
+    drop = (_reachable_parts(package.entries, load_source_rels)
+            - _reachable_parts(package.entries, load_pruned_rels))
+    drop |= {rels_part_name(p) for p in drop if rels_part_name(p) in package.entries}
+
+    for rels_name, rels in rewritten_rels.items():
+        if rels_name not in drop:
+            replace[rels_name] = etree.tostring(rels, encoding='UTF-8', standalone=True)
+
+    if drop and CONTENT_TYPES_PART in package.entries:
+        types = etree.fromstring(package.read(CONTENT_TYPES_PART))
+        stale = [
+            o for o in types.iterchildren('{%s}Override' % CONTENT_TYPES_NS)
+            if o.get('PartName', '').lstrip('/') in drop
+        ]
+        for override in stale:
+            types.remove(override)
+        if stale:
+            replace[CONTENT_TYPES_PART] = etree.tostring(
+                types, encoding='UTF-8', standalone=True)
+
+    return replace, drop
+
+
+@dataclass
+class _OutputEntry:
+    """An entry scheduled for writing: either new deflated bytes or a raw copy."""
+    entry: ZipEntry
+    name_bytes: bytes
+    flags: int
+    data: bytes | memoryview
+    offset: int = 0
+
+
+class PackageStream:
+    """
+    A rewritten package, produced lazily as byte chunks.
+
+    Replacement parts are compressed when the stream is built (so the total
+    size is known before the first byte is sent); all other entries are
+    sliced straight out of the source buffer while iterating.
+    """
+
+    def __init__(
+        self,
+        reader: PackageReader,
+        replace: dict[str, bytes] | None = None,
+        drop: set[str] | frozenset[str] = frozenset(),
+    ):
+        replace = replace or {}
+        self._entries: list[_OutputEntry] = []
+
+        offset = 0
+        for name, entry in reader.entries.items():
+            if name in drop:
+                continue
+            name_bytes = name.encode("utf-8")
+            flags = entry.flag_bits & ~_FLAG_DATA_DESCRIPTOR & ~_FLAG_UTF8
+            if not name.isascii():
+                flags |= _FLAG_UTF8
+
+            if name in replace:
+                content = replace[name]
+                flags &= ~0x0006  # compression-option bits describe the old stream
+                compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+                data = compressor.compress(content) + compressor.flush()
+                entry = ZipEntry(
+                    name=name,
+                    flag_bits=flags,
+                    compress_type=_DEFLATED,
+                    dos_time=entry.dos_time,
+                    dos_date=entry.dos_date,
+                    crc=zlib.crc32(content),
+                    compress_size=len(data),
+                    file_size=len(content),
+                    external_attr=entry.external_attr,
+                    header_offset=0,
+                )
+            else:
+                data = reader.raw(name)
+
+            out = _OutputEntry(entry=entry, name_bytes=name_bytes, flags=flags,
+                               data=data, offset=offset)
+            self._entries.append(out)
+            offset += _LOCAL_HEADER.size + len(name_bytes) + entry.compress_size
+
+        self._central_offset = offset
+        self._central_size = sum(_CENTRAL_HEADER.size + len(e.name_bytes) for e in self._entries)
+        self.size = offset + self._central_size + _END_RECORD.size
+
+        if len(self._entries) >= 0xFFFF or self.size >= 0xFFFFFFFF:
+            raise ValueError("Package too large for a non-zip64 archive")
+
+    def __iter__(self) -> Iterator[bytes | memoryview]:
+        for out in self._entries:
+            e = out.entry
+            yield _LOCAL_HEADER.pack(
+                _LOCAL_SIG, _ZIP_VERSION, out.flags, e.compress_type,
+                e.dos_time, e.dos_date, e.crc, e.compress_size, e.file_size,
+                len(out.name_bytes), 0,
+            ) + out.name_bytes
+            data = out.data
+            for start in range(0, len(data), _CHUNK_SIZE):
+                yield data[start:start + _CHUNK_SIZE]
+
+        central = []
+        for out in self._entries:
+            e = out.entry
+            central.append(_CENTRAL_HEADER.pack(
+                _CENTRAL_SIG, _ZIP_VERSION, _ZIP_VERSION, out.flags, e.compress_type,
+                e.dos_time, e.dos_date, e.crc, e.compress_size, e.file_size,
+                len(out.name_bytes), 0, 0, 0, 0, e.external_attr, out.offset,
+            ))
+            central.append(out.name_bytes)
+        central.append(_END_RECORD.pack(
+            _END_SIG, 0, 0, len(self._entries), len(self._entries),
+            self._central_size, self._central_offset, 0,
+        ))
+        yield b"".join(central)
+
+    def getvalue(self) -> bytes:
+        """Return the whole package as bytes."""
+        return b"".join(self)
+
+
+def _dos_timestamp(seconds: float) -> tuple[int, int]:
+    """Return (dos_time, dos_date) for a Unix timestamp, in local time."""
+    t = time.localtime(seconds)
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+def iter_stored_zip(members: Iterable[tuple[str, PackageStream]]) -> Iterator[bytes | memoryview]:
+    """
+    Stream a zip archive whose members are PackageStreams, stored uncompressed.
+
+    Members are consumed lazily: each is pulled from the iterable only when
+    the previous one has been written, so the first bytes go out before
+    later members are built. A .docx is already deflated, so storing it
+    costs nothing in size; each member is iterated twice (once for its CRC,
+    once to emit it) instead of being held in memory.
+    """
+    dos_time, dos_date = _dos_timestamp(time.time())
+    central = []
+    offset = 0
+    count = 0
+
+    for name, stream in members:
+        crc = 0
+        for chunk in stream:
+            crc = zlib.crc32(chunk, crc)
+        name_bytes = name.encode("utf-8")
+        flags = 0 if name.isascii() else _FLAG_UTF8
+        if offset + stream.size >= 0xFFFFFFFF or count + 1 >= 0xFFFF:
+            raise ValueError("Archive too large for a non-zip64 archive")
+
+        yield _LOCAL_HEADER.pack(
+            _LOCAL_SIG, _ZIP_VERSION, flags, _STORED, dos_time, dos_date,
+            crc, stream.size, stream.size, len(name_bytes), 0,
+        ) + name_bytes
+        yield from stream
+
+        central.append(_CENTRAL_HEADER.pack(
+            _CENTRAL_SIG, _ZIP_VERSION, _ZIP_VERSION, flags, _STORED,
+            dos_time, dos_date, crc, stream.size, stream.size,
+            len(name_bytes), 0, 0, 0, 0, 0o100644 << 16, offset,
+        ) + name_bytes)
+        offset += _LOCAL_HEADER.size + len(name_bytes) + stream.size
+        count += 1
+
+    central_size = sum(len(c) for c in central)
+    central.append(_END_RECORD.pack(
+        _END_SIG, 0, 0, count, count, central_size, offset, 0,
+    ))
+    yield b"".join(central)
@@ -4,6 +4,8 @@ Result models for the SQM template loader service layer.
 
 from dataclasses import dataclass
 
+from listldr.parser import ParsedDocument
+
 
 @dataclass
 class SectionInfo:
@@ -23,3 +25,16 @@ class TemplateLoadResult:
     is_new: bool
     blob_id: int
     sections: list[SectionInfo]
+    unchanged: bool = False     # file already stored as is; nothing parsed or written
+
+
+@dataclass
+class PreparedTemplate:
+    """A parsed, validated and section-matched template, not yet written to the database."""
+    file_bytes: bytes
+    filename: str
+    template_name: str
+    product_line_abbr: str
+    sha256: bytes               # raw SHA-256 digest of file_bytes
+    parsed: ParsedDocument
+    sections: list[SectionInfo]
@@ -0,0 +1,126 @@
+"""
+Parse Result Cache
+
+Content-addressed cache of ParsedDocument results for the SQM template loader.
+Entries are keyed by (SHA-256 of the .docx bytes, PARSER_VERSION), so identical
+uploads and repeated extractions from the same blob skip parsing entirely.
+
+Two tiers:
+- in-process LRU (bounded entry count)
+- optional on-disk JSON files under a configurable directory, shared by every
+  process that points at the same directory and kept across restarts
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from io import BytesIO
+from pathlib import Path
+from typing import Optional
+
+from listldr.parser import PARSER_VERSION, ParsedDocument, parse_document
+
+
+class ParseCache:
+    """Two-tier (memory LRU + disk) cache of ParsedDocument keyed by blob SHA-256."""
+
+    def __init__(self, cache_dir: str | Path | None = None, max_entries: int = 64):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, ParsedDocument] = OrderedDict()
+        self._lock = threading.Lock()
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, sha256_hex: str) -> Path:
+        """On-disk location of an entry: <dir>/v<parser version>/<aa>/<sha256>.json"""
+        return self.cache_dir / f"v{PARSER_VERSION}" / sha256_hex[:2] / f"{sha256_hex}.json"
+
+    def get(self, sha256_hex: str) -> Optional[ParsedDocument]:
+        """Return the cached parse for a blob hash, or None on a miss."""
+        with self._lock:
+            parsed = self._entries.get(sha256_hex)
+            if parsed is not None:
+                self._entries.move_to_end(sha256_hex)
+                return parsed
+
+        if self.cache_dir is None:
+            return None
+
+        path = self._path(sha256_hex)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("parser_version") != PARSER_VERSION:
+                return None
+            parsed = ParsedDocument.from_dict(data)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            # Unreadable or truncated entry - drop it and reparse
+            path.unlink(missing_ok=True)
+            return None
+
+        self._remember(sha256_hex, parsed)
+        return parsed
+
+    def put(self, sha256_hex: str, parsed: ParsedDocument) -> None:
+        """Store a parse result in memory and (if configured) on disk."""
+        self._remember(sha256_hex, parsed)
+        if self.cache_dir is None:
+            return
+
+        path = self._path(sha256_hex)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = parsed.to_dict()
+        data["parser_version"] = PARSER_VERSION
+
+        # Write to a temp file in the same directory, then rename into place,
+        # so concurrent readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def get_or_parse(
+        self,
+        file_bytes: bytes | memoryview,
+        sha256_hex: str | None = None,
+        *,
+        with_text: bool = True,
+    ) -> ParsedDocument:
+        """
+        Return the parse result for file_bytes, parsing only on a cache miss.
+
+        Args:
+            file_bytes: Raw bytes of the .docx file.
+            sha256_hex: Hex SHA-256 of file_bytes if already known (e.g. from
+                        document_blob); computed here otherwise.
+            with_text: Whether the caller needs section text. A cached entry
+                       parsed without text is replaced when text is needed.
+        """
+        if sha256_hex is None:
+            sha256_hex = hashlib.sha256(file_bytes).hexdigest()
+
+        parsed = self.get(sha256_hex)
+        if parsed is not None and (parsed.element_lines is not None or not with_text):
+            return parsed
+
+        parsed = parse_document(BytesIO(file_bytes), with_text=with_text)
+        self.put(sha256_hex, parsed)
+        return parsed
+
+    def _remember(self, sha256_hex: str, parsed: ParsedDocument) -> None:
+        """Insert into the in-process LRU, evicting the oldest entries."""
+        with self._lock:
+            self._entries[sha256_hex] = parsed
+            self._entries.move_to_end(sha256_hex)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
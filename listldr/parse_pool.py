@@ -0,0 +1,465 @@
+"""
+Parse Worker Pool
+
+Runs the CPU-bound document work of the API -- preparing uploaded
+templates and building section documents -- in worker processes, so it is
+not limited to the one core the GIL gives the API process, and a
+pathological .docx cannot pin an API worker:
+
+- each task has a timeout, counted from when a worker starts running it
+  (time spent waiting for a free worker does not count); the worker still
+  running a task when it expires is killed and replaced, and tasks running
+  in the other workers are unaffected
+- each worker's address space is capped (RLIMIT_AS, POSIX only), so a
+  runaway parse fails with an error instead of exhausting the host
+- workers are replaced after a fixed number of tasks
+- at most max_workers + max_queue tasks are accepted at once; beyond that
+  ParsePoolBusy is raised at once rather than queueing without bound
+
+With max_workers = 0 tasks run in the calling thread (no process, timeout
+or memory cap), still subject to the same admission limit.
+
+Stored documents are handed to workers through shared memory: the API
+process copies the blob once into a segment and the worker reads it in
+place, instead of pickling it through the pool's pipe. A worker returns
+finished documents as bytes, so pooled extraction is buffered; only
+in-process extraction can stream (see stream_section_docx()).
+"""
+
+import multiprocessing
+import queue
+import threading
+import traceback
+from contextlib import contextmanager
+from dataclasses import dataclass
+from io import BytesIO
+from multiprocessing import shared_memory
+from typing import Callable, Iterator, Optional, TypeVar
+
+try:
+    import resource
+except ImportError:  # Windows: no address-space limit
+    resource = None
+
+from listldr.docx_package import PackageStream, iter_stored_zip
+from listldr.models import PreparedTemplate
+from listldr.parse_cache import ParseCache
+from listldr.parser import (
+    ParsedDocument, extract_all_sections, extract_section_docx, parse_document,
+    stream_section_docx,
+)
+from listldr.service import prepare_template
+from listldr.text_utils import SectionTypeMatcher
+
+T = TypeVar("T")
+
+
+class ParsePoolBusy(Exception):
+    """No capacity for another task right now; the caller may retry later."""
+
+
+class ParseTimeout(Exception):
+    """A task ran longer than the pool's task timeout and was killed."""
+
+
+@dataclass(frozen=True)
+class _SharedSource:
+    """A document placed in shared memory by ParsePool._shared(), as passed to a worker."""
+    name: str
+    size: int
+
+
+@contextmanager
+def _source_view(source: bytes | memoryview | _SharedSource) -> Iterator[bytes | memoryview]:
+    """
+    Worker side of _SharedSource: a read-only view of the segment, valid
+    inside the block (the API process owns and unlinks the segment). Plain
+    bytes are passed through.
+
+    The segment can only be closed once nothing references the view, so
+    work on it must be done in calls that have returned by the end of the
+    block.
+    """
+    if not isinstance(source, _SharedSource):
+        yield source
+        return
+    segment = shared_memory.SharedMemory(name=source.name)
+    view = segment.buf[:source.size].toreadonly()
+    try:
+        yield view
+    except BaseException as e:
+        traceback.clear_frames(e.__traceback__)  # their locals still view the segment
+        raise
+    finally:
+        view.release()
+        segment.close()
+
+
+# Per-process state, set once by _init_worker() so it is not pickled per task
+_worker_section_matcher: SectionTypeMatcher | None = None
+_worker_parse_cache: ParseCache | None = None
+
+
+def _init_worker(
+    section_types: list[tuple[int, str]],
+    parse_cache_dir: str | None,
+    memory_limit_mb: int,
+) -> None:
+    """Worker setup: cap memory, build the matcher, open the parse cache."""
+    global _worker_section_matcher, _worker_parse_cache
+    if memory_limit_mb > 0 and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    _worker_section_matcher = SectionTypeMatcher(section_types)
+    _worker_parse_cache = ParseCache(parse_cache_dir)
+
+
+def _worker_main(conn, section_types, parse_cache_dir, memory_limit_mb) -> None:
+    """
+    Worker process: run the tasks received on conn until None (or the end of
+    the pipe) arrives. For each task, send "started" as it starts, then
+    (failed, result or exception).
+    """
+    _init_worker(section_types, parse_cache_dir, memory_limit_mb)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn, args = task
+        conn.send("started")
+        try:
+            outcome = (False, fn(*args))
+        except BaseException as e:
+            outcome = (True, e)
+        try:
+            conn.send(outcome)
+        except Exception as e:  # result or exception cannot be pickled
+            conn.send((True, RuntimeError(f"Parse worker could not return the result: {e}")))
+        del task, fn, args, outcome
+
+
+class _Worker:
+    """One worker process and the API process's end of its pipe."""
+
+    def __init__(self, context, initargs: tuple):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, *initargs), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks = 0
+
+    def stop(self) -> None:
+        """Let the worker exit after its current task (it is idle when called)."""
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.kill()
+        self.conn.close()
+
+    def kill(self) -> None:
+        """Stop the worker at once, whatever it is running."""
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+def _prepare(
+    file_bytes: bytes,
+    filename: str,
+    product_line_override: str | None,
+    sha256: bytes | None,
+) -> PreparedTemplate:
+    """Worker task: prepare_template() with the worker's matcher and parse cache."""
+    try:
+        return prepare_template(
+            file_bytes,
+            filename,
+            _worker_section_matcher,
+            product_line_override=product_line_override,
+            sha256=sha256,
+            parse_cache=_worker_parse_cache,
+        )
+    except MemoryError:
+        raise ValueError("Document exceeds the parse memory limit") from None
+
+
+def _extract_section(
+    source: bytes | memoryview | _SharedSource,
+    seqn: int,
+    parsed: Optional[ParsedDocument],
+    lite: bool,
+) -> tuple[bytes | None, ParsedDocument]:
+    """
+    Worker task: build one section's .docx, parsing the source first if no
+    ranges were given. Returns the document (None if the section does not
+    exist) and the ranges used, for the caller to cache.
+    """
+    try:
+        with _source_view(source) as source_bytes:
+            if parsed is None:
+                parsed = parse_document(BytesIO(source_bytes), with_text=False)
+            return extract_section_docx(source_bytes, seqn, parsed, lite=lite), parsed
+    except MemoryError:
+        raise ValueError("Document exceeds the parse memory limit") from None
+
+
+def _stream_section(
+    source_bytes: bytes | memoryview,
+    seqn: int,
+    parsed: Optional[ParsedDocument],
+    lite: bool,
+) -> tuple[PackageStream | None, ParsedDocument]:
+    """In-process task: as _extract_section(), but returns the section as a PackageStream."""
+    if parsed is None:
+        parsed = parse_document(BytesIO(source_bytes), with_text=False)
+    return stream_section_docx(source_bytes, seqn, parsed, lite=lite), parsed
+
+
+def _build_sections_zip(
+    source: bytes | memoryview | _SharedSource,
+    filenames: dict[int, str],
+    parsed: Optional[ParsedDocument],
+    lite: bool,
+) -> tuple[bytes, ParsedDocument]:
+    """
+    Worker task: build a zip of the given sections, each stored under its
+    filename, parsing the source first if no ranges were given. Returns the
+    zip and the ranges used, for the caller to cache.
+    """
+    try:
+        with _source_view(source) as source_bytes:
+            if parsed is None:
+                parsed = parse_document(BytesIO(source_bytes), with_text=False)
+            return _zip_sections(source_bytes, filenames, parsed, lite), parsed
+    except MemoryError:
+        raise ValueError("Document exceeds the parse memory limit") from None
+
+
+def _zip_sections(
+    source_bytes: bytes | memoryview,
+    filenames: dict[int, str],
+    parsed: ParsedDocument,
+    lite: bool,
+) -> bytes:
+    """The sections in filenames, zipped into one bytes object."""
+    sections = extract_all_sections(source_bytes, parsed, seqns=filenames, lite=lite)
+    members = ((filenames[seqn], stream) for seqn, stream in sections)
+    return b"".join(iter_stored_zip(members))
+
+
+class ParsePool:
+    """Bounded process pool for parsing and extraction with per-task limits."""
+
+    def __init__(
+        self,
+        section_types: list[tuple[int, str]],
+        *,
+        parse_cache_dir: str | None = None,
+        max_workers: int = 2,
+        max_queue: int = 8,
+        task_timeout: float = 60.0,
+        memory_limit_mb: int = 1024,
+        max_tasks_per_child: int = 50,
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.task_timeout = task_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_tasks_per_child = max_tasks_per_child
+        self._initargs = (section_types, parse_cache_dir, memory_limit_mb)
+        self._slots = threading.BoundedSemaphore(max(max_workers, 1) + max_queue)
+        self._context = multiprocessing.get_context("spawn")
+        self._closed = False
+        # Idle workers; None stands for one not started yet (or replaced),
+        # started when a task needs it
+        self._idle: queue.SimpleQueue[_Worker | None] | None = None
+        if max_workers > 0:
+            self._idle = queue.SimpleQueue()
+            for _ in range(max_workers):
+                self._idle.put(None)
+        else:
+            _init_worker(section_types, parse_cache_dir, 0)
+
+    def _checkout(self) -> _Worker:
+        """Take an idle worker, starting one if needed; ParsePoolBusy if none frees up in time."""
+        try:
+            worker = self._idle.get(timeout=self.task_timeout)
+        except queue.Empty:
+            raise ParsePoolBusy("Timed out waiting for a parse worker") from None
+        if worker is not None and worker.process.is_alive():
+            return worker
+        if worker is not None:
+            worker.kill()
+        try:
+            return _Worker(self._context, self._initargs)
+        except BaseException:
+            self._idle.put(None)
+            raise
+
+    def _checkin(self, worker: _Worker) -> None:
+        """Return a worker after a task, replacing it once it has run max_tasks_per_child."""
+        worker.tasks += 1
+        if self._closed or (self.max_tasks_per_child and worker.tasks >= self.max_tasks_per_child):
+            worker.stop()
+            worker = None
+        self._idle.put(worker)
+
+    def _replace(self, worker: _Worker) -> None:
+        """Kill a worker (timed out or broken); a new one starts for the next task."""
+        worker.kill()
+        self._idle.put(None)
+
+    def _call(self, worker: _Worker, fn: Callable[..., T], args: tuple) -> T:
+        """Run one task on worker, timing it from the worker's start message."""
+        conn = worker.conn
+        started = False
+        outcome = None
+        try:
+            conn.send((fn, args))
+            if conn.poll(self.task_timeout):
+                started = conn.recv() == "started"
+                if conn.poll(self.task_timeout):
+                    outcome = conn.recv()
+        except (EOFError, OSError):
+            self._replace(worker)
+            raise ParsePoolBusy("A parse worker stopped and is being replaced") from None
+        except BaseException:  # e.g. arguments that cannot be pickled
+            self._replace(worker)
+            raise
+        if outcome is None:
+            self._replace(worker)
+            if not started:
+                raise ParsePoolBusy("Timed out waiting for a parse worker to start")
+            raise ParseTimeout(f"Parsing took longer than {self.task_timeout:g} seconds")
+        self._checkin(worker)
+        failed, value = outcome
+        if failed:
+            raise value
+        return value
+
+    @property
+    def in_process(self) -> bool:
+        """True if tasks run in the calling thread (max_workers = 0)."""
+        return self._idle is None
+
+    @contextmanager
+    def _shared(self, source_bytes: bytes | memoryview) -> Iterator[bytes | memoryview | _SharedSource]:
+        """
+        A document as a task argument: as is in-process, else copied once
+        into a shared memory segment that is removed after the task.
+        """
+        if self._idle is None:
+            yield source_bytes
+            return
+        size = len(source_bytes)
+        segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            segment.buf[:size] = source_bytes
+            yield _SharedSource(segment.name, size)
+        finally:
+            segment.close()
+            segment.unlink()
+
+    def run(self, fn: Callable[..., T], *args) -> T:
+        """
+        Run fn(*args) in a worker and return its result.
+
+        The timeout applies twice: to waiting for a free worker, and to the
+        task itself from the moment the worker starts it.
+
+        Raises:
+            ParsePoolBusy: The pool is at capacity, no worker became free
+                           within the timeout, or the worker died while
+                           running the task.
+            ParseTimeout: The task itself ran past the timeout (its worker
+                          was killed).
+            RuntimeError: The pool has been shut down.
+            Whatever fn raises (ValueError for unreadable documents).
+        """
+        if self._closed:
+            raise RuntimeError("ParsePool has been shut down")
+        if not self._slots.acquire(blocking=False):
+            raise ParsePoolBusy("All parse workers are busy")
+        try:
+            if self._idle is None:
+                return fn(*args)
+            return self._call(self._checkout(), fn, args)
+        finally:
+            self._slots.release()
+
+    def prepare_template(
+        self,
+        file_bytes: bytes,
+        filename: str,
+        product_line_override: str | None = None,
+        sha256: bytes | None = None,
+    ) -> PreparedTemplate:
+        """prepare_template() in a worker, with the section types the pool was built with."""
+        return self.run(_prepare, file_bytes, filename, product_line_override, sha256)
+
+    def extract_section_docx(
+        self,
+        source_bytes: bytes | memoryview,
+        seqn: int,
+        parsed: Optional[ParsedDocument] = None,
+        *,
+        lite: bool = False,
+    ) -> tuple[bytes | None, ParsedDocument]:
+        """
+        extract_section_docx() in a worker; also returns the section ranges
+        (parsed here if not given). The document is None if seqn is absent.
+        """
+        with self._shared(source_bytes) as source:
+            return self.run(_extract_section, source, seqn, parsed, lite)
+
+    def stream_section_docx(
+        self,
+        source_bytes: bytes | memoryview,
+        seqn: int,
+        parsed: Optional[ParsedDocument] = None,
+        *,
+        lite: bool = False,
+    ) -> tuple[PackageStream | None, ParsedDocument]:
+        """
+        stream_section_docx() under the pool's admission limit; also returns
+        the section ranges. In-process pools only: a PackageStream reads
+        from the source buffer and cannot leave the process it was built in.
+        """
+        if not self.in_process:
+            raise RuntimeError("stream_section_docx() needs an in-process pool (max_workers = 0)")
+        return self.run(_stream_section, source_bytes, seqn, parsed, lite)
+
+    def build_sections_zip(
+        self,
+        source_bytes: bytes | memoryview,
+        filenames: dict[int, str],
+        parsed: Optional[ParsedDocument] = None,
+        *,
+        lite: bool = False,
+    ) -> tuple[bytes, ParsedDocument]:
+        """
+        Zip of the sections in filenames (seqn -> member name), built in a
+        worker; also returns the section ranges (parsed here if not given).
+        """
+        with self._shared(source_bytes) as source:
+            return self.run(_build_sections_zip, source, filenames, parsed, lite)
+
+    def shutdown(self) -> None:
+        """Stop the idle workers; busy ones stop when their task ends. No new tasks are accepted."""
+        self._closed = True
+        if self._idle is None:
+            return
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if worker is not None:
+                worker.stop()
@@ -1,6 +1,14 @@
-# parser.py - v1.2 - 2026-02-06
+# parser.py - v1.9 - 2026-10-17
 # SQM DOCX Parser: extract section headings and content from Word documents
 # Handles paragraphs, table-based headings, trailing table headings, and TOC-driven validation
+# v1.3: parse_docx_sections streams word/document.xml instead of building a python-docx Document
+# v1.4: single parse pass produces a ParsedDocument shared by loading, validation and extraction
+# v1.5: heading detector reads only the first/last top-level table row and stops at the length limit
+# v1.6: section extraction rewrites only word/document.xml and copies all other zip entries verbatim
+# v1.7: extracted sections drop images/relationships they no longer use; optional image-free "lite" output
+# v1.8: extract_all_sections slices every section out of one parsed tree
+# v1.9: heading detector finds rows and cells wrapped in content controls (w:sdt) or w:customXml
+# v1.10: a row whose only cell holds a nested table is not a single-cell row (as before v1.5)
 
 """
 SQM DOCX Parser Module
@@ -10,13 +18,23 @@ Handles both standalone paragraphs and text within table cells.
 """
 
 import re
-from dataclasses import dataclass
-from io import BytesIO
-from typing import Optional, BinaryIO
+import zipfile
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Iterable, Iterator, Optional, BinaryIO
 from pathlib import Path
 
-from docx import Document
 from docx.oxml.ns import qn
+from lxml import etree
+
+from listldr.docx_package import (
+    OFFICE_RELS_NS,
+    PackageReader,
+    PackageStream,
+    main_document_part,
+    prune_package,
+    related_parts,
+)
 
 
 @dataclass
@@ -27,28 +45,209 @@ class Section:
     content: str   # Extracted plain text content
 
 
+@dataclass
+class SectionSpan:
+    """Location of a section within the document body (indices into <w:body> children)."""
+    sequence: int              # 0 = cover page, 1+ = numbered sections
+    heading: str               # The heading text ("Cover Page" for section 0)
+    start: int                 # First body element of the section (inclusive)
+    end: int                   # One past the last body element (exclusive)
+    heading_index: Optional[int] = None  # Body element holding the heading (None for cover page)
+    trailing: bool = False     # Heading sat in the last row of the previous section's table
+
+
+@dataclass
+class ParsedDocument:
+    """
+    Result of a single heading-detection pass over a document body.
+
+    Holds the element range of every section plus, when parsed with text,
+    the plain-text lines of each body element. Section objects, their
+    content strings and the cover-page TOC are only assembled on first use.
+    """
+    spans: list[SectionSpan]
+    element_count: int
+    element_lines: Optional[list[list[str]]] = field(default=None, repr=False)
+
+    @cached_property
+    def sections(self) -> list[Section]:
+        """Sections in document order, with content joined from element text."""
+        if self.element_lines is None:
+            raise ValueError("Document was parsed without text; sections are unavailable")
+        return [
+            Section(
+                sequence=span.sequence,
+                heading=span.heading,
+                content='\n'.join(
+                    line
+                    for lines in self.element_lines[span.start:span.end]
+                    for line in lines
+                ),
+            )
+            for span in self.spans
+        ]
+
+    @cached_property
+    def toc_entries(self) -> list[tuple[int, str]]:
+        """TOC entries found on the cover page (see extract_toc_entries)."""
+        return extract_toc_entries(self.sections)
+
+    def to_dict(self) -> dict:
+        """Plain JSON-serializable form (see ParseCache)."""
+        return {
+            "element_count": self.element_count,
+            "spans": [
+                [s.sequence, s.heading, s.start, s.end, s.heading_index, s.trailing]
+                for s in self.spans
+            ],
+            "element_lines": self.element_lines,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ParsedDocument":
+        """Rebuild a ParsedDocument from to_dict() output."""
+        return cls(
+            spans=[SectionSpan(*fields) for fields in data["spans"]],
+            element_count=data["element_count"],
+            element_lines=data.get("element_lines"),
+        )
+
+    @classmethod
+    def from_ranges(
+        cls,
+        ranges: Iterable[tuple[int, int, int]],
+        element_count: int,
+    ) -> "ParsedDocument":
+        """
+        Rebuild a text-less ParsedDocument from stored (sequence, start, end)
+        ranges, in document order. Enough for extraction; headings are blank.
+        """
+        return cls(
+            spans=[SectionSpan(seqn, '', start, end) for seqn, start, end in ranges],
+            element_count=element_count,
+        )
+
+    def span_for(self, seqn: int) -> Optional[SectionSpan]:
+        """
+        Return the span for a section sequence number, or None.
+
+        If a number occurs more than once the last occurrence wins, matching
+        how extraction has always resolved duplicate headings.
+        """
+        for span in reversed(self.spans):
+            if span.sequence == seqn:
+                return span
+        return None
+
+
 # Heading pattern: digit + separator (dash/en-dash) + title
 # Must be short (<80 chars) to avoid matching body text
 HEADING_PATTERN = re.compile(r'^(\d)\s*[–\-]\s*(.+)$')
+HEADING_MAX_LEN = 80
+
+# Version of the parse output (section boundaries, headings, text). Bump it
+# whenever a change can alter that output: cached parse results are keyed on it.
+PARSER_VERSION = "1.7"
 
 # Name of the first expected section heading (configurable for future use)
 FIRST_SECTION_HEADING = "Principal Characteristics"
 
+_W_BODY = qn('w:body')
+_W_P = qn('w:p')
+_W_TBL = qn('w:tbl')
+_W_TR = qn('w:tr')
+_W_TC = qn('w:tc')
+_W_T = qn('w:t')
+
+# Content controls and custom XML markup can wrap table rows and cells;
+# what they wrap still belongs to the enclosing table or row
+_W_SDT = qn('w:sdt')
+_W_SDT_CONTENT = qn('w:sdtContent')
+_W_CUSTOM_XML = qn('w:customXml')
+
+# Image-bearing markup removed from "lite" extractions: DrawingML pictures
+# (a:blip) and VML images (v:imagedata), dropped together with the
+# w:drawing / w:pict / w:object that hosts them
+_VML_NS = 'urn:schemas-microsoft-com:vml'
+_MC_NS = 'http://schemas.openxmlformats.org/markup-compatibility/2006'
+_IMAGE_TAGS = (qn('a:blip'), '{%s}imagedata' % _VML_NS)
+_IMAGE_HOSTS = frozenset((qn('w:drawing'), qn('w:pict'), qn('w:object')))
+_MC_BRANCHES = frozenset(('{%s}Choice' % _MC_NS, '{%s}Fallback' % _MC_NS))
+_HEADER_FOOTER_RELS = (OFFICE_RELS_NS + '/header', OFFICE_RELS_NS + '/footer')
+
 
 def _get_element_text(element) -> str:
     """Extract all text from an XML element."""
-    texts = element.findall('.//' + qn('w:t'))
-    return ''.join(t.text or '' for t in texts)
+    return ''.join(t.text or '' for t in element.iter(_W_T))
 
 
 def _is_table(element) -> bool:
     """Check if element is a table."""
-    return element.tag.split('}')[-1] == 'tbl'
+    return element.tag == _W_TBL
 
 
 def _is_paragraph(element) -> bool:
     """Check if element is a paragraph."""
-    return element.tag.split('}')[-1] == 'p'
+    return element.tag == _W_P
+
+
+def _short_text(element) -> Optional[str]:
+    """
+    Return the element's stripped text if it is shorter than HEADING_MAX_LEN.
+
+    Reads <w:t> runs in document order and gives up (returns None) as soon
+    as the stripped text reaches the limit, so long body paragraphs and
+    cells are never read in full.
+    """
+    text = ''
+    for t in element.iter(_W_T):
+        if t.text:
+            text += t.text
+            if len(text.strip()) >= HEADING_MAX_LEN:
+                return None
+    return text.strip()
+
+
+def _match_heading(element) -> Optional[tuple[int, str]]:
+    """Return (section_num, heading_title) if the element's short text is a heading."""
+    text = _short_text(element)
+    if text:
+        match = HEADING_PATTERN.match(text)
+        if match:
+            return int(match.group(1)), match.group(2).strip()
+    return None
+
+
+def _iter_children(parent, tag, reverse: bool = False) -> Iterator:
+    """
+    Yield parent's children with the given tag, looking through w:sdt and
+    w:customXml wrappers but never into any other element (e.g. a nested
+    table). reverse=True yields them last first.
+    """
+    for child in parent.iterchildren(reversed=reverse):
+        if child.tag == tag:
+            yield child
+        elif child.tag == _W_SDT:
+            content = child.find(_W_SDT_CONTENT)
+            if content is not None:
+                yield from _iter_children(content, tag, reverse)
+        elif child.tag == _W_CUSTOM_XML:
+            yield from _iter_children(child, tag, reverse)
+
+
+def _single_cell(row):
+    """
+    Return the row's only cell, or None if it has zero or several. Cells of
+    tables nested in the row count too, so a cell holding a table is not a
+    single cell.
+    """
+    cells = _iter_children(row, _W_TC)
+    cell = next(cells, None)
+    if cell is None or next(cells, None) is not None:
+        return None
+    if next(cell.iterdescendants(_W_TC), None) is not None:
+        return None
+    return cell
 
 
 def _find_heading_in_element(element) -> Optional[tuple[int, str, bool]]:
@@ -62,136 +261,198 @@ def _find_heading_in_element(element) -> Optional[tuple[int, str, bool]]:
     This stricter table check avoids false positives in multi-column tables
     (e.g., price summary tables with section references).
 
+    Only the table's own (top-level) first and last rows are visited, via
+    child navigation that looks through w:sdt / w:customXml wrappers, so
+    the cost does not grow with table size and rows of nested tables are
+    never considered.
+
     Returns (section_num, heading_title, is_trailing) or None.
     is_trailing is True when the heading was found in the last row of a table
     (i.e. appended to the end of a preceding content table).
     """
     if _is_paragraph(element):
-        text = _get_element_text(element).strip()
-        if len(text) < 80:
-            match = HEADING_PATTERN.match(text)
-            if match:
-                return int(match.group(1)), match.group(2).strip(), False
+        match = _match_heading(element)
+        if match:
+            return match[0], match[1], False
 
     elif _is_table(element):
-        rows = element.findall('.//' + qn('w:tr'))
-        if rows:
+        first_row = next(_iter_children(element, _W_TR), None)
+        if first_row is not None:
             # Check first row - must have exactly 1 cell for it to be a heading
-            first_row_cells = rows[0].findall('.//' + qn('w:tc'))
-            if len(first_row_cells) == 1:
-                text = _get_element_text(first_row_cells[0]).strip()
-                if len(text) < 80:
-                    match = HEADING_PATTERN.match(text)
-                    if match:
-                        return int(match.group(1)), match.group(2).strip(), False
+            cell = _single_cell(first_row)
+            if cell is not None:
+                match = _match_heading(cell)
+                if match:
+                    return match[0], match[1], False
 
             # Check last row (if different from first) - heading may be
             # appended to the bottom of a preceding content table
-            if len(rows) > 1:
-                last_row_cells = rows[-1].findall('.//' + qn('w:tc'))
-                if len(last_row_cells) == 1:
-                    text = _get_element_text(last_row_cells[0]).strip()
-                    if len(text) < 80:
-                        match = HEADING_PATTERN.match(text)
-                        if match:
-                            return int(match.group(1)), match.group(2).strip(), True
+            last_row = next(_iter_children(element, _W_TR, reverse=True))
+            if last_row is not first_row:
+                cell = _single_cell(last_row)
+                if cell is not None:
+                    match = _match_heading(cell)
+                    if match:
+                        return match[0], match[1], True
 
     return None
 
 
-def _extract_text_from_elements(elements: list) -> str:
-    """Extract plain text from a list of XML elements."""
+def _element_text_lines(elem) -> list[str]:
+    """Extract the non-empty plain-text lines contributed by one body element."""
     lines = []
-    for elem in elements:
-        if _is_paragraph(elem):
-            text = _get_element_text(elem).strip()
+    if _is_paragraph(elem):
+        text = _get_element_text(elem).strip()
+        if text:
+            lines.append(text)
+    elif _is_table(elem):
+        # Extract text from all cells
+        for cell in elem.iter(_W_TC):
+            text = _get_element_text(cell).strip()
             if text:
                 lines.append(text)
-        elif _is_table(elem):
-            # Extract text from all cells
-            for cell in elem.findall('.//' + qn('w:tc')):
-                text = _get_element_text(cell).strip()
-                if text:
-                    lines.append(text)
-    return '\n'.join(lines)
+    return lines
 
 
-def parse_docx_sections(source: str | Path | BinaryIO) -> list[Section]:
+def _xml_parser() -> etree.XMLParser:
     """
-    Parse a docx file and extract all sections.
+    Build a parser with the options python-docx uses for package parts.
 
-    Args:
-        source: File path (str or Path) or file-like object (BinaryIO).
+    A fresh instance per call: lxml serializes threads sharing one parser.
+    """
+    return etree.XMLParser(remove_blank_text=True, resolve_entities=False)
 
-    Returns a list of Section objects:
-    - Section 0 is always the cover page (content before first heading)
-    - Sections 1+ are numbered sections based on headings found
+
+def _iter_body_elements(source: str | Path | BinaryIO) -> Iterator:
+    """
+    Yield the direct children of <w:body> one at a time.
+
+    Opens the .docx as a zip and inflates only the main document part, so
+    images, headers, styles and every other package part are never read.
+    The part is parsed in a single libxml2 call (an iterparse event loop
+    measured roughly twice as slow on our templates) and each body child is
+    cleared and detached as soon as the caller asks for the next one --
+    callers must take what they need before advancing.
 
     Raises:
-        ValueError: If document cannot be parsed
+        ValueError: If the source is not a readable .docx package
     """
-    doc = Document(source)
-    body = doc.element.body
-    elements = list(body)
+    try:
+        with zipfile.ZipFile(source) as zf:
+            with zf.open(main_document_part(zf)) as stream:
+                root = etree.parse(stream, _xml_parser()).getroot()
+    except (zipfile.BadZipFile, KeyError, etree.XMLSyntaxError) as e:
+        raise ValueError(f"Cannot read document body: {e}") from e
+
+    body = root.find(_W_BODY)
+    if body is None:
+        raise ValueError("Cannot read document body: no <w:body> element")
+
+    while len(body):
+        elem = body[0]
+        if isinstance(elem.tag, str):  # skip comments / processing instructions
+            yield elem
+            elem.clear()
+        del body[0]
+
+
+def _locate_sections(elements: Iterable, with_text: bool) -> ParsedDocument:
+    """
+    Walk body elements once and locate every section.
 
-    sections = []
-    current_elements = []
-    current_heading = ""
+    Heading detection runs exactly once per body element. Section 0 is the
+    cover page (content before the first heading); a heading found in the
+    last row of a table leaves that table with the previous section.
+    """
+    spans: list[SectionSpan] = []
+    element_lines: Optional[list[list[str]]] = [] if with_text else None
+    start = 0
     current_seq = 0
+    current_heading = ""
+    current_heading_index: Optional[int] = None
+    current_trailing = False
     found_first_heading = False
+    count = 0
 
-    for elem in elements:
-        heading_match = _find_heading_in_element(elem)
-
-        if heading_match:
-            section_num, heading_title, is_trailing = heading_match
-
-            if is_trailing:
-                # Heading found in last row of a content table - the table
-                # belongs to the current (previous) section, not the new one
-                current_elements.append(elem)
-
-            if not found_first_heading:
-                # Everything before first heading is cover page
-                if current_elements:
-                    sections.append(Section(
-                        sequence=0,
-                        heading="Cover Page",
-                        content=_extract_text_from_elements(current_elements)
-                    ))
-                found_first_heading = True
-            else:
-                # Save previous section
-                sections.append(Section(
-                    sequence=current_seq,
-                    heading=current_heading,
-                    content=_extract_text_from_elements(current_elements)
-                ))
-
-            # Start new section
-            current_seq = section_num
-            current_heading = heading_title
-            current_elements = [] if is_trailing else [elem]
+    for index, elem in enumerate(elements):
+        count = index + 1
+        if element_lines is not None:
+            element_lines.append(_element_text_lines(elem))
 
+        heading_match = _find_heading_in_element(elem)
+        if not heading_match:
+            continue
+
+        section_num, heading_title, is_trailing = heading_match
+        # A trailing heading's table belongs to the current (previous) section
+        split = index + 1 if is_trailing else index
+
+        if not found_first_heading:
+            # Everything before first heading is cover page
+            if split > start:
+                spans.append(SectionSpan(0, "Cover Page", start, split))
+            found_first_heading = True
         else:
-            current_elements.append(elem)
+            spans.append(SectionSpan(
+                current_seq, current_heading, start, split,
+                current_heading_index, current_trailing,
+            ))
+
+        # Start new section
+        start = split
+        current_seq = section_num
+        current_heading = heading_title
+        current_heading_index = index
+        current_trailing = is_trailing
 
     # Don't forget the last section
-    if found_first_heading and current_elements:
-        sections.append(Section(
-            sequence=current_seq,
-            heading=current_heading,
-            content=_extract_text_from_elements(current_elements)
-        ))
-    elif not found_first_heading and current_elements:
-        # No headings found at all - treat entire doc as cover page
-        sections.append(Section(
-            sequence=0,
-            heading="Cover Page",
-            content=_extract_text_from_elements(current_elements)
-        ))
-
-    return sections
+    if start < count:
+        if found_first_heading:
+            spans.append(SectionSpan(
+                current_seq, current_heading, start, count,
+                current_heading_index, current_trailing,
+            ))
+        else:
+            # No headings found at all - treat entire doc as cover page
+            spans.append(SectionSpan(0, "Cover Page", start, count))
+
+    return ParsedDocument(spans=spans, element_count=count, element_lines=element_lines)
+
+
+def parse_document(
+    source: str | Path | BinaryIO,
+    *,
+    with_text: bool = True,
+) -> ParsedDocument:
+    """
+    Parse a docx file into a ParsedDocument in a single pass over the body.
+
+    Args:
+        source: File path (str or Path) or file-like object (BinaryIO).
+        with_text: Also collect element text (needed for sections/TOC).
+                   Extraction only needs the ranges and can skip it.
+
+    Raises:
+        ValueError: If document cannot be parsed
+    """
+    return _locate_sections(_iter_body_elements(source), with_text)
+
+
+def parse_docx_sections(source: str | Path | BinaryIO) -> list[Section]:
+    """
+    Parse a docx file and extract all sections.
+
+    Args:
+        source: File path (str or Path) or file-like object (BinaryIO).
+
+    Returns a list of Section objects:
+    - Section 0 is always the cover page (content before first heading)
+    - Sections 1+ are numbered sections based on headings found
+
+    Raises:
+        ValueError: If document cannot be parsed
+    """
+    return parse_document(source).sections
 
 
 # Pattern for finding TOC entries anywhere in text (not just at line start).
@@ -228,83 +489,177 @@ def extract_toc_entries(sections: list[Section]) -> list[tuple[int, str]]:
     return entries
 
 
-def _map_elements_to_sections(body) -> dict[int, list]:
+def _strip_images(root) -> None:
+    """Remove every picture from a part's XML (see _IMAGE_TAGS)."""
+    for image in list(root.iter(*_IMAGE_TAGS)):
+        host = next((a for a in image.iterancestors() if a.tag in _IMAGE_HOSTS), None)
+        if host is None:
+            continue
+        parent = host.getparent()
+        if parent is None:
+            continue  # already removed along with an earlier image
+        if parent.tag in _MC_BRANCHES and parent.getparent() is not None:
+            # Choice and Fallback are alternative renderings of the same
+            # picture; drop the whole mc:AlternateContent
+            host = parent.getparent()
+            parent = host.getparent()
+        parent.remove(host)
+
+
+class _MainPart:
+    """The parsed main document part of a package, ready for section slicing."""
+
+    def __init__(
+        self,
+        source_bytes: bytes | memoryview,
+        parsed: Optional[ParsedDocument],
+        lite: bool,
+    ):
+        try:
+            self.package = PackageReader(source_bytes)
+            self.name = main_document_part(self.package)
+            self.root = etree.fromstring(self.package.read(self.name), _xml_parser())
+        except (KeyError, etree.XMLSyntaxError) as e:
+            raise ValueError(f"Cannot read document body: {e}") from e
+
+        self.body = self.root.find(_W_BODY)
+        if self.body is None:
+            raise ValueError("Cannot read document body: no <w:body> element")
+
+        self.elements = [e for e in self.body if isinstance(e.tag, str)]
+        if parsed is None:
+            parsed = _locate_sections(self.elements, with_text=False)
+        elif len(self.elements) != parsed.element_count:
+            raise ValueError(
+                f"Parsed document has {parsed.element_count} body elements, "
+                f"source has {len(self.elements)}"
+            )
+        self.parsed = parsed
+
+        # Other rewritten parts (image-free headers/footers in lite mode)
+        self.extra_parts: dict[str, etree._Element] = {}
+        if lite:
+            _strip_images(self.root)
+            for name in related_parts(self.package, self.name, _HEADER_FOOTER_RELS):
+                try:
+                    header_root = etree.fromstring(self.package.read(name), _xml_parser())
+                except (KeyError, etree.XMLSyntaxError):
+                    continue  # dangling or unreadable: leave it as it is
+                _strip_images(header_root)
+                self.extra_parts[name] = header_root
+
+    def section_stream(self, span: SectionSpan) -> PackageStream:
+        """
+        Package holding only the span's body elements.
+
+        The body is refilled from the original element list each time, so
+        one parsed tree serves any number of sections.
+        """
+        self.body[:] = self.elements[span.start:span.end]
+        replace, drop = prune_package(self.package, {self.name: self.root, **self.extra_parts})
+        return PackageStream(self.package, replace=replace, drop=drop)
+
+
+def stream_section_docx(
+    source_bytes: bytes | memoryview,
+    target_seqn: int,
+    parsed: Optional[ParsedDocument] = None,
+    *,
+    lite: bool = False,
+) -> Optional[PackageStream]:
     """
-    Walk body elements and build a map of section sequence -> list of XML elements.
+    Build a .docx containing only the target section, as a PackageStream.
 
-    Uses the same heading detection and trailing-heading logic as parse_docx_sections().
-    """
-    elements = list(body)
-    section_elements: dict[int, list] = {}
-    current_elements: list = []
-    current_seq = 0
-    found_first_heading = False
-
-    for elem in elements:
-        heading_match = _find_heading_in_element(elem)
+    Clone-and-strip at the zip level: only the main document part is parsed
+    and rewritten (every body element outside the section is removed).
+    Relationships the kept elements no longer reference are pruned, and the
+    images, headers and footers they pointed at are left out of the package.
+    All other entries -- styles, fonts, theme and the images still in use --
+    are copied byte-for-byte without being inflated or recompressed, so
+    formatting is preserved exactly.
 
-        if heading_match:
-            section_num, _heading_title, is_trailing = heading_match
+    Args:
+        source_bytes: Raw bytes of the source .docx file.
+        target_seqn: Section sequence number to keep (0 = cover page).
+        parsed: Section ranges for source_bytes from parse_document(); if
+                omitted they are located on the tree parsed here.
+        lite: Also drop every image from the section body and its headers
+              and footers (for previews).
 
-            if is_trailing:
-                current_elements.append(elem)
+    Returns:
+        A PackageStream (iterate for chunks, .size for the total length),
+        or None if the target section was not found in the document.
 
-            if not found_first_heading:
-                if current_elements:
-                    section_elements[0] = list(current_elements)
-                found_first_heading = True
-            else:
-                section_elements[current_seq] = list(current_elements)
+    Raises:
+        ValueError: If the source cannot be read or parsed does not describe it
+    """
+    main = _MainPart(source_bytes, parsed, lite)
+    span = main.parsed.span_for(target_seqn)
+    if span is None:
+        return None
+    return main.section_stream(span)
 
-            current_seq = section_num
-            current_elements = [] if is_trailing else [elem]
-        else:
-            current_elements.append(elem)
 
-    # Last section
-    if found_first_heading and current_elements:
-        section_elements[current_seq] = list(current_elements)
-    elif not found_first_heading and current_elements:
-        section_elements[0] = list(current_elements)
+def extract_section_docx(
+    source_bytes: bytes | memoryview,
+    target_seqn: int,
+    parsed: Optional[ParsedDocument] = None,
+    *,
+    lite: bool = False,
+) -> bytes | None:
+    """
+    Return the bytes of a .docx containing only the target section.
 
-    return section_elements
+    See stream_section_docx(); this collects its output into one bytes object.
+    Returns None if the target section was not found in the document.
+    """
+    stream = stream_section_docx(source_bytes, target_seqn, parsed, lite=lite)
+    return stream.getvalue() if stream is not None else None
 
 
-def extract_section_docx(source_bytes: bytes, target_seqn: int) -> bytes | None:
+def extract_all_sections(
+    source_bytes: bytes | memoryview,
+    parsed: Optional[ParsedDocument] = None,
+    *,
+    seqns: Optional[Iterable[int]] = None,
+    lite: bool = False,
+) -> Iterator[tuple[int, PackageStream]]:
     """
-    Clone a .docx and strip all body content except the target section.
+    Build one .docx per section from a single parse of the source.
 
-    Uses the clone-and-strip approach: opens the full document (preserving
-    headers, footers, page layout, styles, fonts, images), then removes
-    every body element that does not belong to the requested section.
+    The package is read and word/document.xml parsed once, up front (so
+    errors surface before the first section is produced); each section is
+    then sliced out of the same tree on demand. Output is the same as
+    calling stream_section_docx() for every sequence number.
 
     Args:
         source_bytes: Raw bytes of the source .docx file.
-        target_seqn: Section sequence number to keep (0 = cover page).
+        parsed: Section ranges for source_bytes from parse_document(); if
+                omitted they are located on the tree parsed here.
+        seqns: Only produce these sequence numbers (default: all).
+        lite: Drop every image (see stream_section_docx()).
 
     Returns:
-        Bytes of the new .docx containing only the target section,
-        or None if the target section was not found in the document.
-    """
-    doc = Document(BytesIO(source_bytes))
-    body = doc.element.body
-
-    section_elements = _map_elements_to_sections(body)
+        An iterator of (sequence number, PackageStream) in document order,
+        one per distinct sequence number.
 
-    if target_seqn not in section_elements:
-        return None
+    Raises:
+        ValueError: If the source cannot be read or parsed does not describe it
+    """
+    main = _MainPart(source_bytes, parsed, lite)
+    wanted = set(seqns) if seqns is not None else None
 
-    # Build set of element ids to keep
-    keep = {id(e) for e in section_elements[target_seqn]}
+    # Duplicate sequence numbers resolve to the last occurrence, as in
+    # stream_section_docx()
+    order = list(dict.fromkeys(span.sequence for span in main.parsed.spans))
+    if wanted is not None:
+        order = [seqn for seqn in order if seqn in wanted]
 
-    # Remove all body elements not in the target section
-    for elem in list(body):
-        if id(elem) not in keep:
-            body.remove(elem)
+    def generate() -> Iterator[tuple[int, PackageStream]]:
+        for seqn in order:
+            yield seqn, main.section_stream(main.parsed.span_for(seqn))
 
-    output = BytesIO()
-    doc.save(output)
-    return output.getvalue()
+    return generate()
 
 
 # DEPRECATED: hardcoded expected sequences -- no longer used by validate_section_sequence().
@@ -317,14 +672,15 @@ EXPECTED_SEQUENCES = {
 
 
 def validate_section_sequence(
-    sections: list[Section],
+    sections: list[Section] | ParsedDocument,
     product_line_abbr: str
 ) -> tuple[bool, str]:
     """
     Validate parsed sections against the document's own cover page TOC.
 
     Derives the expected section list from TOC entries on the cover page,
-    then compares against the actual parsed section numbers.
+    then compares against the actual parsed section numbers. Accepts either
+    a Section list or a ParsedDocument (whose TOC is computed once and cached).
 
     The product_line_abbr parameter is kept for API compatibility but is
     no longer used internally.
@@ -332,11 +688,18 @@ def validate_section_sequence(
     Returns (is_valid, error_message).
     If valid, error_message is empty.
     """
+    if isinstance(sections, ParsedDocument):
+        toc_entries = sections.toc_entries
+        sections = sections.sections
+    else:
+        toc_entries = None
+
     if len(sections) < 2:
         return False, f"Too few sections: {len(sections)} (need at least 2)"
 
     # Extract TOC entries from cover page
-    toc_entries = extract_toc_entries(sections)
+    if toc_entries is None:
+        toc_entries = extract_toc_entries(sections)
 
     if not toc_entries:
         # No TOC found on cover page -- fall back to basic count check
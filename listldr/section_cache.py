@@ -0,0 +1,248 @@
+"""
+Section Document Cache
+
+Cache of extracted section documents (.docx bytes) for the API, so
+popular sections are served without being extracted again.
+
+Two tiers:
+- in-process LRU keyed by (blob_id, seqn, lite), bounded by the total size
+  of the documents it holds, not by entry count: entries are evicted least
+  recently used first until a new one fits, and a document larger than the
+  whole budget is not cached
+- optional on-disk files under a configurable directory, keyed by the
+  blob's SHA-256, shared by every process that points at the same
+  directory and kept across restarts; written atomically, served from an
+  open file (so eviction cannot cut a download short), and size-bounded
+  by evicting the least recently used files once a running total of the
+  directory's size goes over budget
+
+Blobs are immutable, so an entry never goes stale by itself; when a
+template is reloaded it points at a new blob and the old blob's in-memory
+entries are dropped (see check_template()). Files of old blobs age out of
+the disk tier.
+"""
+
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: evictions are not serialized between processes
+    fcntl = None
+
+from listldr.parser import PARSER_VERSION
+
+SectionKey = tuple[int, int, bool]   # (blob_id, seqn, lite)
+
+# Disk tier bookkeeping files in the cache directory: the lock serializing
+# writers and the running total of the bytes held in *.docx files
+_LOCK_FILE = ".evict.lock"
+_SIZE_FILE = ".size"
+
+# An eviction brings the directory down to this share of max_disk_bytes, so
+# the directory scan it needs runs once per many writes, not on each one
+_EVICT_TO = 0.9
+
+
+class SectionDocCache:
+    """Byte-budgeted in-process LRU of section .docx documents."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        cache_dir: str | Path | None = None,
+        max_disk_bytes: int = 0,
+    ):
+        self.max_bytes = max_bytes
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
+        self._entries: OrderedDict[SectionKey, bytes] = OrderedDict()
+        self._size = 0
+        self._template_blobs: dict[int, int] = {}
+        self._lock = threading.Lock()
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, blob_id: int, seqn: int, lite: bool = False) -> Optional[bytes]:
+        """Return the cached document, or None on a miss."""
+        key = (blob_id, seqn, lite)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, blob_id: int, seqn: int, lite: bool, data: bytes) -> None:
+        """Store a document, evicting the least recently used ones to stay within max_bytes."""
+        if len(data) > self.max_bytes:
+            return
+        key = (blob_id, seqn, lite)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            while self._size + len(data) > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self.evictions += 1
+            self._entries[key] = data
+            self._size += len(data)
+
+    def would_cache(self, size: int) -> bool:
+        """True if put() or put_file() would keep a document of this size."""
+        return size <= self.max_bytes or (self.cache_dir is not None and size <= self.max_disk_bytes)
+
+    def invalidate_blob(self, blob_id: int) -> int:
+        """Drop every entry of a blob. Returns the number of entries dropped."""
+        with self._lock:
+            keys = [key for key in self._entries if key[0] == blob_id]
+            for key in keys:
+                self._size -= len(self._entries.pop(key))
+            return len(keys)
+
+    def check_template(self, plsqt_id: int, blob_id: int) -> None:
+        """
+        Record a template's current blob; if it differs from the one last
+        seen for the template (it was reloaded, by this process or another),
+        drop the previous blob's entries.
+        """
+        with self._lock:
+            previous = self._template_blobs.get(plsqt_id)
+            self._template_blobs[plsqt_id] = blob_id
+        if previous is not None and previous != blob_id:
+            self.invalidate_blob(previous)
+
+    # -------------------------------------------------------------------------
+    # Disk tier
+    # -------------------------------------------------------------------------
+
+    def _path(self, sha256_hex: str, seqn: int, lite: bool) -> Path:
+        """On-disk location: <dir>/v<parser version>/<aa>/<sha256>_<seqn>[_lite].docx"""
+        name = f"{sha256_hex}_{seqn}{'_lite' if lite else ''}.docx"
+        return self.cache_dir / f"v{PARSER_VERSION}" / sha256_hex[:2] / name
+
+    def get_file(self, sha256_hex: str, seqn: int, lite: bool = False) -> Optional[tuple[BinaryIO, int]]:
+        """
+        Open the cached file for a section of the blob with this SHA-256 and
+        return it with its size, or None on a miss (or without a disk tier).
+        A hit marks the file as recently used. The caller reads and closes
+        the file; it stays readable if it is evicted meanwhile.
+        """
+        if self.cache_dir is None:
+            return None
+        path = self._path(sha256_hex, seqn, lite)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            self.disk_misses += 1
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass  # evicted since it was opened; the open file is still whole
+        self.disk_hits += 1
+        return file, os.fstat(file.fileno()).st_size
+
+    def put_file(self, sha256_hex: str, seqn: int, lite: bool, data: bytes) -> None:
+        """Write a document to the disk tier (if configured), evicting if that takes it over max_disk_bytes."""
+        if self.cache_dir is None or len(data) > self.max_disk_bytes:
+            return
+        path = self._path(sha256_hex, seqn, lite)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temp file in the same directory, then rename into place,
+        # so readers in any process never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            with self._locked():
+                try:
+                    replaced = path.stat().st_size
+                except FileNotFoundError:
+                    replaced = 0
+                os.replace(tmp_path, path)
+                total = self._read_total()
+                if total is None or total + len(data) - replaced > self.max_disk_bytes:
+                    total = self._evict_files()
+                else:
+                    total += len(data) - replaced
+                (self.cache_dir / _SIZE_FILE).write_text(str(total))
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the exclusive lock on <dir>/.evict.lock shared by all processes."""
+        with open(self.cache_dir / _LOCK_FILE, "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _read_total(self) -> Optional[int]:
+        """The recorded size of the directory's files, or None if not recorded yet."""
+        try:
+            return int((self.cache_dir / _SIZE_FILE).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _evict_files(self) -> int:
+        """
+        Measure the directory's files (all parser versions) and, if they hold
+        more than max_disk_bytes, delete the least recently used ones (by
+        mtime) until they hold at most _EVICT_TO of it. Returns the bytes
+        left; the caller holds the lock and records them.
+
+        A file being served is already open, so deleting it does not cut
+        the download short.
+        """
+        files: list[tuple[float, int, Path]] = []
+        total = 0
+        for path in self.cache_dir.glob("v*/*/*.docx"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        if total <= self.max_disk_bytes:
+            return total
+
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes * _EVICT_TO:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.disk_evictions += 1
+        return total
+
+    def stats(self) -> dict:
+        """Counters and current size, for logging."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_hits": self.disk_hits,
+                "disk_misses": self.disk_misses,
+                "disk_evictions": self.disk_evictions,
+            }
@@ -5,12 +5,20 @@ Shared core logic for loading a .docx template into the database.
 Called by both the batch CLI and the FastAPI endpoint.
 """
 
+import hashlib
 from io import BytesIO
 from pathlib import Path
 
-from listldr.db import SQMDatabase
-from listldr.models import TemplateLoadResult, SectionInfo
-from listldr.parser import parse_docx_sections, validate_section_sequence
+from listldr.db import SQMDatabase, SectionRow
+from listldr.models import PreparedTemplate, TemplateLoadResult, SectionInfo
+from listldr.parse_cache import ParseCache
+from listldr.parser import (
+    ParsedDocument,
+    extract_all_sections,
+    parse_document,
+    validate_section_sequence,
+)
+from listldr.text_utils import SectionTypeMatcher
 
 
 def load_template(
@@ -19,27 +27,38 @@ def load_template(
     db: SQMDatabase,
     country_id: int,
     currency_id: int,
-    section_types: list[tuple[int, str]],
+    section_types: list[tuple[int, str]] | SectionTypeMatcher,
     *,
     product_line_override: str | None = None,
     update_user: str = "SQM_loader",
     dry_run: bool = False,
     file_ref: str | None = None,
+    parse_cache: ParseCache | None = None,
+    skip_unchanged: bool = True,
 ) -> TemplateLoadResult:
     """
     Parse a .docx template and load it into the database.
 
+    Equivalent to prepare_template() followed by apply_template(), unless
+    the template already holds exactly this file (see unchanged_template()).
+    The file is hashed once, for both.
+
     Args:
         file_bytes: Raw bytes of the .docx file.
         filename: Original filename (e.g. "ECM AP 10 CHE.docx").
         db: An SQMDatabase instance with an open connection.
         country_id: Resolved country_id.
         currency_id: Resolved currency_id.
-        section_types: Pre-fetched list of (plsqtst_id, plsqtst_name).
+        section_types: Pre-fetched list of (plsqtst_id, plsqtst_name), or a
+                       SectionTypeMatcher built from it.
         product_line_override: 3-char product line; if None, parsed from filename.
         update_user: Audit trail user name.
         dry_run: If True, parse and validate but skip database writes.
         file_ref: External file reference stored on the template row.
+        parse_cache: Optional ParseCache; unchanged files skip parsing.
+        skip_unchanged: If the template already stores this exact file with
+                        the same country, currency and product line, return
+                        at once with unchanged=True (nothing parsed or written).
 
     Returns:
         TemplateLoadResult with details of the loaded template.
@@ -48,30 +67,133 @@ def load_template(
         ValueError: On validation failures (bad filename, unknown product line,
                      section sequence mismatch, unmatched section type).
     """
+    sha256 = hashlib.sha256(file_bytes).digest()
+    if skip_unchanged:
+        stem = Path(filename).stem
+        unchanged = unchanged_template(
+            file_bytes,
+            filename,
+            db.get_template_fingerprints(stem).get(stem),
+            country_id,
+            currency_id,
+            product_line_override=product_line_override,
+            sha256=sha256,
+        )
+        if unchanged is not None:
+            return unchanged
+
+    prepared = prepare_template(
+        file_bytes,
+        filename,
+        section_types,
+        product_line_override=product_line_override,
+        parse_cache=parse_cache,
+        sha256=sha256,
+    )
+    return apply_template(
+        prepared,
+        db,
+        country_id,
+        currency_id,
+        update_user=update_user,
+        dry_run=dry_run,
+        file_ref=file_ref,
+    )
+
+
+def unchanged_template(
+    file_bytes: bytes,
+    filename: str,
+    fingerprint: dict | None,
+    country_id: int,
+    currency_id: int,
+    *,
+    product_line_override: str | None = None,
+    sha256: bytes | None = None,
+) -> TemplateLoadResult | None:
+    """
+    Result for a file the database already holds as is, or None.
+
+    fingerprint is the template's entry from
+    SQMDatabase.get_template_fingerprints() (None if there is no such
+    template). The file counts as unchanged when its SHA-256 equals that of
+    the template's current blob and it would be stored with the same
+    country, currency and product line -- reloading it would rewrite the
+    same rows. The returned result has unchanged=True and no sections.
+
+    sha256 is the file's digest, if the caller already has it.
+    """
+    if fingerprint is None:
+        return None
+    stem = Path(filename).stem
+    product_line_abbr = product_line_override or stem[:3]
+    if sha256 is None:
+        sha256 = hashlib.sha256(file_bytes).digest()
+    if (
+        fingerprint["blob_sha256"] != sha256.hex()
+        or fingerprint["country_id"] != country_id
+        or fingerprint["currency_id"] != currency_id
+        or fingerprint["product_line_abbr"] != product_line_abbr
+    ):
+        return None
+    return TemplateLoadResult(
+        plsqt_id=fingerprint["plsqt_id"],
+        template_name=stem,
+        product_line_abbr=product_line_abbr,
+        section_count=fingerprint["plsqt_section_count"],
+        is_new=False,
+        blob_id=fingerprint["current_blob_id"],
+        sections=[],
+        unchanged=True,
+    )
+
+
+def prepare_template(
+    file_bytes: bytes,
+    filename: str,
+    section_types: list[tuple[int, str]] | SectionTypeMatcher,
+    *,
+    product_line_override: str | None = None,
+    parse_cache: ParseCache | None = None,
+    sha256: bytes | None = None,
+) -> PreparedTemplate:
+    """
+    Parse, validate and match a .docx template without touching the database.
+
+    The CPU-bound half of load_template(): safe to run in a worker process
+    (arguments and result are picklable). sha256 is the file's digest, if
+    the caller already has it.
+
+    Raises:
+        ValueError: On validation failures (bad filename, section sequence
+                     mismatch, unmatched section type).
+    """
     stem = Path(filename).stem
 
-    # Resolve product line
+    # Resolve product line abbreviation (looked up in apply_template)
     product_line_abbr = product_line_override or (stem[:3] if len(stem) >= 3 else None)
     if not product_line_abbr or len(product_line_abbr) < 3:
         raise ValueError(f"Filename too short to extract product line: {stem}")
 
-    pl_info = db.lookup_product_line(product_line_abbr)
-    if not pl_info:
-        raise ValueError(f"Unknown product line abbreviation: '{product_line_abbr}'")
-    product_line_id, product_cat_id = pl_info
-
-    # Parse sections from document bytes
-    sections = parse_docx_sections(BytesIO(file_bytes))
+    # Parse sections from document bytes (single pass, shared with validation)
+    if sha256 is None:
+        sha256 = hashlib.sha256(file_bytes).digest()
+    if parse_cache is not None:
+        parsed = parse_cache.get_or_parse(file_bytes, sha256.hex())
+    else:
+        parsed = parse_document(BytesIO(file_bytes))
 
     # Validate section sequence against TOC
-    valid, error_msg = validate_section_sequence(sections, product_line_abbr)
+    valid, error_msg = validate_section_sequence(parsed, product_line_abbr)
     if not valid:
         raise ValueError(f"Section sequence validation failed: {error_msg}")
 
     # Match each section to a section type
+    if not isinstance(section_types, SectionTypeMatcher):
+        section_types = SectionTypeMatcher(section_types)
     section_infos: list[SectionInfo] = []
-    for sec in sections:
-        section_type_id = db.lookup_section_type_by_lcs(sec.heading, section_types)
+    for sec in parsed.sections:
+        section_type_id = section_types.match(sec.heading)
         if section_type_id is None:
             raise ValueError(f"No section type found for heading: '{sec.heading}'")
         section_infos.append(SectionInfo(
@@ -80,7 +202,46 @@ def load_template(
             section_type_id=section_type_id,
         ))
 
+    return PreparedTemplate(
+        file_bytes=file_bytes,
+        filename=filename,
+        template_name=stem,
+        product_line_abbr=product_line_abbr,
+        sha256=sha256,
+        parsed=parsed,
+        sections=section_infos,
+    )
+
+
+def apply_template(
+    prepared: PreparedTemplate,
+    db: SQMDatabase,
+    country_id: int,
+    currency_id: int,
+    *,
+    update_user: str = "SQM_loader",
+    dry_run: bool = False,
+    file_ref: str | None = None,
+) -> TemplateLoadResult:
+    """
+    Write a prepared template to the database (the caller commits).
+
+    See load_template() for the arguments. A load sets the template's
+    status to 'not started', so section documents are never pre-built
+    here: cli/materialize_sections.py builds them once it is approved.
+
+    Raises:
+        ValueError: If the product line is unknown.
+    """
+    stem = prepared.template_name
+    product_line_abbr = prepared.product_line_abbr
+    parsed = prepared.parsed
+    sections = parsed.sections
+    section_infos = prepared.sections
+
     if dry_run:
+        if not db.lookup_product_line(product_line_abbr):
+            raise ValueError(f"Unknown product line abbreviation: '{product_line_abbr}'")
         return TemplateLoadResult(
             plsqt_id=0,
             template_name=stem,
@@ -91,58 +252,39 @@ def load_template(
             sections=section_infos,
         )
 
-    # Store blob
-    blob_id = db.get_or_create_blob(file_bytes, filename)
-    file_ref = file_ref or filename
-
-    # Check for existing template
-    existing = db.get_template_by_name(stem)
-
-    if existing:
-        plsqt_id = existing['plsqt_id']
-        old_blob_id = existing['current_blob_id']
-        is_new = False
-
-        # Archive old blob if different
-        if old_blob_id and old_blob_id != blob_id:
-            db.archive_blob('template', plsqt_id, old_blob_id, replaced_by=update_user)
-
-        # Delete old sections and update template
-        db.delete_template_sections(plsqt_id)
-        db.update_template(
-            plsqt_id=plsqt_id,
-            country_id=country_id,
-            currency_id=currency_id,
-            product_cat_id=product_cat_id,
-            product_line_id=product_line_id,
-            blob_id=blob_id,
-            section_count=len(sections),
-            file_path=file_ref,
-            update_user=update_user,
-        )
-    else:
-        is_new = True
-        plsqt_id = db.insert_template(
-            plsqt_name=stem,
-            country_id=country_id,
-            currency_id=currency_id,
-            product_cat_id=product_cat_id,
-            product_line_id=product_line_id,
-            blob_id=blob_id,
-            section_count=len(sections),
-            file_path=file_ref,
-            update_user=update_user,
-        )
-
-    # Insert sections
-    for sec, info in zip(sections, section_infos):
-        db.insert_section(
-            plsqt_id=plsqt_id,
-            section_type_id=info.section_type_id,
-            seqn=sec.sequence,
-            content=sec.content,
-            update_user=update_user,
-        )
+    # Store blob, template and sections in one statement: the blob is
+    # deduplicated by SHA-256, a replaced blob and the old sections'
+    # pre-built documents are recorded in history (cli/archive_blobs.py
+    # purges them later), and each section's body element range is kept so
+    # that extraction from this blob can skip heading detection
+    stored = db.upsert_template(
+        plsqt_name=stem,
+        product_line_abbr=product_line_abbr,
+        country_id=country_id,
+        currency_id=currency_id,
+        file_bytes=prepared.file_bytes,
+        original_filename=prepared.filename,
+        sha256_hash=prepared.sha256,
+        file_path=file_ref or prepared.filename,
+        sections=[
+            SectionRow(
+                section_type_id=info.section_type_id,
+                seqn=sec.sequence,
+                content=sec.content,
+                heading=sec.heading,
+                elem_start=span.start,
+                elem_end=span.end,
+            )
+            for sec, info, span in zip(sections, section_infos, parsed.spans)
+        ],
+        body_elem_count=parsed.element_count,
+        update_user=update_user,
+    )
+    if stored is None:
+        raise ValueError(f"Unknown product line abbreviation: '{product_line_abbr}'")
+    plsqt_id = stored['plsqt_id']
+    blob_id = stored['blob_id']
+    is_new = stored['is_new']
 
     return TemplateLoadResult(
         plsqt_id=plsqt_id,
@@ -153,3 +295,79 @@ def load_template(
         blob_id=blob_id,
         sections=section_infos,
     )
+
+
+def stored_section_ranges(
+    section_rows: list[dict],
+    blob_sha256: str | None,
+) -> ParsedDocument | None:
+    """
+    Section ranges recorded at load time, if they apply to the current blob.
+
+    section_rows are plsqt_sections rows as returned by
+    SQMDatabase.get_section_info() / get_sections(). Returns None (the
+    caller then parses the document) when any row has no recorded range or
+    was recorded against a different blob.
+    """
+    if blob_sha256 is None or not section_rows:
+        return None
+    element_counts = {row["plsqts_body_elem_count"] for row in section_rows}
+    if len(element_counts) != 1 or any(
+        row["plsqts_source_sha256"] != blob_sha256 or row["plsqts_elem_start"] is None
+        for row in section_rows
+    ):
+        return None
+    return ParsedDocument.from_ranges(
+        ((row["plsqts_seqn"], row["plsqts_elem_start"], row["plsqts_elem_end"])
+         for row in section_rows),
+        element_counts.pop(),
+    )
+
+
+def materialize_section_docs(
+    db: SQMDatabase,
+    plsqt_id: int,
+    blob_id: int,
+    file_bytes: bytes,
+    parsed: ParsedDocument | None = None,
+) -> int:
+    """
+    Build each section's .docx and link it from plsqt_sections.
+
+    The documents are stored as content-addressed document_blob rows (an
+    unchanged section of a re-uploaded template reuses its existing blob),
+    so the section endpoint can serve them without any parsing. Every row
+    of a duplicated sequence number gets the document extraction would
+    produce for it.
+
+    Args:
+        db: An SQMDatabase instance with an open connection.
+        plsqt_id: Template whose sections to build.
+        blob_id: The template's current blob (file_bytes).
+        file_bytes: Raw bytes of the template .docx.
+        parsed: Section ranges for file_bytes, if already known; the ranges
+                stored on the section rows are used otherwise, and the
+                document is parsed only if those are missing.
+
+    Returns:
+        Number of section rows linked.
+    """
+    section_rows = db.get_sections(plsqt_id)
+    if parsed is None:
+        parsed = stored_section_ranges(
+            section_rows, hashlib.sha256(file_bytes).hexdigest())
+
+    row_ids: dict[int, list[int]] = {}
+    for row in section_rows:
+        row_ids.setdefault(row["plsqts_seqn"], []).append(row["plsqts_id"])
+
+    linked = 0
+    for seqn, docx_stream in extract_all_sections(file_bytes, parsed, seqns=row_ids):
+        docx_blob_id = db.get_or_create_blob(
+            docx_stream.getvalue(),
+            f"plsqts_content_{plsqt_id}_{blob_id}_{seqn}.docx",
+        )
+        for plsqts_id in row_ids[seqn]:
+            db.set_section_docx_blob(plsqts_id, docx_blob_id)
+            linked += 1
+    return linked
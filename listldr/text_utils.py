@@ -2,6 +2,9 @@
 Text utility functions for the SQM template loader.
 """
 
+import hashlib
+from typing import Optional, Union
+
 
 def longest_common_substring(s1: str, s2: str) -> int:
     """
@@ -27,3 +30,139 @@ def longest_common_substring(s1: str, s2: str) -> int:
                     best = curr[j]
         prev = curr
     return best
+
+
+class SectionTypeMatcher:
+    """
+    Longest-common-substring matcher over a fixed list of section types.
+
+    Built once from (plsqtst_id, plsqtst_name) pairs as a generalized suffix
+    automaton over the lowercased names. Each state records the first type
+    (in list order) whose name contains the substrings it represents, so
+    match() scans a heading once, independent of the number of types, and
+    gives the same result as match_section_type() with the DP.
+    """
+
+    def __init__(self, section_types: list[tuple[int, str]]):
+        self.type_ids = [type_id for type_id, _ in section_types]
+        # State 0 is the root (empty string)
+        self._next: list[dict[str, int]] = [{}]
+        self._link = [-1]
+        self._len = [0]
+        self._first = [len(self.type_ids)]
+
+        for index, (_, type_name) in enumerate(section_types):
+            last = 0
+            for ch in type_name.lower():
+                last = self._extend(last, ch)
+                if index < self._first[last]:
+                    self._first[last] = index
+
+        # A substring of a name is a suffix of one of its prefixes: pass the
+        # first type index from each state up its suffix links
+        for state in sorted(range(1, len(self._len)), key=self._len.__getitem__, reverse=True):
+            parent = self._link[state]
+            if self._first[state] < self._first[parent]:
+                self._first[parent] = self._first[state]
+
+    def __len__(self) -> int:
+        return len(self.type_ids)
+
+    def _new_state(self, length: int, link: int, trans: dict[str, int]) -> int:
+        self._next.append(trans)
+        self._link.append(link)
+        self._len.append(length)
+        self._first.append(len(self.type_ids))
+        return len(self._len) - 1
+
+    def _clone(self, p: int, q: int, ch: str) -> int:
+        """Split state q so the transition p --ch--> has length len(p) + 1."""
+        clone = self._new_state(self._len[p] + 1, self._link[q], dict(self._next[q]))
+        while p != -1 and self._next[p].get(ch) == q:
+            self._next[p][ch] = clone
+            p = self._link[p]
+        self._link[q] = clone
+        return clone
+
+    def _extend(self, last: int, ch: str) -> int:
+        """Append ch to the string ending in state last; return the new end state."""
+        q = self._next[last].get(ch)
+        if q is not None:
+            # Already present from an earlier name
+            if self._len[q] == self._len[last] + 1:
+                return q
+            return self._clone(last, q, ch)
+
+        cur = self._new_state(self._len[last] + 1, 0, {})
+        p = last
+        while p != -1 and ch not in self._next[p]:
+            self._next[p][ch] = cur
+            p = self._link[p]
+        if p != -1:
+            q = self._next[p][ch]
+            if self._len[p] + 1 == self._len[q]:
+                self._link[cur] = q
+            else:
+                self._link[cur] = self._clone(p, q, ch)
+        return cur
+
+    def match(self, heading_text: str, min_match_length: int = 4) -> Optional[int]:
+        """
+        Return the plsqtst_id with the longest common substring with
+        heading_text; ties go to the type listed first. Returns None if the
+        best length < min_match_length.
+        """
+        trans, link, length, first = self._next, self._link, self._len, self._first
+        state = 0
+        cur_len = 0
+        best_len = 0
+        best_index = len(self.type_ids)
+
+        for ch in heading_text.lower():
+            while state and ch not in trans[state]:
+                state = link[state]
+                cur_len = length[state]
+            nxt = trans[state].get(ch)
+            if nxt is None:
+                continue
+            state = nxt
+            cur_len += 1
+            # The longest match ending here is the only candidate for a new
+            # best; every type containing it shares the state's first index
+            if cur_len > best_len or (cur_len == best_len and first[state] < best_index):
+                best_len = cur_len
+                best_index = first[state]
+
+        if best_len == 0 or best_len < min_match_length:
+            return None
+        return self.type_ids[best_index]
+
+
+def section_type_catalog_version(section_types: list[tuple[int, str]]) -> str:
+    """
+    Identify a section-type catalog: SHA-256 (hex) of the (plsqtst_id,
+    plsqtst_name) list in order. Any change to the catalog that could change
+    a match result gives a different version.
+    """
+    digest = hashlib.sha256()
+    for type_id, type_name in section_types:
+        digest.update(f"{type_id}\t{type_name}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def match_section_type(
+    heading_text: str,
+    section_types: Union[list[tuple[int, str]], SectionTypeMatcher],
+    min_match_length: int = 4,
+) -> Optional[int]:
+    """
+    Match heading_text to a section type using longest-common-substring.
+
+    section_types is a list of (plsqtst_id, plsqtst_name) or a
+    SectionTypeMatcher built from one. Returns plsqtst_id of the best match
+    (longest LCS); ties go to the type listed first. Returns None if the
+    best LCS length < min_match_length.
+    """
+    if not isinstance(section_types, SectionTypeMatcher):
+        section_types = SectionTypeMatcher(section_types)
+    return section_types.match(heading_text, min_match_length)
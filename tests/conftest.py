@@ -0,0 +1,174 @@
+"""
+Shared fixtures: a sample template, an in-memory stand-in for SQMDatabase
+and a TestClient for the API that needs no PostgreSQL.
+"""
+
+import hashlib
+import threading
+from contextlib import asynccontextmanager
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api import dependencies
+from api.app import app
+from listldr.parse_cache import ParseCache
+from listldr.parse_pool import ParsePool
+from listldr.parser import parse_document
+from listldr.section_cache import SectionDocCache
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates_docx"
+SAMPLE_DOCX = TEMPLATES_DIR / "UBM 20 FCFC_US_FOB Allendale_11 2025.docx"
+
+
+class FakeDB:
+    """
+    The SQMDatabase reads the API endpoints make, answered from one stored
+    template (plsqt_id 5, blob_id 7) holding the sample document.
+    """
+
+    def __init__(self, docx_bytes: bytes):
+        self.docx_bytes = docx_bytes
+        self.sha256 = hashlib.sha256(docx_bytes).hexdigest()
+        self.parsed = parse_document(BytesIO(docx_bytes), with_text=False)
+        self.calls: list[str] = []
+
+    def _rows(self) -> list[dict]:
+        return [
+            {
+                "plsqts_id": i,
+                "plsqts_seqn": span.sequence,
+                "section_type_id": 1,
+                "plsqtst_name": f"Section {span.sequence}",
+                "plsqts_use_alt_name": False,
+                "plsqts_alt_name": None,
+                "plsqts_elem_start": span.start,
+                "plsqts_elem_end": span.end,
+                "plsqts_body_elem_count": self.parsed.element_count,
+                "plsqts_source_sha256": None,
+                "plsqts_docx_blob_id": None,
+            }
+            for i, span in enumerate(self.parsed.spans)
+        ]
+
+    def get_template_by_id(self, plsqt_id: int) -> dict | None:
+        self.calls.append("get_template_by_id")
+        if plsqt_id != 5:
+            return None
+        return {
+            "plsqt_id": 5,
+            "plsqt_name": "UBM 20 FCFC",
+            "current_blob_id": 7,
+            "plsqt_section_count": len(self.parsed.spans),
+            "blob_sha256": self.sha256,
+        }
+
+    def get_section_info(self, plsqt_id: int, seqn: int) -> list[dict]:
+        self.calls.append("get_section_info")
+        return [row for row in self._rows() if row["plsqts_seqn"] == seqn]
+
+    def get_sections(self, plsqt_id: int) -> list[dict]:
+        self.calls.append("get_sections")
+        return self._rows()
+
+    def get_blob_buffer(self, blob_id: int) -> memoryview | None:
+        self.calls.append("get_blob_buffer")
+        return memoryview(self.docx_bytes) if blob_id == 7 else None
+
+    def get_blob_bytes(self, blob_id: int) -> bytes | None:
+        self.calls.append("get_blob_bytes")
+        return self.docx_bytes if blob_id == 7 else None
+
+    def get_blob_size(self, blob_id: int) -> int | None:
+        self.calls.append("get_blob_size")
+        return len(self.docx_bytes) if blob_id == 7 else None
+
+    def iter_blob_chunks(self, blob_id: int, chunk_size: int = 256 * 1024):
+        self.calls.append("iter_blob_chunks")
+        data = memoryview(self.docx_bytes)
+        for offset in range(0, len(data), chunk_size):
+            yield data[offset:offset + chunk_size]
+
+    def lookup_country(self, code: str) -> int | None:
+        return 1
+
+    def lookup_currency(self, code: str) -> int | None:
+        return 1
+
+
+class FakePool:
+    """Connection pool stand-in that counts the connections handed out."""
+
+    class Connection:
+        def rollback(self) -> None:
+            pass
+
+    def __init__(self):
+        self.in_use = 0
+
+    def getconn(self):
+        self.in_use += 1
+        return self.Connection()
+
+    def putconn(self, conn) -> None:
+        self.in_use -= 1
+
+
+class _Logger:
+    def log(self, message: str) -> None:
+        pass
+
+
+@pytest.fixture(scope="session")
+def sample_docx() -> bytes:
+    return SAMPLE_DOCX.read_bytes()
+
+
+@pytest.fixture
+def fake_db(sample_docx) -> FakeDB:
+    return FakeDB(sample_docx)
+
+
+@pytest.fixture
+def section_cache() -> SectionDocCache:
+    return SectionDocCache(max_bytes=16 * 1024 * 1024)
+
+
+@pytest.fixture
+def db_pool() -> FakePool:
+    return FakePool()
+
+
+@pytest.fixture
+def blob_streams() -> threading.BoundedSemaphore:
+    return threading.BoundedSemaphore(2)
+
+
+@pytest.fixture
+def client(fake_db, db_pool, blob_streams, section_cache, monkeypatch):
+    """
+    TestClient with the database, logger, caches and parse pool replaced
+    (extraction runs in-process). Entered once, so all requests share the
+    app's event loop as under uvicorn; the real lifespan is skipped.
+    """
+    @asynccontextmanager
+    async def no_lifespan(_app):
+        yield
+
+    monkeypatch.setattr(app.router, "lifespan_context", no_lifespan)
+    app.dependency_overrides.update({
+        dependencies.get_db: lambda: fake_db,
+        dependencies.get_db_pool: lambda: db_pool,
+        dependencies.get_blob_streams: lambda: blob_streams,
+        dependencies.get_logger: lambda: _Logger(),
+        dependencies.get_parse_cache: lambda: ParseCache(),
+        dependencies.get_parse_pool: lambda: ParsePool([(1, "Section")], max_workers=0),
+        dependencies.get_section_cache: lambda: section_cache,
+    })
+    try:
+        with TestClient(app) as test_client:
+            yield test_client
+    finally:
+        app.dependency_overrides.clear()
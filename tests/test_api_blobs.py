@@ -0,0 +1,62 @@
+"""
+Stored blob downloads: small ones are sent from memory, large ones are
+streamed on a pooled connection under the LISTLDR_BLOB_STREAMS limit.
+"""
+
+import gc
+
+import pytest
+
+from api import routes
+
+TEMPLATE_URL = "/api/v1/templates/5/docx"
+
+
+@pytest.fixture
+def streamed(fake_db, monkeypatch):
+    """Make every blob 'large', and stream it from the fake database."""
+    monkeypatch.setattr(routes, "BLOB_INLINE_MAX_BYTES", 0)
+    monkeypatch.setattr(routes, "SQMDatabase", lambda conn: fake_db)
+
+
+def test_small_blob_sent_from_memory(client, fake_db, db_pool, sample_docx):
+    response = client.get(TEMPLATE_URL)
+    assert response.status_code == 200
+    assert response.content == sample_docx
+    assert "iter_blob_chunks" not in fake_db.calls
+    assert db_pool.in_use == 0
+
+
+def test_large_blob_streamed_and_released(client, streamed, fake_db, db_pool, blob_streams, sample_docx):
+    for _ in range(3):  # more downloads than slots: each one gives its slot back
+        response = client.get(TEMPLATE_URL)
+        assert response.status_code == 200
+        assert response.content == sample_docx
+        assert response.headers["content-length"] == str(len(sample_docx))
+    assert "iter_blob_chunks" in fake_db.calls
+    assert db_pool.in_use == 0
+    assert blob_streams.acquire(blocking=False) and blob_streams.acquire(blocking=False)
+
+
+def test_streams_exhausted_is_503(client, streamed, db_pool, blob_streams):
+    blob_streams.acquire()
+    blob_streams.acquire()
+    response = client.get(TEMPLATE_URL)
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(routes.RETRY_AFTER_SECONDS)
+    assert db_pool.in_use == 0
+
+
+def test_unsent_stream_releases_its_slot(fake_db, db_pool, blob_streams, streamed):
+    class Logger:
+        def log(self, message):
+            pass
+
+    response = routes._blob_response(
+        fake_db, db_pool, blob_streams, 7, len(fake_db.docx_bytes), {}, Logger()
+    )
+    assert response.status_code == 200
+    del response
+    gc.collect()
+    assert db_pool.in_use == 0
+    assert blob_streams.acquire(blocking=False) and blob_streams.acquire(blocking=False)
@@ -0,0 +1,87 @@
+"""
+POST /load runs on the load executor, so section downloads served by the
+same event loop keep flowing while an upload is being parsed.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pytest
+
+from api import dependencies, routes
+from api.app import app
+from listldr.models import TemplateLoadResult
+from listldr.parse_pool import ParsePool
+
+SECTION_URL = "/api/v1/templates/5/sections/1/docx"
+
+# A download must finish within this while the upload is in flight
+MAX_DOWNLOAD_SECONDS = 2.0
+
+
+class SlowParsePool(ParsePool):
+    """In-process pool whose prepare_template() blocks until released; extraction is unaffected."""
+
+    def __init__(self):
+        super().__init__([(1, "Section")], max_workers=0)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def prepare_template(self, file_bytes, filename, product_line_override=None, sha256=None):
+        self.started.set()
+        assert self.release.wait(timeout=10), "upload was never released"
+        return object()
+
+
+@pytest.fixture
+def slow_load(client, fake_db, monkeypatch):
+    """Route POST /load through a SlowParsePool and a stubbed apply_template()."""
+    parse_pool = SlowParsePool()
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    @contextmanager
+    def pooled_fake_db(pool):
+        yield fake_db
+
+    def apply_template(prepared, db, country_id, currency_id, **kwargs):
+        return TemplateLoadResult(5, "UBM 20 FCFC", "UBM", 0, False, 7, [])
+
+    monkeypatch.setattr(routes, "pooled_db", pooled_fake_db)
+    monkeypatch.setattr(routes, "apply_template", apply_template)
+    app.dependency_overrides[dependencies.get_load_executor] = lambda: executor
+    # Downloads extract through the same pool, in-process and unblocked
+    app.dependency_overrides[dependencies.get_parse_pool] = lambda: parse_pool
+    yield parse_pool
+    parse_pool.release.set()
+    executor.shutdown(wait=True)
+
+
+def test_section_download_not_blocked_by_upload(client, slow_load):
+    upload = {}
+
+    def post_upload():
+        upload["response"] = client.post(
+            "/api/v1/templates/load",
+            files={"file": ("UBM 20 FCFC.docx", b"x" * 5_000_000)},
+            data={"country": "CHE", "currency": "CHF", "force": "true"},
+        )
+
+    uploader = threading.Thread(target=post_upload)
+    uploader.start()
+    assert slow_load.started.wait(timeout=10), "upload never reached parsing"
+
+    for _ in range(3):
+        started = time.monotonic()
+        response = client.get(SECTION_URL)
+        elapsed = time.monotonic() - started
+        assert response.status_code == 200
+        assert elapsed < MAX_DOWNLOAD_SECONDS
+        assert uploader.is_alive(), "upload finished before the downloads"
+
+    slow_load.release.set()
+    uploader.join(timeout=10)
+    assert not uploader.is_alive()
+    assert upload["response"].status_code == 200
+    assert upload["response"].json()["template"]["plsqt_id"] == 5
@@ -0,0 +1,84 @@
+"""
+Section downloads: streamed when extraction runs in-process, buffered
+through the parse workers otherwise, with the same documents either way.
+"""
+
+import io
+import zipfile
+
+import pytest
+
+from api import dependencies
+from api.app import app
+from listldr.parse_pool import ParsePool
+from listldr.parser import extract_section_docx
+
+SECTION_URL = "/api/v1/templates/5/sections/{seqn}/docx"
+ZIP_URL = "/api/v1/templates/5/sections.zip"
+
+
+@pytest.fixture(scope="module")
+def worker_pool():
+    pool = ParsePool([(1, "Section")], max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def pooled(client, worker_pool):
+    """Route extraction through a parse worker process."""
+    app.dependency_overrides[dependencies.get_parse_pool] = lambda: worker_pool
+    return client
+
+
+def test_in_process_section_is_streamed_and_cached(client, sample_docx, section_cache):
+    response = client.get(SECTION_URL.format(seqn=2))
+    assert response.status_code == 200
+    assert response.content == extract_section_docx(sample_docx, 2)
+    assert response.headers["content-length"] == response.headers["x-content-length"]
+    # Cached once the whole body was sent
+    assert section_cache.get(7, 2) == response.content
+
+
+def test_pooled_section_matches_in_process(pooled, sample_docx, section_cache):
+    for seqn in (0, 1, 3):
+        response = pooled.get(SECTION_URL.format(seqn=seqn))
+        assert response.status_code == 200
+        assert response.content == extract_section_docx(sample_docx, seqn)
+        assert section_cache.get(7, seqn) == response.content
+
+
+def test_missing_section_is_404(client):
+    assert client.get(SECTION_URL.format(seqn=99)).status_code == 404
+
+
+def _members(content: bytes) -> dict[str, bytes]:
+    with zipfile.ZipFile(io.BytesIO(content)) as archive:
+        assert archive.testzip() is None
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def test_sections_zip_same_in_process_and_pooled(client, worker_pool, sample_docx):
+    streamed = client.get(ZIP_URL)
+    assert streamed.status_code == 200
+    app.dependency_overrides[dependencies.get_parse_pool] = lambda: worker_pool
+    buffered = client.get(ZIP_URL)
+    assert buffered.status_code == 200
+
+    members = _members(streamed.content)
+    assert members == _members(buffered.content)
+    assert len(members) == int(streamed.headers["x-section-count"])
+    name = next(name for name in members if name.startswith("plsqts_content_5_7_1_"))
+    assert members[name] == extract_section_docx(sample_docx, 1)
+
+
+def test_sections_zip_busy_pool_is_503(client):
+    pool = ParsePool([(1, "Section")], max_workers=0, max_queue=0)
+    app.dependency_overrides[dependencies.get_parse_pool] = lambda: pool
+    pool._slots.acquire()  # the only slot is taken
+    try:
+        response = client.get(ZIP_URL)
+    finally:
+        pool._slots.release()
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
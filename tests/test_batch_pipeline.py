@@ -0,0 +1,40 @@
+"""
+cli/batch_load.iter_prepared: worker processes give the same results as
+preparing in-process, and a dead pipeline stage fails instead of hanging.
+"""
+
+import pytest
+
+from cli import batch_load
+from tests.conftest import TEMPLATES_DIR
+
+SECTION_TYPES = [(1, "Section")]
+
+
+def _outcomes(workers: int) -> list[tuple[str, str]]:
+    files = sorted(TEMPLATES_DIR.glob("*.docx"))
+    outcomes = []
+    for idx, path, prepare in batch_load.iter_prepared(files, workers, SECTION_TYPES, ""):
+        try:
+            prepared = prepare()
+            outcomes.append((path.name, f"{prepared.template_name} {len(prepared.sections)}"))
+        except ValueError as e:
+            outcomes.append((path.name, f"ValueError: {e}"))
+    return outcomes
+
+
+def test_worker_processes_match_in_process():
+    in_process = _outcomes(workers=1)
+    assert len(in_process) == len(list(TEMPLATES_DIR.glob("*.docx")))
+    assert _outcomes(workers=2) == in_process
+
+
+def test_dead_stage_raises_instead_of_hanging():
+    def files():
+        yield from sorted(TEMPLATES_DIR.glob("*.docx"))[:1]
+        raise OSError("input folder went away")
+
+    with pytest.raises(RuntimeError, match="stopped unexpectedly") as excinfo:
+        for _ in batch_load.iter_prepared(files(), 1, SECTION_TYPES, ""):
+            pass
+    assert isinstance(excinfo.value.__cause__, OSError)
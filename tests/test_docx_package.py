@@ -0,0 +1,193 @@
+"""
+Zip-level package handling in listldr/docx_package.py.
+"""
+
+import io
+import posixpath
+import zipfile
+
+import pytest
+from lxml import etree
+
+from listldr.docx_package import (
+    PackageReader,
+    PackageStream,
+    iter_stored_zip,
+    prune_package,
+)
+from listldr.parser import extract_all_sections
+from tests.conftest import SAMPLE_DOCX
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+IMAGE_REL = R_NS + "/image"
+
+CONTENT_TYPES = (
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="png" ContentType="image/png"/>'
+    '<Override PartName="/word/document.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+PACKAGE_RELS = (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{R_NS}/officeDocument" Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+
+def _package(body: str, image_count: int = 3) -> bytes:
+    """A minimal .docx whose document relates to image_count images."""
+    rels = "".join(
+        f'<Relationship Id="rId{i}" Type="{IMAGE_REL}" Target="media/image{i}.png"/>'
+        for i in range(1, image_count + 1)
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("[Content_Types].xml", CONTENT_TYPES)
+        zf.writestr("_rels/.rels", PACKAGE_RELS)
+        zf.writestr(
+            "word/document.xml",
+            f'<w:document xmlns:w="{W_NS}" xmlns:r="{R_NS}" '
+            'xmlns:v="urn:schemas-microsoft-com:vml" '
+            'xmlns:o="urn:schemas-microsoft-com:office:office" '
+            'xmlns:dsp="http://schemas.microsoft.com/office/drawing/2008/diagram">'
+            f'<w:body>{body}</w:body></w:document>',
+        )
+        zf.writestr(
+            "word/_rels/document.xml.rels",
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{rels}</Relationships>',
+        )
+        for i in range(1, image_count + 1):
+            zf.writestr(f"word/media/image{i}.png", b"\x89PNG" + bytes([i]) * 100)
+    return buffer.getvalue()
+
+
+def _check_package(data: bytes) -> dict[str, bytes]:
+    """
+    Assert data is a well-formed package: a zip whose CRCs check, whose
+    content-type overrides and internal relationships all point at parts
+    that exist. Returns its members.
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        members = {name: zf.read(name) for name in zf.namelist()}
+
+    types = etree.fromstring(members["[Content_Types].xml"])
+    for override in types.iter("{*}Override"):
+        assert override.get("PartName").lstrip("/") in members
+
+    for name in members:
+        if not name.endswith(".rels"):
+            continue
+        source = posixpath.dirname(posixpath.dirname(name))
+        for rel in etree.fromstring(members[name]).iter("{*}Relationship"):
+            if rel.get("TargetMode") == "External":
+                continue
+            target = rel.get("Target")
+            target = (target.lstrip("/") if target.startswith("/")
+                      else posixpath.normpath(posixpath.join(source, target)))
+            assert target in members, f"{name}: {rel.get('Id')} -> {target}"
+    return members
+
+
+def test_reader_matches_zipfile(sample_docx):
+    reader = PackageReader(sample_docx)
+
+    with zipfile.ZipFile(io.BytesIO(sample_docx)) as zf:
+        assert list(reader.entries) == zf.namelist()
+        for name in zf.namelist():
+            assert reader.read(name) == zf.read(name)
+
+
+def test_unchanged_stream_copies_every_entry(sample_docx):
+    stream = PackageStream(PackageReader(sample_docx))
+
+    output = stream.getvalue()
+
+    assert len(output) == stream.size
+    assert b"".join(stream) == output
+    with zipfile.ZipFile(io.BytesIO(sample_docx)) as zf:
+        assert _check_package(output) == {name: zf.read(name) for name in zf.namelist()}
+
+
+def test_stream_replaces_and_drops_parts(sample_docx):
+    reader = PackageReader(sample_docx)
+    replaced = b'<?xml version="1.0"?><w:document xmlns:w="x"/>'
+    dropped = next(name for name in reader.entries if name.startswith("docProps/"))
+
+    stream = PackageStream(reader, replace={"word/document.xml": replaced}, drop={dropped})
+    output = stream.getvalue()
+
+    assert len(output) == stream.size
+    with zipfile.ZipFile(io.BytesIO(output)) as zf:
+        assert zf.testzip() is None
+        assert zf.read("word/document.xml") == replaced
+        assert dropped not in zf.namelist()
+        assert set(zf.namelist()) == set(reader.entries) - {dropped}
+
+
+@pytest.mark.parametrize("lite", [False, True], ids=["full", "lite"])
+def test_extracted_sections_are_valid_packages(sample_docx, lite):
+    source = _check_package(sample_docx)
+    media = {name for name in source if name.startswith("word/media/")}
+
+    kept = set()
+    for _, stream in extract_all_sections(sample_docx, lite=lite):
+        output = stream.getvalue()
+        assert len(output) == stream.size
+        members = _check_package(output)
+        kept |= members.keys() & media
+        assert set(members) <= set(source)
+
+    # Every image is used by some section, and none survives in lite output
+    assert kept == (set() if lite else media)
+
+
+def test_stored_zip_of_sections(sample_docx):
+    streams = dict(extract_all_sections(sample_docx))
+
+    archive = b"".join(iter_stored_zip((f"{seqn}.docx", stream) for seqn, stream in streams.items()))
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert zf.testzip() is None
+        assert {info.compress_type for info in zf.infolist()} == {zipfile.ZIP_STORED}
+        assert {name: zf.read(name) for name in zf.namelist()} == {
+            f"{seqn}.docx": stream.getvalue() for seqn, stream in streams.items()
+        }
+
+
+def _prune(data: bytes):
+    reader = PackageReader(data)
+    root = etree.fromstring(reader.read("word/document.xml"))
+    return reader, prune_package(reader, {"word/document.xml": root})
+
+
+def test_prune_keeps_every_referenced_relationship():
+    data = _package(
+        '<w:p><w:r><w:drawing><a:blip xmlns:a="x" r:embed="rId1"/></w:drawing></w:r></w:p>'
+        '<w:p><w:r><w:pict><v:shape><v:imagedata o:relid="rId2"/></v:shape></w:pict></w:r></w:p>'
+        '<w:p><w:r><dsp:dataModelExt relId="rId3"/></w:r></w:p>'
+    )
+
+    _, (replace, drop) = _prune(data)
+
+    assert drop == set()
+    assert set(replace) == {"word/document.xml"}
+
+
+def test_prune_drops_unreferenced_images():
+    data = _package('<w:p><w:r><w:pict><v:imagedata o:relid="rId2"/></w:pict></w:r></w:p>')
+
+    reader, (replace, drop) = _prune(data)
+    output = b"".join(PackageStream(reader, replace=replace, drop=drop))
+
+    assert drop == {"word/media/image1.png", "word/media/image3.png"}
+    with zipfile.ZipFile(io.BytesIO(output)) as zf:
+        assert zf.testzip() is None
+        assert "word/media/image2.png" in zf.namelist()
+        assert not drop & set(zf.namelist())
+        rels = zf.read("word/_rels/document.xml.rels").decode()
+    assert 'Id="rId2"' in rels
+    assert 'Id="rId1"' not in rels and 'Id="rId3"' not in rels
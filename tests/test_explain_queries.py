@@ -0,0 +1,85 @@
+"""
+cli/explain_queries.py without PostgreSQL: every sample call goes through
+the EXPLAIN proxy, and errors other than reading rows of a plan surface.
+"""
+
+import pytest
+
+from cli import explain_queries
+from listldr.db import SQMDatabase
+
+PLAN = [{"Plan": {"Node Type": "Index Scan", "Relation Name": "plsq_templates"}}]
+
+
+class FakeCursor:
+    """Answers EXPLAIN with PLAN and records the other statements."""
+
+    class connection:
+        encoding = "UTF8"
+
+    def __init__(self, executed: list):
+        self._executed = executed
+        self._row = None
+        self.rowcount = -1
+
+    def execute(self, sql, params=None):
+        text = sql.decode() if isinstance(sql, bytes) else sql
+        self._executed.append(text)
+        self._row = (PLAN,) if text.startswith("EXPLAIN") else None
+        self.rowcount = 1
+
+    def mogrify(self, template, args):
+        return template % tuple(repr(a).encode() for a in args)
+
+    def fetchone(self):
+        return self._row
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed: list[str] = []
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self.executed)
+
+
+@pytest.fixture
+def proxy():
+    return explain_queries._ExplainConnection(FakeConnection())
+
+
+def test_every_query_method_has_a_sample_call():
+    assert set(explain_queries.query_methods()) == set(explain_queries.SAMPLE_CALLS)
+
+
+@pytest.mark.parametrize("name", sorted(explain_queries.SAMPLE_CALLS))
+def test_sample_call_is_explained(proxy, name):
+    plans = explain_queries.explain_method(name, SQMDatabase(conn=proxy), proxy)
+
+    assert plans
+    assert all(plan is PLAN for _, plan in plans)
+
+
+def test_broken_sample_call_is_raised(proxy, monkeypatch):
+    monkeypatch.setitem(explain_queries.SAMPLE_CALLS, "lookup_country",
+                        lambda db: db.lookup_country())
+
+    with pytest.raises(TypeError):
+        explain_queries.explain_method("lookup_country", SQMDatabase(conn=proxy), proxy)
+
+
+def test_iter_seq_scans_walks_the_plan_tree():
+    plan = {
+        "Node Type": "Hash Join",
+        "Plans": [
+            {"Node Type": "Seq Scan", "Relation Name": "plsqt_sections"},
+            {"Node Type": "Hash", "Plans": [
+                {"Node Type": "Seq Scan", "Relation Name": "section_type"},
+            ]},
+        ],
+    }
+
+    assert list(explain_queries.iter_seq_scans(plan)) == ["plsqt_sections", "section_type"]
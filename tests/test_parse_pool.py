@@ -0,0 +1,115 @@
+"""
+ParsePool task limits: the timeout runs from when a worker starts a task,
+and a timed-out or crashed worker is replaced without disturbing the
+tasks running in the others.
+"""
+
+import os
+import threading
+import time
+
+import pytest
+
+from listldr.parse_pool import ParsePool, ParsePoolBusy, ParseTimeout
+
+
+def _pool(**kwargs) -> ParsePool:
+    return ParsePool([(1, "Section")], memory_limit_mb=0, **kwargs)
+
+
+def _in_thread(pool: ParsePool, fn, *args) -> tuple[threading.Thread, dict]:
+    outcome = {}
+
+    def target():
+        try:
+            outcome["result"] = pool.run(fn, *args)
+        except Exception as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, outcome
+
+
+@pytest.fixture
+def pools():
+    created = []
+
+    def make(**kwargs):
+        created.append(_pool(**kwargs))
+        return created[-1]
+
+    yield make
+    for pool in created:
+        pool.shutdown()
+
+
+def test_queue_time_does_not_count(pools):
+    pool = pools(max_workers=1, task_timeout=1.5)
+    pool.run(abs, 0)  # start the worker
+
+    first, first_outcome = _in_thread(pool, time.sleep, 1.0)
+    time.sleep(0.1)
+    started = time.monotonic()
+    second, second_outcome = _in_thread(pool, time.sleep, 1.0)
+    first.join()
+    second.join()
+
+    # The second task waited ~0.9s for the worker, then ran 1s: past 1.5s in all
+    assert time.monotonic() - started > 1.5
+    assert first_outcome == {"result": None}
+    assert second_outcome == {"result": None}
+
+
+def test_timeout_kills_only_its_worker(pools):
+    pool = pools(max_workers=2, task_timeout=1.0)
+    warm_up = [_in_thread(pool, time.sleep, 0.2)[0] for _ in range(2)]  # start both workers
+    for thread in warm_up:
+        thread.join()
+
+    slow, slow_outcome = _in_thread(pool, time.sleep, 5)
+    time.sleep(0.5)
+    other, other_outcome = _in_thread(pool, time.sleep, 0.8)
+    slow.join()
+    other.join()
+
+    assert isinstance(slow_outcome["error"], ParseTimeout)
+    # Running across the kill, the other task still completed
+    assert other_outcome == {"result": None}
+    assert pool.run(abs, -3) == 3
+
+
+def test_crashed_worker_is_replaced(pools):
+    pool = pools(max_workers=1)
+    pid = pool.run(os.getpid)
+
+    with pytest.raises(ParsePoolBusy):
+        pool.run(os._exit, 1)
+
+    assert pool.run(os.getpid) != pid
+
+
+def test_task_errors_are_raised(pools):
+    pool = pools(max_workers=1)
+
+    with pytest.raises(ValueError):
+        pool.run(int, "not a number")
+    assert pool.run(int, "42") == 42
+
+
+def test_workers_are_replaced_after_max_tasks(pools):
+    pool = pools(max_workers=1, max_tasks_per_child=2)
+
+    pids = [pool.run(os.getpid) for _ in range(3)]
+
+    assert pids[0] == pids[1] != pids[2]
+
+
+def test_shut_down_pool_takes_no_tasks(pools):
+    pool = pools(max_workers=1)
+    pool.run(abs, 0)
+
+    pool.shutdown()
+
+    with pytest.raises(RuntimeError):
+        pool.run(abs, 0)
@@ -0,0 +1,85 @@
+"""
+Heading detection in listldr/parser.py.
+"""
+
+from lxml import etree
+
+from listldr.parser import _find_heading_in_element
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _element(xml: str):
+    return etree.fromstring(f'<w:root xmlns:w="{W_NS}">{xml}</w:root>')[0]
+
+
+def _cell(text: str) -> str:
+    return f"<w:tc><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:tc>"
+
+
+def _row(*cells: str) -> str:
+    return "<w:tr>" + "".join(cells) + "</w:tr>"
+
+
+def _sdt(xml: str) -> str:
+    return f"<w:sdt><w:sdtPr/><w:sdtContent>{xml}</w:sdtContent></w:sdt>"
+
+
+def test_paragraph_heading():
+    assert _find_heading_in_element(
+        _element("<w:p><w:r><w:t>2 - Scope of Supply</w:t></w:r></w:p>")
+    ) == (2, "Scope of Supply", False)
+
+
+def test_long_paragraph_is_not_a_heading():
+    assert _find_heading_in_element(
+        _element(f"<w:p><w:r><w:t>2 - {'x' * 100}</w:t></w:r></w:p>")
+    ) is None
+
+
+def test_first_and_last_row_headings():
+    first = _element("<w:tbl><w:tblPr/>" + _row(_cell("3 - Options")) + _row(_cell("a"), _cell("b")) + "</w:tbl>")
+    last = _element("<w:tbl>" + _row(_cell("a"), _cell("b")) + _row(_cell("4 - Prices")) + "</w:tbl>")
+
+    assert _find_heading_in_element(first) == (3, "Options", False)
+    assert _find_heading_in_element(last) == (4, "Prices", True)
+
+
+def test_multi_cell_row_is_not_a_heading():
+    table = _element("<w:tbl>" + _row(_cell("3 - Options"), _cell("x")) + "</w:tbl>")
+
+    assert _find_heading_in_element(table) is None
+
+
+def test_rows_and_cells_inside_content_controls():
+    first = _element("<w:tbl>" + _sdt(_row(_sdt(_cell("3 - Options")))) + _row(_cell("a"), _cell("b")) + "</w:tbl>")
+    last = _element(
+        "<w:tbl>" + _row(_cell("a"), _cell("b"))
+        + f'<w:customXml w:element="r">{_row(_cell("4 - Prices"))}</w:customXml></w:tbl>'
+    )
+    split = _element("<w:tbl>" + _row(_cell("3 - Options"), _sdt(_cell("x"))) + "</w:tbl>")
+
+    assert _find_heading_in_element(first) == (3, "Options", False)
+    assert _find_heading_in_element(last) == (4, "Prices", True)
+    assert _find_heading_in_element(split) is None
+
+
+def test_nested_table_rows_are_ignored():
+    nested = "<w:tbl>" + _row(_cell("5 - Nested")) + "</w:tbl>"
+    table = _element(
+        "<w:tbl>" + _row(_cell("a"), _cell("b"))
+        + _row(f"<w:tc>{nested}<w:p/></w:tc>", _cell("c")) + "</w:tbl>"
+    )
+
+    assert _find_heading_in_element(table) is None
+
+
+def test_cell_holding_a_nested_table_is_not_a_single_cell():
+    # As in the python-docx parser, which counted every w:tc under the row
+    nested = "<w:tbl>" + _row(_cell("b")) + "</w:tbl>"
+    table = _element(
+        "<w:tbl>" + _row(f"<w:tc><w:p><w:r><w:t>5 - Heading</w:t></w:r></w:p>{nested}</w:tc>")
+        + _row(_cell("c")) + "</w:tbl>"
+    )
+
+    assert _find_heading_in_element(table) is None
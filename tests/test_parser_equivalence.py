@@ -0,0 +1,125 @@
+"""
+The zip-level parser against the python-docx implementation it replaced:
+same sections, same TOC and the same body elements in every extracted
+section, for every sample template.
+"""
+
+import io
+
+import pytest
+from docx import Document
+from lxml import etree
+
+from listldr.parser import (
+    HEADING_PATTERN,
+    _get_element_text,
+    _is_paragraph,
+    _is_table,
+    _W_TC,
+    _W_TR,
+    extract_all_sections,
+    extract_section_docx,
+    extract_toc_entries,
+    parse_docx_sections,
+    parse_document,
+)
+from tests.conftest import TEMPLATES_DIR
+
+TEMPLATES = sorted(TEMPLATES_DIR.glob("*.docx"))
+
+
+def _reference_heading(element):
+    """Heading detection as python-docx-based parsing did it."""
+    def match(node):
+        text = _get_element_text(node).strip()
+        found = HEADING_PATTERN.match(text) if len(text) < 80 else None
+        return (int(found.group(1)), found.group(2).strip()) if found else None
+
+    if _is_paragraph(element):
+        found = match(element)
+        return (*found, False) if found else None
+    if _is_table(element):
+        rows = element.findall(".//" + _W_TR)
+        if rows:
+            cells = rows[0].findall(".//" + _W_TC)
+            found = match(cells[0]) if len(cells) == 1 else None
+            if found:
+                return (*found, False)
+            if len(rows) > 1:
+                cells = rows[-1].findall(".//" + _W_TC)
+                found = match(cells[0]) if len(cells) == 1 else None
+                if found:
+                    return (*found, True)
+    return None
+
+
+def _reference_sections(data: bytes) -> list[tuple[int, str, list]]:
+    """(sequence, heading, body elements) per section, from a python-docx Document."""
+    sections = []
+    current, heading, seq, started = [], "Cover Page", 0, False
+    for element in Document(io.BytesIO(data)).element.body:
+        found = _reference_heading(element)
+        if found is None:
+            current.append(element)
+            continue
+        number, title, trailing = found
+        if trailing:
+            current.append(element)
+        if started or current:
+            sections.append((seq, heading, current))
+        started = True
+        seq, heading = number, title
+        current = [] if trailing else [element]
+    if current:
+        sections.append((seq, heading, current))
+    return sections
+
+
+def _text(elements) -> str:
+    lines = []
+    for element in elements:
+        nodes = [element] if _is_paragraph(element) else element.iter(_W_TC) if _is_table(element) else []
+        lines += [text for text in (_get_element_text(n).strip() for n in nodes) if text]
+    return "\n".join(lines)
+
+
+def _body(docx: bytes) -> list[bytes]:
+    return [etree.tostring(e) for e in Document(io.BytesIO(docx)).element.body]
+
+
+@pytest.fixture(scope="module", params=TEMPLATES, ids=lambda p: p.stem)
+def template(request):
+    data = request.param.read_bytes()
+    return data, _reference_sections(data)
+
+
+def test_sections_match_python_docx(template):
+    data, reference = template
+
+    sections = parse_docx_sections(io.BytesIO(data))
+
+    assert [(s.sequence, s.heading, s.content) for s in sections] == [
+        (seq, heading, _text(elements)) for seq, heading, elements in reference
+    ]
+    assert extract_toc_entries(sections)
+
+
+def test_ranges_without_text_match(template):
+    data, _ = template
+
+    with_text = parse_document(io.BytesIO(data))
+    ranges_only = parse_document(io.BytesIO(data), with_text=False)
+
+    assert ranges_only.spans == with_text.spans
+    assert ranges_only.element_count == with_text.element_count
+
+
+def test_extracted_sections_keep_the_same_body(template):
+    data, reference = template
+    expected = {seq: [etree.tostring(e) for e in elements] for seq, _, elements in reference}
+    parsed = parse_document(io.BytesIO(data), with_text=False)
+
+    extracted = {seq: _body(stream.getvalue()) for seq, stream in extract_all_sections(data, parsed)}
+
+    assert extracted == {seq: _body(extract_section_docx(data, seq)) for seq in expected}
+    assert extracted == expected
@@ -0,0 +1,212 @@
+"""
+SectionDocCache: byte-budgeted LRU eviction, invalidation on template
+reload, and the shared on-disk tier.
+"""
+
+import os
+import random
+
+from api import dependencies
+from api.app import app
+from listldr.parser import PARSER_VERSION
+from listldr.section_cache import SectionDocCache
+
+SECTION_URL = "/api/v1/templates/5/sections/{seqn}/docx"
+SHA = "ab" * 32
+
+
+def _cached(cache: SectionDocCache, seqn: int, lite: bool = False) -> bytes | None:
+    """Read (and close) the disk tier's file for a section, or None on a miss."""
+    cached = cache.get_file(SHA, seqn, lite)
+    if cached is None:
+        return None
+    file, size = cached
+    with file:
+        data = file.read()
+    assert len(data) == size
+    return data
+
+
+def test_least_recently_used_is_evicted_first():
+    cache = SectionDocCache(max_bytes=100)
+    cache.put(1, 1, False, b"a" * 40)
+    cache.put(1, 2, False, b"b" * 40)
+    cache.get(1, 1)
+
+    cache.put(1, 3, False, b"c" * 40)
+
+    assert cache.get(1, 1) == b"a" * 40
+    assert cache.get(1, 2) is None
+    assert cache.get(1, 3) == b"c" * 40
+    assert cache.stats()["evictions"] == 1
+
+
+def test_size_stays_within_budget():
+    rng = random.Random(1)
+    cache = SectionDocCache(max_bytes=1000)
+
+    for _ in range(2000):
+        cache.put(rng.randrange(5), rng.randrange(20), rng.random() < 0.5, b"x" * rng.randrange(1200))
+        stats = cache.stats()
+        assert stats["bytes"] <= 1000
+        assert stats["bytes"] == sum(map(len, cache._entries.values()))
+
+
+def test_oversized_document_is_not_cached():
+    cache = SectionDocCache(max_bytes=100)
+    cache.put(1, 1, False, b"a" * 60)
+
+    cache.put(1, 2, False, b"b" * 101)
+
+    assert cache.get(1, 2) is None
+    assert cache.get(1, 1) is not None
+    assert not cache.would_cache(101)
+
+
+def test_reloaded_template_drops_old_blob():
+    cache = SectionDocCache(max_bytes=1000)
+    cache.put(7, 1, False, b"old")
+    cache.put(7, 1, True, b"old lite")
+    cache.put(9, 1, False, b"other template")
+
+    cache.check_template(5, 7)
+    cache.check_template(5, 7)
+    assert cache.get(7, 1) == b"old"
+
+    cache.check_template(5, 8)
+    assert cache.get(7, 1) is None
+    assert cache.get(7, 1, True) is None
+    assert cache.get(9, 1) == b"other template"
+    assert cache.stats()["bytes"] == len(b"other template")
+
+
+def test_disk_tier_round_trip(tmp_path):
+    cache = SectionDocCache(max_bytes=0, cache_dir=tmp_path, max_disk_bytes=10_000)
+    assert cache.would_cache(5000)
+    assert _cached(cache, 1) is None
+
+    cache.put_file(SHA, 1, False, b"docx")
+
+    assert (tmp_path / f"v{PARSER_VERSION}" / SHA[:2] / f"{SHA}_1.docx").read_bytes() == b"docx"
+    assert _cached(cache, 1) == b"docx"
+    assert _cached(cache, 1, lite=True) is None
+    assert not list(tmp_path.rglob("*.tmp"))
+    # Another process (or a restarted one) sees the same file
+    assert _cached(SectionDocCache(0, tmp_path, 10_000), 1) == b"docx"
+
+
+def test_open_file_survives_eviction(tmp_path):
+    cache = SectionDocCache(max_bytes=0, cache_dir=tmp_path, max_disk_bytes=10_000)
+    cache.put_file(SHA, 1, False, bytes(range(256)) * 10)
+
+    file, size = cache.get_file(SHA, 1)
+    cache._path(SHA, 1, False).unlink()
+
+    with file:
+        assert file.read() == bytes(range(256)) * 10
+    assert size == 2560
+
+
+def test_writes_under_budget_do_not_scan(tmp_path, monkeypatch):
+    cache = SectionDocCache(max_bytes=0, cache_dir=tmp_path, max_disk_bytes=1000)
+    cache.put_file(SHA, 0, False, bytes(100))
+
+    def scan():
+        raise AssertionError("directory scanned under budget")
+
+    monkeypatch.setattr(cache, "_evict_files", scan)
+    for seqn in range(1, 5):
+        cache.put_file(SHA, seqn, False, bytes(100))
+    cache.put_file(SHA, 4, False, bytes(150))  # replaces a file
+
+    assert (tmp_path / ".size").read_text() == "550"
+    # Another instance (process) shares the running total
+    other = SectionDocCache(max_bytes=0, cache_dir=tmp_path, max_disk_bytes=1000)
+    monkeypatch.setattr(other, "_evict_files", scan)
+    other.put_file(SHA, 5, False, bytes(100))
+    assert (tmp_path / ".size").read_text() == "650"
+
+
+def test_disk_tier_evicts_least_recently_used_files(tmp_path):
+    cache = SectionDocCache(max_bytes=0, cache_dir=tmp_path, max_disk_bytes=250)
+    for seqn in range(3):
+        cache.put_file(SHA, seqn, False, bytes(100))
+        os.utime(cache._path(SHA, seqn, False), (1000 + seqn, 1000 + seqn))
+    # Eviction already made room for the third file
+    assert _cached(cache, 0) is None
+
+    _cached(cache, 1)  # now the most recently used
+    cache.put_file(SHA, 3, False, bytes(100))
+
+    assert _cached(cache, 1) is not None
+    assert _cached(cache, 2) is None
+    assert _cached(cache, 3) is not None
+    assert cache.stats()["disk_evictions"] == 2
+    assert (tmp_path / ".size").read_text() == "200"
+
+
+def test_lost_running_total_is_measured_again(tmp_path):
+    cache = SectionDocCache(max_bytes=0, cache_dir=tmp_path, max_disk_bytes=1000)
+    cache.put_file(SHA, 0, False, bytes(100))
+    (tmp_path / ".size").unlink()
+
+    cache.put_file(SHA, 1, False, bytes(100))
+
+    assert (tmp_path / ".size").read_text() == "200"
+
+
+def test_disk_tier_skips_oversized_documents(tmp_path):
+    cache = SectionDocCache(max_bytes=0, cache_dir=tmp_path, max_disk_bytes=10)
+
+    cache.put_file(SHA, 1, False, bytes(11))
+
+    assert _cached(cache, 1) is None
+    assert not cache.would_cache(11)
+
+
+def test_api_serves_other_process_files(client, fake_db, tmp_path):
+    first = SectionDocCache(max_bytes=0, cache_dir=tmp_path, max_disk_bytes=10**8)
+    second = SectionDocCache(max_bytes=0, cache_dir=tmp_path, max_disk_bytes=10**8)
+    app.dependency_overrides[dependencies.get_section_cache] = lambda: first
+    extracted = client.get(SECTION_URL.format(seqn=3))
+
+    app.dependency_overrides[dependencies.get_section_cache] = lambda: second
+    fake_db.calls.clear()
+    served = client.get(SECTION_URL.format(seqn=3))
+
+    assert served.status_code == 200
+    assert served.content == extracted.content
+    assert served.headers["content-length"] == str(len(extracted.content))
+    assert "get_blob_buffer" not in fake_db.calls
+    assert second.stats()["disk_hits"] == 1
+
+
+def test_api_sends_whole_file_evicted_after_opening(client, tmp_path, monkeypatch):
+    cache = SectionDocCache(max_bytes=0, cache_dir=tmp_path, max_disk_bytes=10**8)
+    app.dependency_overrides[dependencies.get_section_cache] = lambda: cache
+    extracted = client.get(SECTION_URL.format(seqn=3))
+    get_file = cache.get_file
+
+    def evicted_after_opening(sha256_hex, seqn, lite=False):
+        cached = get_file(sha256_hex, seqn, lite)
+        cache._path(sha256_hex, seqn, lite).unlink()
+        return cached
+
+    monkeypatch.setattr(cache, "get_file", evicted_after_opening)
+    served = client.get(SECTION_URL.format(seqn=3))
+
+    assert served.status_code == 200
+    assert served.content == extracted.content
+
+
+def test_api_drops_entries_of_a_reloaded_template(client, fake_db, section_cache, monkeypatch):
+    assert client.get(SECTION_URL.format(seqn=2)).status_code == 200
+    assert section_cache.get(7, 2) is not None
+
+    template = fake_db.get_template_by_id(5)
+    monkeypatch.setattr(fake_db, "get_template_by_id", lambda plsqt_id: {**template, "current_blob_id": 8})
+    monkeypatch.setattr(fake_db, "get_blob_buffer", lambda blob_id: memoryview(fake_db.docx_bytes))
+    assert client.get(SECTION_URL.format(seqn=2)).status_code == 200
+
+    assert section_cache.get(7, 2) is None
+    assert section_cache.get(8, 2) is not None
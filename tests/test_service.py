@@ -0,0 +1,150 @@
+"""
+listldr.service: what apply_template() writes, and how pre-built section
+documents are made for approved templates.
+"""
+
+import hashlib
+from io import BytesIO
+
+import pytest
+
+from listldr import service
+from listldr.models import PreparedTemplate, SectionInfo
+from listldr.parser import extract_section_docx, parse_document
+from tests.conftest import TEMPLATES_DIR
+
+
+class TemplateStore:
+    """
+    One stored template with the upsert semantics of SQMDatabase: every
+    upsert sets the template's status to 'not started', and only approved
+    templates are due for materialization.
+    """
+
+    def __init__(self, status: str = "approved"):
+        self.status = status
+        self.upserts: list[dict] = []
+        self.rows: list[dict] = []
+        self.blobs: dict[int, bytes] = {}
+        self.links: dict[int, int] = {}
+
+    def get_template_fingerprints(self, plsqt_name: str | None = None) -> dict[str, dict]:
+        if not self.upserts:
+            return {}
+        stored = self.upserts[-1]
+        return {stored["plsqt_name"]: {
+            "plsqt_id": 5, "current_blob_id": 7, "plsqt_section_count": len(self.rows),
+            "country_id": stored["country_id"], "currency_id": stored["currency_id"],
+            "product_line_abbr": stored["product_line_abbr"],
+            "blob_sha256": stored["sha256_hash"].hex(),
+        }}
+
+    def upsert_template(self, **kwargs) -> dict:
+        self.upserts.append(kwargs)
+        self.status = "not started"
+        sha256 = kwargs["sha256_hash"].hex()
+        self.rows = [
+            {
+                "plsqts_id": 100 + i,
+                "plsqts_seqn": row.seqn,
+                "plsqts_elem_start": row.elem_start,
+                "plsqts_elem_end": row.elem_end,
+                "plsqts_body_elem_count": kwargs["body_elem_count"],
+                "plsqts_source_sha256": sha256,
+            }
+            for i, row in enumerate(kwargs["sections"])
+        ]
+        return {"plsqt_id": 5, "is_new": False, "blob_id": 7,
+                "sections_inserted": 0, "sections_updated": len(self.rows), "sections_deleted": 0}
+
+    def get_templates_to_materialize(self, plsqt_id: int | None = None) -> list[dict]:
+        return [{"plsqt_id": 5}] if self.status == "approved" else []
+
+    def get_sections(self, plsqt_id: int) -> list[dict]:
+        return self.rows
+
+    def get_or_create_blob(self, file_bytes: bytes, original_filename: str, sha256_hash: bytes | None = None) -> int:
+        for blob_id, data in self.blobs.items():
+            if data == file_bytes:
+                return blob_id
+        blob_id = 1000 + len(self.blobs)
+        self.blobs[blob_id] = file_bytes
+        return blob_id
+
+    def set_section_docx_blob(self, plsqts_id: int, docx_blob_id: int) -> None:
+        self.links[plsqts_id] = docx_blob_id
+
+
+@pytest.fixture(scope="module")
+def prepared(sample_docx) -> PreparedTemplate:
+    parsed = parse_document(BytesIO(sample_docx))
+    return PreparedTemplate(
+        file_bytes=sample_docx,
+        filename="UBM 20 FCFC.docx",
+        template_name="UBM 20 FCFC",
+        product_line_abbr="UBM",
+        sha256=hashlib.sha256(sample_docx).digest(),
+        parsed=parsed,
+        sections=[SectionInfo(s.sequence, s.heading, 1) for s in parsed.sections],
+    )
+
+
+def test_upsert_records_section_ranges(prepared):
+    db = TemplateStore()
+    result = service.apply_template(prepared, db, 1, 1)
+    assert result.plsqt_id == 5 and result.blob_id == 7
+    rows = db.upserts[0]["sections"]
+    assert [(r.seqn, r.elem_start, r.elem_end) for r in rows] == [
+        (span.sequence, span.start, span.end) for span in prepared.parsed.spans
+    ]
+    assert db.upserts[0]["body_elem_count"] == prepared.parsed.element_count
+
+
+def test_load_hashes_the_file_once(monkeypatch):
+    file_bytes = (TEMPLATES_DIR / "UBM 20 FU_FU E.docx").read_bytes()
+    parsed = parse_document(BytesIO(file_bytes))
+    section_types = [(s.sequence, s.heading) for s in parsed.sections]
+    db = TemplateStore()
+    sha256 = hashlib.sha256
+    hashed = []
+
+    def counting_sha256(data=b""):
+        hashed.append(data is file_bytes)
+        return sha256(data)
+
+    monkeypatch.setattr(hashlib, "sha256", counting_sha256)
+    # A new file; the same file again; then with another country, so it is
+    # checked against the stored one, parsed and stored
+    for country_id, expect_unchanged in ((1, False), (1, True), (2, False)):
+        hashed.clear()
+        result = service.load_template(file_bytes, "UBM 20 FU_FU E.docx", db, country_id, 1, section_types)
+
+        assert result.unchanged is expect_unchanged
+        assert hashed.count(True) == 1
+    assert db.upserts[0]["sha256_hash"] == sha256(file_bytes).digest()
+
+
+def test_load_leaves_section_documents_to_the_next_approval(prepared):
+    db = TemplateStore(status="approved")
+
+    service.apply_template(prepared, db, 1, 1)
+
+    assert db.status == "not started"
+    assert db.get_templates_to_materialize(5) == []
+    assert db.links == {}
+
+
+def test_materialize_links_every_section_from_stored_ranges(prepared, monkeypatch):
+    db = TemplateStore()
+    service.apply_template(prepared, db, 1, 1)
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("stored ranges apply, nothing should be parsed")
+
+    monkeypatch.setattr("listldr.parser._locate_sections", no_parse)
+    linked = service.materialize_section_docs(db, 5, 7, prepared.file_bytes)
+
+    assert linked == len(db.rows)
+    for row in db.rows:
+        assert db.blobs[db.links[row["plsqts_id"]]] == extract_section_docx(
+            prepared.file_bytes, row["plsqts_seqn"], prepared.parsed)
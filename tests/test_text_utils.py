@@ -0,0 +1,87 @@
+"""
+SectionTypeMatcher against the dynamic-programming matcher it replaced.
+"""
+
+import random
+
+import pytest
+
+from listldr.text_utils import (
+    SectionTypeMatcher,
+    longest_common_substring,
+    match_section_type,
+    section_type_catalog_version,
+)
+
+SECTION_TYPES = [
+    (1, "Cover Page"),
+    (2, "Principal Characteristics"),
+    (3, "Scope of Supply"),
+    (4, "Options and Accessories"),
+    (5, "Technical Data"),
+    (6, "Prices"),
+    (7, "Terms and Conditions"),
+    (8, "Option"),
+    (9, "Warranty"),
+]
+
+
+def _dp_match(heading_text, section_types, min_match_length=4):
+    """The original matcher: one LCS DP per type, first type wins ties."""
+    best_id, best_len = None, 0
+    for type_id, type_name in section_types:
+        lcs_len = longest_common_substring(heading_text, type_name)
+        if lcs_len > best_len:
+            best_id, best_len = type_id, lcs_len
+    return None if best_len < min_match_length else best_id
+
+
+def test_longest_common_substring():
+    assert longest_common_substring("Option", "Options and Accessories") == 6
+    assert longest_common_substring("PRICES", "prices") == 6
+    assert longest_common_substring("", "Prices") == 0
+
+
+@pytest.mark.parametrize("heading", [
+    "Principal Characteristics",
+    "SCOPE OF SUPPLY - pumps",
+    "Options",
+    "Optional Accessories",
+    "Price list",
+    "General terms",
+    "Données techniques",
+    "",
+])
+def test_catalog_headings(heading):
+    matcher = SectionTypeMatcher(SECTION_TYPES)
+
+    for min_len in (0, 1, 4, 10):
+        assert matcher.match(heading, min_len) == _dp_match(heading, SECTION_TYPES, min_len)
+
+
+def test_random_catalogs():
+    # A small alphabet makes long shared substrings and ties frequent
+    rng = random.Random(1)
+    alphabet = "abcAB dé"
+
+    def text(max_len):
+        return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_len)))
+
+    for _ in range(1000):
+        types = [(rng.randint(1, 50), text(12)) for _ in range(rng.randint(0, 8))]
+        matcher = SectionTypeMatcher(types)
+        for _ in range(5):
+            heading = text(15)
+            for min_len in (0, 1, 2, 4):
+                expected = _dp_match(heading, types, min_len)
+                assert matcher.match(heading, min_len) == expected, (types, heading, min_len)
+                assert match_section_type(heading, types, min_len) == expected
+
+
+def test_catalog_version_tracks_ids_names_and_order():
+    version = section_type_catalog_version(SECTION_TYPES)
+
+    assert section_type_catalog_version(list(SECTION_TYPES)) == version
+    assert section_type_catalog_version(SECTION_TYPES[::-1]) != version
+    assert section_type_catalog_version([(1, "Cover page")] + SECTION_TYPES[1:]) != version
+    assert section_type_catalog_version([(10, "Cover Page")] + SECTION_TYPES[1:]) != version